@@ -37,6 +37,24 @@ a = Analysis(
         'utils',
         'utils.file_processor',
         'utils.helpers',
+        'utils.bloom_filter',
+        'utils.join_engine',
+        'utils.join_planner',
+        'utils.key_sketch',
+        'utils.key_index',
+        'utils.key_encoding',
+        'utils.key_set',
+        'utils.query_plan',
+        'utils.row_filter',
+        'utils.arrow_csv',
+        'utils.csv_schema',
+        'utils.csv_sink',
+        'utils.memory_governor',
+        'utils.reader_engines',
+        'utils.xls_reader',
+        'utils.xlsx_reader',
+        'utils.workbook_pool',
+        'utils.sqlite_engine',
         'utils.validators',
     ],
     hookspath=[],
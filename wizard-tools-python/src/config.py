@@ -1,6 +1,7 @@
 """
 Configuration settings for Wizard Tools application
 """
+import os
 from typing import Dict, Tuple
 
 # Application metadata
@@ -90,9 +91,40 @@ CALCULATOR_BUTTONS = [
 ]
 
 # File processing settings
-MAX_FILE_SIZE_MB = 500
-EXCEL_ENGINE = "openpyxl"  # For .xlsx files
-EXCEL_ENGINE_XLS = "xlrd"  # For .xls files
+MEMORY_HEADROOM = 0.5  # Share of available memory an operation may use before it streams instead
+# Only treat empty strings and whitespace as NA, not "NA" string
+# This prevents "North Atlantic" abbreviated as "NA" from being treated as missing
+NA_VALUES = ['', ' ', '  ']
+# Reader engines: "auto" picks the fastest installed engine from a one-time benchmark,
+# or name one (engines that fail on a file fall back to the first listed)
+EXCEL_ENGINE = "auto"  # Reads .xlsx files: "openpyxl", "native" (built-in reader) or "calamine" (needs python-calamine)
+EXCEL_WRITER_ENGINE = "openpyxl"  # Writes .xlsx files
+EXCEL_ENGINE_XLS = "auto"  # Reads .xls files: "xlrd" or "calamine"
+CSV_ENGINE = "auto"  # "c" or "pyarrow" (multithreaded, needs pyarrow)
+ENGINE_BENCHMARK_PATH = os.path.join(os.path.expanduser("~"), ".wizard_tools", "engines.json")  # Reader engine timings
+CSV_WRITE_BUFFER_MB = 8  # CSV output is written in blocks of this size
+CSV_COMPRESSION = None  # Compression of CSV chunk files: None, "gzip" (.csv.gz) or "zstd" (.csv.zst, needs zstandard)
+SHEET_WORKERS = None  # Worker processes for reading several sheets of a workbook (None = number of CPUs)
+WORKBOOK_POOL_SIZE = 8  # Workbooks kept open between reads in a session (0 = reopen for every read)
+WORKBOOK_POOL_MB = 256  # Approximate memory the open workbooks may hold
+SCHEMA_CACHE_DIRECTORY = os.path.join(os.path.expanduser("~"), ".wizard_tools", "schemas")  # Inferred CSV column types
+
+# Join engine settings
+JOIN_MEMORY_BUDGET_MB = 512  # Approximate memory ceiling for out-of-core joins
+SPILL_DIRECTORY = None  # Directory for temporary spill files (None = system temp)
+JOIN_WORKERS = None  # Worker processes for parallel joins (None = number of CPUs)
+INDEX_DIRECTORY = os.path.join(os.path.expanduser("~"), ".wizard_tools", "indexes")  # Persistent key indexes
+JOIN_EXPLOSION_FACTOR = 10  # Warn when a join may produce this many times the largest input
+JOIN_BLOOM_FALSE_POSITIVE_RATE = 0.01  # Bloom filter accuracy when prefiltering inner joins
+JOIN_PREFILTER_MAX_PASS_RATE = 0.5  # Stop prefiltering an input when more of its rows than this match
+JOIN_ENGINES = [
+    ("Automatic (in memory when it fits)", "auto"),
+    ("In-memory (fastest for small files)", "memory"),
+    ("External sort-merge (low memory)", "sort_merge"),
+    ("Grace hash join (parallel, low memory)", "hash"),
+    ("Broadcast (large file + small lookup files)", "broadcast"),
+    ("SQLite staging (indexed, on disk)", "sqlite"),
+]
 
 # Progress bar settings
 PROGRESS_BAR_LENGTH = 400
@@ -4,6 +4,7 @@ Wizard Tools - Main Entry Point
 A comprehensive toolkit application with Whole Foods theme
 """
 import sys
+import multiprocessing
 import tkinter as tk
 from pathlib import Path
 
@@ -23,4 +24,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # Required for worker processes in the frozen (PyInstaller) build
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
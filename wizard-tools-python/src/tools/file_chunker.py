@@ -15,14 +15,16 @@ if str(parent_dir) not in sys.path:
     sys.path.insert(0, str(parent_dir))
 
 from config import CHUNK_SIZE_OPTIONS, DEFAULT_CHUNK_SIZE, SUPPORTED_FILE_TYPES, PADDING
-from ui.widgets import FileSelector, FolderSelector, ProgressDialog
+from ui.widgets import FileSelector, FolderSelector, ProgressDialog, ColumnSelector
 from utils import (
     FileProcessor,
     validate_data_file,
     validate_folder_writable,
     validate_chunk_size,
     create_zip_file,
-    format_file_size
+    format_file_size,
+    parse_column_list,
+    RowFilter
 )
 
 
@@ -115,6 +117,50 @@ class FileChunkerTool(ttk.Frame):
             value="excel"
         ).pack(side=tk.LEFT, padx=PADDING["small"])
         
+        # Output columns
+        columns_frame = ttk.Frame(options_frame)
+        columns_frame.pack(fill=tk.X, pady=PADDING["small"])
+        
+        ttk.Label(columns_frame, text="Columns:").pack(side=tk.LEFT, padx=(0, PADDING["small"]))
+        
+        self.columns_var = tk.StringVar()
+        ttk.Entry(
+            columns_frame,
+            textvariable=self.columns_var,
+            width=40
+        ).pack(side=tk.LEFT)
+        
+        ttk.Button(
+            columns_frame,
+            text="Select...",
+            command=self._select_columns
+        ).pack(side=tk.LEFT, padx=PADDING["small"])
+        
+        ttk.Label(
+            columns_frame,
+            text="optional, comma-separated in output order",
+            font=("Segoe UI", 9, "italic")
+        ).pack(side=tk.LEFT, padx=PADDING["medium"])
+        
+        # Row filter
+        filter_frame = ttk.Frame(options_frame)
+        filter_frame.pack(fill=tk.X, pady=PADDING["small"])
+        
+        ttk.Label(filter_frame, text="Keep rows where:").pack(side=tk.LEFT, padx=(0, PADDING["small"]))
+        
+        self.row_filter_var = tk.StringVar()
+        ttk.Entry(
+            filter_frame,
+            textvariable=self.row_filter_var,
+            width=40
+        ).pack(side=tk.LEFT)
+        
+        ttk.Label(
+            filter_frame,
+            text="optional, e.g. region == 'NE' and qty > 0",
+            font=("Segoe UI", 9, "italic")
+        ).pack(side=tk.LEFT, padx=PADDING["medium"])
+        
         # Create ZIP option
         self.create_zip_var = tk.BooleanVar(value=True)
         ttk.Checkbutton(
@@ -149,6 +195,31 @@ class FileChunkerTool(ttk.Frame):
         )
         self.status_label.pack(pady=PADDING["small"])
     
+    def _get_columns(self) -> list:
+        """Get the output columns entered by the user (empty list for all columns)"""
+        return parse_column_list(self.columns_var.get())
+    
+    def _select_columns(self):
+        """Open dialog to pick the output columns of the input file"""
+        input_file = self.file_selector.get_path()
+        valid, msg = validate_data_file(input_file)
+        if not valid:
+            messagebox.showwarning("No File", msg)
+            return
+        
+        current = self._get_columns()
+        dialog = ColumnSelector(self, [input_file], self.processor, current={input_file: current})
+        self.wait_window(dialog)
+        
+        selections = dialog.get_selections()
+        if selections is None:
+            return
+        picked = selections.get(input_file, [])
+        # Keep the typed order of columns that are still selected
+        ordered = [column for column in current if column in picked]
+        ordered += [column for column in picked if column not in ordered]
+        self.columns_var.set(", ".join(ordered))
+    
     def _validate_inputs(self) -> tuple[bool, str]:
         """
         Validate user inputs
@@ -177,6 +248,14 @@ class FileChunkerTool(ttk.Frame):
         if not valid:
             return False, msg
         
+        # Validate row filter
+        row_filter = self.row_filter_var.get().strip()
+        if row_filter:
+            try:
+                RowFilter(row_filter)
+            except ValueError as e:
+                return False, str(e)
+        
         return True, ""
     
     def _split_file(self):
@@ -193,6 +272,8 @@ class FileChunkerTool(ttk.Frame):
         chunk_size = self.chunk_size_var.get()
         output_format = self.output_format_var.get()
         create_zip = self.create_zip_var.get()
+        row_filter = self.row_filter_var.get().strip() or None
+        columns = self._get_columns() or None
         
         # Show progress dialog
         progress = ProgressDialog(self, "Splitting File", "Processing file...")
@@ -206,7 +287,9 @@ class FileChunkerTool(ttk.Frame):
                     input_file,
                     output_folder,
                     chunk_size,
-                    output_format
+                    output_format,
+                    row_filter=row_filter,
+                    columns=columns
                 )
                 
                 if not success:
@@ -258,5 +341,7 @@ class FileChunkerTool(ttk.Frame):
         self.folder_selector.clear()
         self.chunk_size_var.set(DEFAULT_CHUNK_SIZE)
         self.output_format_var.set("csv")
+        self.columns_var.set("")
+        self.row_filter_var.set("")
         self.create_zip_var.set(True)
         self.status_var.set("")
\ No newline at end of file
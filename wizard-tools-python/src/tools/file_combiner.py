@@ -6,7 +6,7 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 import threading
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Tuple, Union
 import sys
 
 # Add parent directory to path for imports
@@ -14,9 +14,9 @@ parent_dir = Path(__file__).parent.parent
 if str(parent_dir) not in sys.path:
     sys.path.insert(0, str(parent_dir))
 
-from config import SUPPORTED_FILE_TYPES, PADDING, COLORS
-from ui.widgets import FileSelector, ProgressDialog, ExcelSheetSelector
-from utils import FileProcessor, validate_data_file
+from config import SUPPORTED_FILE_TYPES, PADDING, COLORS, JOIN_ENGINES
+from ui.widgets import FileSelector, ProgressDialog, ExcelSheetSelector, ColumnSelector
+from utils import FileProcessor, RowFilter, validate_data_file, parse_column_list
 
 
 class FileCombinerTool(ttk.Frame):
@@ -31,7 +31,8 @@ class FileCombinerTool(ttk.Frame):
         """
         super().__init__(parent)
         self.processor = FileProcessor()
-        self.sheet_selections = {}  # {file_path: sheet_name}
+        self.sheet_selections = {}  # {file_path: sheet_name, or [sheet_name, ...] for all sheets}
+        self.column_selections = {}  # {file_path: [column, ...]}
         self._setup_ui()
     
     def _setup_ui(self):
@@ -112,6 +113,23 @@ class FileCombinerTool(ttk.Frame):
             font=("Segoe UI", 9, "italic")
         ).pack(side=tk.LEFT, padx=PADDING["medium"])
         
+        # Output column selection button
+        column_button_frame = ttk.Frame(self.scrollable_frame)
+        column_button_frame.pack(fill=tk.X, padx=PADDING["large"], pady=PADDING["small"])
+        
+        ttk.Button(
+            column_button_frame,
+            text="Select Columns...",
+            command=self._select_columns
+        ).pack(side=tk.LEFT)
+        
+        self.column_status_var = tk.StringVar(value="")
+        ttk.Label(
+            column_button_frame,
+            textvariable=self.column_status_var,
+            font=("Segoe UI", 9, "italic")
+        ).pack(side=tk.LEFT, padx=PADDING["medium"])
+        
         # Operation type frame
         operation_frame = ttk.LabelFrame(self.scrollable_frame, text="Combine Operation", padding=PADDING["medium"])
         operation_frame.pack(fill=tk.X, padx=PADDING["large"], pady=PADDING["medium"])
@@ -145,10 +163,30 @@ class FileCombinerTool(ttk.Frame):
             self.union_options_frame,
             text="Align Columns (recommended for files with same columns in different orders)",
             variable=self.align_columns_var
-        ).pack(side=tk.LEFT, padx=(20, 0))
+        ).pack(anchor=tk.W, padx=(20, 0))
+        
+        # Row filter
+        filter_frame = ttk.Frame(self.union_options_frame)
+        filter_frame.pack(fill=tk.X, padx=(20, 0), pady=PADDING["small"])
+        
+        ttk.Label(filter_frame, text="Keep rows where:").pack(side=tk.LEFT, padx=(0, PADDING["small"]))
+        
+        self.row_filter_var = tk.StringVar()
+        ttk.Entry(
+            filter_frame,
+            textvariable=self.row_filter_var,
+            width=40
+        ).pack(side=tk.LEFT)
+        
+        ttk.Label(
+            filter_frame,
+            text="optional, e.g. region == 'NE' and qty > 0",
+            font=("Segoe UI", 9, "italic")
+        ).pack(side=tk.LEFT, padx=PADDING["medium"])
         
         # Join option
         join_frame = ttk.Frame(operation_frame)
+        self.join_frame = join_frame
         join_frame.pack(fill=tk.X, pady=PADDING["small"])
         
         ttk.Radiobutton(
@@ -165,6 +203,25 @@ class FileCombinerTool(ttk.Frame):
             font=("Segoe UI", 9, "italic")
         ).pack(side=tk.LEFT, padx=PADDING["medium"])
         
+        # Lookup option
+        lookup_frame = ttk.Frame(operation_frame)
+        self.lookup_frame = lookup_frame
+        lookup_frame.pack(fill=tk.X, pady=PADDING["small"])
+        
+        ttk.Radiobutton(
+            lookup_frame,
+            text="Lookup (Add Columns)",
+            variable=self.operation_var,
+            value="lookup",
+            command=self._on_operation_change
+        ).pack(side=tk.LEFT)
+        
+        ttk.Label(
+            lookup_frame,
+            text="- Adds columns from the second file to the first, keeping its row order",
+            font=("Segoe UI", 9, "italic")
+        ).pack(side=tk.LEFT, padx=PADDING["medium"])
+        
         # Join options frame (initially hidden)
         self.join_options_frame = ttk.Frame(operation_frame)
         
@@ -172,18 +229,22 @@ class FileCombinerTool(ttk.Frame):
         join_col_frame = ttk.Frame(self.join_options_frame)
         join_col_frame.pack(fill=tk.X, pady=PADDING["small"])
         
-        ttk.Label(join_col_frame, text="Join Column:").pack(side=tk.LEFT, padx=(0, PADDING["small"]))
+        ttk.Label(join_col_frame, text="Join Column(s):").pack(side=tk.LEFT, padx=(0, PADDING["small"]))
         
         self.join_column_var = tk.StringVar()
+        self._join_columns_before_pick = ""
         
         # Use combobox instead of entry for better UX
+        # Several columns can be typed comma-separated (e.g. "store_id, date")
         self.join_column_combo = ttk.Combobox(
             join_col_frame,
             textvariable=self.join_column_var,
             width=30,
-            state="normal"
+            state="normal",
+            postcommand=self._remember_join_columns
         )
         self.join_column_combo.pack(side=tk.LEFT, padx=PADDING["small"])
+        self.join_column_combo.bind("<<ComboboxSelected>>", self._on_join_column_selected)
         
         ttk.Button(
             join_col_frame,
@@ -191,8 +252,22 @@ class FileCombinerTool(ttk.Frame):
             command=self._detect_columns
         ).pack(side=tk.LEFT)
         
+        ttk.Button(
+            join_col_frame,
+            text="Index Join Column",
+            command=self._index_join_column
+        ).pack(side=tk.LEFT, padx=PADDING["small"])
+        
+        self.multi_key_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(
+            self.join_options_frame,
+            text="Multi-column key (picking a column adds it to the key)",
+            variable=self.multi_key_var
+        ).pack(anchor=tk.W, pady=PADDING["small"])
+        
         # Join type
         join_type_frame = ttk.Frame(self.join_options_frame)
+        self.join_type_frame = join_type_frame
         join_type_frame.pack(fill=tk.X, pady=PADDING["small"])
         
         ttk.Label(join_type_frame, text="Join Type:").pack(side=tk.LEFT, padx=(0, PADDING["small"]))
@@ -202,7 +277,9 @@ class FileCombinerTool(ttk.Frame):
             ("Inner Join", "inner"),
             ("Outer Join", "outer"),
             ("Left Join", "left"),
-            ("Right Join", "right")
+            ("Right Join", "right"),
+            ("Semi Join", "semi"),
+            ("Anti Join", "anti")
         ]
         
         for text, value in join_types:
@@ -213,6 +290,23 @@ class FileCombinerTool(ttk.Frame):
                 value=value
             ).pack(side=tk.LEFT, padx=PADDING["small"])
         
+        # Join engine
+        join_engine_frame = ttk.Frame(self.join_options_frame)
+        self.join_engine_frame = join_engine_frame
+        join_engine_frame.pack(fill=tk.X, pady=PADDING["small"])
+        
+        ttk.Label(join_engine_frame, text="Join Engine:").pack(side=tk.LEFT, padx=(0, PADDING["small"]))
+        
+        self.join_engines = dict(JOIN_ENGINES)
+        self.join_engine_var = tk.StringVar(value=JOIN_ENGINES[0][0])
+        ttk.Combobox(
+            join_engine_frame,
+            textvariable=self.join_engine_var,
+            values=list(self.join_engines),
+            width=35,
+            state="readonly"
+        ).pack(side=tk.LEFT, padx=PADDING["small"])
+        
         # Output format
         output_frame = ttk.Frame(self.scrollable_frame)
         output_frame.pack(fill=tk.X, padx=PADDING["large"], pady=PADDING["medium"])
@@ -295,7 +389,8 @@ class FileCombinerTool(ttk.Frame):
             return
         
         # Open sheet selector dialog
-        dialog = ExcelSheetSelector(self, excel_files, self.processor)
+        # Every sheet of a workbook can be stacked by a union
+        dialog = ExcelSheetSelector(self, excel_files, self.processor, allow_all_sheets=True)
         self.wait_window(dialog)
         
         # Get selections
@@ -307,11 +402,42 @@ class FileCombinerTool(ttk.Frame):
         else:
             self.sheet_status_var.set("")
     
+    def _select_columns(self):
+        """Open dialog to select the columns to keep from each file"""
+        file_paths = self.file_selector.get_paths()
+        
+        if not file_paths:
+            messagebox.showwarning("No Files", "Please select input files first")
+            return
+        
+        self._update_file_order_display()
+        
+        dialog = ColumnSelector(self, file_paths, self.processor, self.sheet_selections, self.column_selections)
+        self.wait_window(dialog)
+        
+        selections = dialog.get_selections()
+        if selections is None:
+            return
+        self.column_selections = selections
+        if selections:
+            self.column_status_var.set(f"✓ Columns selected for {len(selections)} file(s)")
+        else:
+            self.column_status_var.set("")
+    
     def _on_operation_change(self):
         """Handle operation type change"""
-        if self.operation_var.get() == "join":
-            self.join_options_frame.pack(fill=tk.X, pady=PADDING["medium"])
+        operation = self.operation_var.get()
+        if operation in ("join", "lookup"):
+            # Lookups share the join column options but not the join type or engine
+            after = self.join_frame if operation == "join" else self.lookup_frame
+            self.join_options_frame.pack(fill=tk.X, pady=PADDING["medium"], after=after)
             self.union_options_frame.pack_forget()
+            if operation == "join":
+                self.join_type_frame.pack(fill=tk.X, pady=PADDING["small"])
+                self.join_engine_frame.pack(fill=tk.X, pady=PADDING["small"])
+            else:
+                self.join_type_frame.pack_forget()
+                self.join_engine_frame.pack_forget()
         else:
             self.join_options_frame.pack_forget()
             self.union_options_frame.pack(fill=tk.X, pady=PADDING["small"])
@@ -370,6 +496,68 @@ class FileCombinerTool(ttk.Frame):
         except Exception as e:
             messagebox.showerror("Error", f"Failed to detect columns:\n{str(e)}")
     
+    def _remember_join_columns(self):
+        """Keep the typed key columns before the dropdown replaces them"""
+        self._join_columns_before_pick = self.join_column_var.get()
+    
+    def _on_join_column_selected(self, event=None):
+        """Add the picked column to the key when building a multi-column key"""
+        if not self.multi_key_var.get():
+            return
+        
+        known = list(self.join_column_combo['values'])
+        columns = parse_column_list(self._join_columns_before_pick, known)
+        picked = self.join_column_var.get()
+        if picked not in columns:
+            columns.append(picked)
+        self.join_column_var.set(", ".join(columns))
+    
+    def _get_join_columns(self) -> Union[str, List[str]]:
+        """
+        Get the join key entered by the user
+        
+        Returns:
+            Column name for a single key, list of names for a composite key
+            (empty list if nothing was entered)
+        """
+        columns = parse_column_list(self.join_column_var.get(), list(self.join_column_combo['values']))
+        return columns[0] if len(columns) == 1 else columns
+    
+    def _index_join_column(self):
+        """Build persistent key indexes on the join column of the selected CSV files"""
+        file_paths = [path for path in self.file_selector.get_paths() if path.lower().endswith('.csv')]
+        join_column = self._get_join_columns()
+        
+        if not file_paths:
+            messagebox.showwarning("Warning", "Please select CSV files to index")
+            return
+        if not join_column:
+            messagebox.showwarning("Warning", "Please specify a join column")
+            return
+        
+        progress = ProgressDialog(self, "Indexing Files", "Building key indexes...")
+        
+        def process():
+            errors = []
+            for file_path in file_paths:
+                progress.update_status(f"Indexing {Path(file_path).name}...")
+                success, error = self.processor.build_key_index(file_path, join_column)
+                if not success:
+                    errors.append(f"{Path(file_path).name}: {error}")
+            
+            def done():
+                progress.close()
+                if errors:
+                    self.status_var.set("✗ Some files could not be indexed")
+                    messagebox.showerror("Error", "Failed to index:\n" + "\n".join(errors))
+                else:
+                    self.status_var.set(f"✓ Indexed {self.join_column_var.get()} in {len(file_paths)} file(s)")
+            
+            self.after(0, done)
+        
+        thread = threading.Thread(target=process, daemon=True)
+        thread.start()
+    
     def _show_column_selector(self, columns: list):
         """Show dialog to select join column"""
         dialog = tk.Toplevel(self)
@@ -436,11 +624,25 @@ class FileCombinerTool(ttk.Frame):
                 return False, f"Invalid file: {msg}"
         
         # Validate join-specific inputs
-        if self.operation_var.get() == "join":
-            join_column = self.join_column_var.get().strip()
-            if not join_column:
+        if self.operation_var.get() in ("join", "lookup"):
+            if not self._get_join_columns():
                 return False, "Please specify a join column"
         
+        if self.operation_var.get() != "union" and any(
+            isinstance(self.sheet_selections.get(file_path), list) for file_path in file_paths
+        ):
+            return False, "All sheets of a workbook can only be combined with Union; select one sheet per file"
+        
+        if self.operation_var.get() == "lookup" and len(file_paths) != 2:
+            return False, "Lookups need exactly 2 files: the file to enrich, then the reference file"
+        
+        row_filter = self.row_filter_var.get().strip()
+        if self.operation_var.get() == "union" and row_filter:
+            try:
+                RowFilter(row_filter)
+            except ValueError as e:
+                return False, str(e)
+        
         return True, ""
     
     def _combine_files(self):
@@ -461,7 +663,12 @@ class FileCombinerTool(ttk.Frame):
         ext = ".csv" if output_format == "csv" else ".xlsx"
         output_path = filedialog.asksaveasfilename(
             defaultextension=ext,
-            filetypes=[("CSV files", "*.csv"), ("Excel files", "*.xlsx"), ("All files", "*.*")]
+            filetypes=[
+                ("CSV files", "*.csv"),
+                ("Compressed CSV files", "*.csv.gz *.csv.zst"),
+                ("Excel files", "*.xlsx"),
+                ("All files", "*.*")
+            ]
         )
         
         if not output_path:
@@ -476,15 +683,20 @@ class FileCombinerTool(ttk.Frame):
                 if operation == "union":
                     progress.update_status("Combining files with union...")
                     success, error = self._union_files_with_sheets(file_paths, output_path)
+                elif operation == "lookup":
+                    progress.update_status("Looking up columns from the reference file...")
+                    success, error = self._lookup_files_with_sheets(file_paths, output_path)
                 else:
-                    join_column = self.join_column_var.get().strip()
+                    join_column = self._get_join_columns()
                     join_type = self.join_type_var.get()
-                    progress.update_status(f"Combining files with {join_type} join...")
+                    engine = self.join_engines[self.join_engine_var.get()]
+                    progress.update_status(f"Checking join keys, then combining with {join_type} join...")
                     success, error = self._join_files_with_sheets(
                         file_paths,
                         output_path,
                         join_column,
-                        join_type
+                        join_type,
+                        engine
                     )
                 
                 if not success:
@@ -515,88 +727,92 @@ class FileCombinerTool(ttk.Frame):
         messagebox.showerror("Error", f"Failed to combine files:\n{error}")
     
     def _union_files_with_sheets(self, file_paths: List[str], output_path: str) -> Tuple[bool, str]:
-        """Union files with sheet selection support"""
-        try:
-            dfs = []
-            for file_path in file_paths:
-                sheet_name = self.sheet_selections.get(file_path)
-                df = self.processor.read_file(file_path, sheet_name=sheet_name)
-                dfs.append(df)
-            
-            # Align columns if requested
-            import pandas as pd
-            if self.align_columns_var.get():
-                dfs = self.processor._align_dataframe_columns(dfs)
-            
-            # Concatenate all DataFrames
-            combined_df = pd.concat(dfs, ignore_index=True)
-            
-            # Write output file
-            success = self.processor.write_file(combined_df, output_path)
-            
-            if success:
-                return True, ""
-            else:
-                return False, "Failed to write output file"
-        except Exception as e:
-            return False, str(e)
+        """Union files with sheet and column selection support"""
+        return self.processor.union_files(
+            file_paths,
+            output_path,
+            align_columns=self.align_columns_var.get(),
+            sheet_names=self.sheet_selections,
+            columns=self.column_selections,
+            row_filter=self.row_filter_var.get().strip() or None
+        )
+    
+    def _lookup_files_with_sheets(self, file_paths: List[str], output_path: str) -> Tuple[bool, str]:
+        """Add columns from the second file to the first, with sheet and column selection support"""
+        main_path, reference_path = file_paths
+        return self.processor.enrich_file(
+            main_path,
+            reference_path,
+            output_path,
+            self._get_join_columns(),
+            lookup_columns=self.column_selections.get(reference_path),
+            sheet_names=self.sheet_selections,
+            columns=self.column_selections.get(main_path)
+        )
     
     def _join_files_with_sheets(
         self,
         file_paths: List[str],
         output_path: str,
-        join_column: str,
-        join_type: str
+        join_column: Union[str, List[str]],
+        join_type: str,
+        engine: str = 'auto'
     ) -> Tuple[bool, str]:
-        """Join files with sheet selection support"""
-        try:
-            import pandas as pd
-            import os
-            
-            # Read first file
-            sheet_name = self.sheet_selections.get(file_paths[0])
-            result_df = self.processor.read_file(file_paths[0], sheet_name=sheet_name)
-            
-            # Check if join column exists
-            if join_column not in result_df.columns:
-                return False, f"Join column '{join_column}' not found in first file"
-            
-            # Join with remaining files
-            for file_path in file_paths[1:]:
-                sheet_name = self.sheet_selections.get(file_path)
-                df = self.processor.read_file(file_path, sheet_name=sheet_name)
-                
-                # Check if join column exists
-                if join_column not in df.columns:
-                    return False, f"Join column '{join_column}' not found in {os.path.basename(file_path)}"
-                
-                # Perform join
-                result_df = result_df.merge(
-                    df,
-                    on=join_column,
-                    how=join_type,
-                    suffixes=('', f'_{os.path.basename(file_path)}')
-                )
-            
-            # Write output file
-            success = self.processor.write_file(result_df, output_path)
+        """Join files with sheet and column selection support"""
+        return self.processor.join_files(
+            file_paths,
+            output_path,
+            join_column,
+            join_type,
+            sheet_names=self.sheet_selections,
+            engine=engine,
+            confirm=self._confirm_risky_join,
+            columns=self.column_selections
+        )
+    
+    def _confirm_risky_join(self, report: dict) -> bool:
+        """
+        Ask whether to continue a join flagged by the cardinality check
+        
+        Called from the worker thread; the question is asked on the UI thread.
+        
+        Args:
+            report: Report from FileProcessor.check_join_cardinality
             
-            if success:
-                return True, ""
-            else:
-                return False, "Failed to write output file"
-        except Exception as e:
-            return False, str(e)
+        Returns:
+            True to continue with the join, False to cancel
+        """
+        answer = {"continue": False}
+        answered = threading.Event()
+        
+        def ask():
+            answer["continue"] = messagebox.askyesno(
+                "Possible Join Explosion",
+                f"{report['summary']}\n\nContinue with the join?",
+                icon="warning"
+            )
+            answered.set()
+        
+        self.after(0, ask)
+        answered.wait()
+        return answer["continue"]
     
     def _clear_form(self):
         """Clear all form inputs"""
         self.file_selector.clear()
         self.operation_var.set("union")
         self.align_columns_var.set(True)
+        self.row_filter_var.set("")
         self.join_column_var.set("")
+        self.multi_key_var.set(False)
         self.join_type_var.set("inner")
+        self.join_engine_var.set(JOIN_ENGINES[0][0])
         self.output_format_var.set("csv")
         self.status_var.set("")
         self.sheet_selections = {}
         self.sheet_status_var.set("")
+        self.column_selections = {}
+        self.column_status_var.set("")
+        # A new session starts; release the workbooks the last one kept open
+        self.processor.close_workbooks()
         self._on_operation_change()
\ No newline at end of file
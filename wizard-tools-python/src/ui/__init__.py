@@ -8,7 +8,8 @@ from .widgets import (
     FolderSelector,
     ProgressDialog,
     ScrolledText,
-    ExcelSheetSelector
+    ExcelSheetSelector,
+    ColumnSelector
 )
 from .main_window import MainWindow
 
@@ -20,5 +21,6 @@ __all__ = [
     "ProgressDialog",
     "ScrolledText",
     "ExcelSheetSelector",
+    "ColumnSelector",
     "MainWindow"
 ]
\ No newline at end of file
@@ -3,7 +3,7 @@ Custom widgets for Wizard Tools application
 """
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from typing import Optional, Callable, List, Dict
+from typing import Optional, Callable, List, Dict, Union
 import sys
 from pathlib import Path
 
@@ -385,7 +385,9 @@ class ScrolledText(ttk.Frame):
 class ExcelSheetSelector(tk.Toplevel):
     """Dialog for selecting Excel sheets from multiple files"""
     
-    def __init__(self, parent: tk.Widget, file_paths: List[str], processor):
+    ALL_SHEETS = "(All sheets)"
+    
+    def __init__(self, parent: tk.Widget, file_paths: List[str], processor, allow_all_sheets: bool = False):
         """
         Initialize Excel sheet selector dialog
         
@@ -393,6 +395,7 @@ class ExcelSheetSelector(tk.Toplevel):
             parent: Parent widget
             file_paths: List of Excel file paths
             processor: FileProcessor instance
+            allow_all_sheets: Offer an option selecting every sheet of a file
         """
         super().__init__(parent)
         self.title("Select Excel Sheets")
@@ -401,7 +404,9 @@ class ExcelSheetSelector(tk.Toplevel):
         
         self.file_paths = file_paths
         self.processor = processor
+        self.allow_all_sheets = allow_all_sheets
         self.sheet_selections = {}  # {file_path: sheet_name}
+        self.sheet_lists = {}  # {file_path: [sheet_name, ...]}
         self.result = None
         
         # Configure window
@@ -495,13 +500,18 @@ class ExcelSheetSelector(tk.Toplevel):
         # Create combobox for sheet selection
         sheet_var = tk.StringVar(value=sheet_names[0])
         self.sheet_selections[file_path] = sheet_var
+        self.sheet_lists[file_path] = sheet_names
         
         ttk.Label(frame, text="Select sheet:").pack(side=tk.LEFT, padx=(0, PADDING["small"]))
         
+        choices = list(sheet_names)
+        if self.allow_all_sheets and len(sheet_names) > 1:
+            choices.append(self.ALL_SHEETS)
+        
         sheet_combo = ttk.Combobox(
             frame,
             textvariable=sheet_var,
-            values=sheet_names,
+            values=choices,
             state="readonly",
             width=40
         )
@@ -509,7 +519,10 @@ class ExcelSheetSelector(tk.Toplevel):
     
     def _on_ok(self):
         """Handle OK button click"""
-        self.result = {fp: var.get() for fp, var in self.sheet_selections.items()}
+        self.result = {
+            fp: list(self.sheet_lists[fp]) if var.get() == self.ALL_SHEETS else var.get()
+            for fp, var in self.sheet_selections.items()
+        }
         self.destroy()
     
     def _on_cancel(self):
@@ -517,11 +530,185 @@ class ExcelSheetSelector(tk.Toplevel):
         self.result = None
         self.destroy()
     
-    def get_selections(self) -> Optional[Dict[str, str]]:
+    def get_selections(self) -> Optional[Dict[str, Union[str, List[str]]]]:
         """
         Get the sheet selections
         
         Returns:
-            Dictionary mapping file paths to selected sheet names, or None if cancelled
+            Dictionary mapping file paths to selected sheet names (a list of every
+            sheet name for "All sheets"), or None if cancelled
+        """
+        return self.result
+
+
+class ColumnSelector(tk.Toplevel):
+    """Dialog for selecting the columns to keep from multiple files"""
+    
+    def __init__(
+        self,
+        parent: tk.Widget,
+        file_paths: List[str],
+        processor,
+        sheet_selections: Optional[Dict[str, str]] = None,
+        current: Optional[Dict[str, List[str]]] = None
+    ):
+        """
+        Initialize column selector dialog
+        
+        Args:
+            parent: Parent widget
+            file_paths: List of file paths
+            processor: FileProcessor instance
+            sheet_selections: Optional mapping of Excel file path to sheet name
+            current: Optional current selections to start from
+        """
+        super().__init__(parent)
+        self.title("Select Columns")
+        self.transient(parent)
+        self.grab_set()
+        
+        self.file_paths = file_paths
+        self.processor = processor
+        self.sheet_selections = sheet_selections or {}
+        self.current = current or {}
+        self.listboxes = {}  # {file_path: (listbox, columns)}
+        self.result = None
+        
+        # Configure window
+        self.configure(bg=COLORS["beige"])
+        self.geometry("600x500")
+        
+        # Center on parent
+        self.update_idletasks()
+        x = parent.winfo_x() + (parent.winfo_width() - 600) // 2
+        y = parent.winfo_y() + (parent.winfo_height() - 500) // 2
+        self.geometry(f"+{x}+{y}")
+        
+        self._setup_ui()
+    
+    def _setup_ui(self):
+        """Setup the user interface"""
+        # Title
+        title = ttk.Label(
+            self,
+            text="Select Columns to Keep",
+            style="Title.TLabel"
+        )
+        title.pack(pady=PADDING["medium"])
+        
+        # Description
+        desc = ttk.Label(
+            self,
+            text="For each file, select the columns to keep. Other columns are not read. "
+                 "Join columns are always kept.",
+            wraplength=550
+        )
+        desc.pack(pady=PADDING["small"])
+        
+        # Scrollable frame for file/column selections
+        canvas = tk.Canvas(self, bg=COLORS["beige"], highlightthickness=0)
+        scrollbar = ttk.Scrollbar(self, orient=tk.VERTICAL, command=canvas.yview)
+        scrollable_frame = ttk.Frame(canvas)
+        
+        scrollable_frame.bind(
+            "<Configure>",
+            lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
+        )
+        
+        canvas.create_window((0, 0), window=scrollable_frame, anchor=tk.NW)
+        canvas.configure(yscrollcommand=scrollbar.set)
+        
+        # Buttons frame (packed before the canvas so it stays visible)
+        buttons_frame = ttk.Frame(self)
+        buttons_frame.pack(side=tk.BOTTOM, pady=PADDING["medium"])
+        
+        ttk.Button(
+            buttons_frame,
+            text="OK",
+            command=self._on_ok,
+            style="Primary.TButton"
+        ).pack(side=tk.LEFT, padx=PADDING["small"])
+        
+        ttk.Button(
+            buttons_frame,
+            text="Cancel",
+            command=self._on_cancel
+        ).pack(side=tk.LEFT, padx=PADDING["small"])
+        
+        canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True, padx=PADDING["medium"])
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        
+        # Create selection widgets for each file
+        for file_path in self.file_paths:
+            self._create_file_column_selector(scrollable_frame, file_path)
+    
+    def _create_file_column_selector(self, parent: tk.Widget, file_path: str):
+        """Create column selector for a single file"""
+        frame = ttk.LabelFrame(
+            parent,
+            text=Path(file_path).name,
+            padding=PADDING["medium"]
+        )
+        frame.pack(fill=tk.X, padx=PADDING["small"], pady=PADDING["small"])
+        
+        # Get column names
+        columns = self.processor.get_column_names(file_path, sheet_name=self.sheet_selections.get(file_path))
+        
+        if not columns:
+            ttk.Label(
+                frame,
+                text="Could not read columns from this file",
+                foreground=COLORS["error_red"]
+            ).pack()
+            return
+        
+        listbox = tk.Listbox(
+            frame,
+            selectmode=tk.MULTIPLE,
+            exportselection=False,
+            height=min(len(columns), 6),
+            width=60
+        )
+        listbox.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        
+        # Start with the current selection, or every column
+        selected = set(self.current.get(file_path) or columns)
+        for i, column in enumerate(columns):
+            listbox.insert(tk.END, column)
+            if column in selected:
+                listbox.selection_set(i)
+        
+        self.listboxes[file_path] = (listbox, columns)
+    
+    def _on_ok(self):
+        """Handle OK button click"""
+        result = {}
+        for file_path, (listbox, columns) in self.listboxes.items():
+            chosen = [columns[i] for i in listbox.curselection()]
+            if not chosen:
+                messagebox.showwarning(
+                    "No Columns",
+                    f"Please select at least one column from {Path(file_path).name}",
+                    parent=self
+                )
+                return
+            # Files keeping every column need no entry
+            if len(chosen) < len(columns):
+                result[file_path] = chosen
+        self.result = result
+        self.destroy()
+    
+    def _on_cancel(self):
+        """Handle Cancel button click"""
+        self.result = None
+        self.destroy()
+    
+    def get_selections(self) -> Optional[Dict[str, List[str]]]:
+        """
+        Get the column selections
+        
+        Returns:
+            Dictionary mapping file paths to selected columns (only for files
+            not keeping every column), or None if cancelled
         """
-        return self.result
\ No newline at end of file
+        return self.result
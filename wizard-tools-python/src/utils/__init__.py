@@ -2,6 +2,7 @@
 Utilities package for Wizard Tools application
 """
 from .file_processor import FileProcessor
+from .row_filter import RowFilter
 from .validators import (
     validate_file_exists,
     validate_file_size,
@@ -21,6 +22,7 @@ from .helpers import (
     is_csv_file,
     is_excel_file,
     create_output_filename,
+    parse_column_list,
     create_zip_file,
     hex_to_rgb,
     rgb_to_hex,
@@ -41,6 +43,7 @@ from .helpers import (
 
 __all__ = [
     "FileProcessor",
+    "RowFilter",
     "validate_file_exists",
     "validate_file_size",
     "validate_csv_file",
@@ -57,6 +60,7 @@ __all__ = [
     "is_csv_file",
     "is_excel_file",
     "create_output_filename",
+    "parse_column_list",
     "create_zip_file",
     "hex_to_rgb",
     "rgb_to_hex",
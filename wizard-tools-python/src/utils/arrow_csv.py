@@ -0,0 +1,198 @@
+"""
+Arrow CSV parsing for Wizard Tools application
+Multithreaded CSV reading into compact Arrow-backed string columns (needs the optional pyarrow package)
+"""
+import csv
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+except ImportError:
+    pa = pa_csv = None
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import NA_VALUES
+
+# Bytes parsed per block; blocks are parsed in parallel
+BLOCK_BYTES = 16 * 1024 * 1024
+
+
+def available() -> bool:
+    """Whether pyarrow is installed"""
+    return pa_csv is not None
+
+
+def _string_dtype() -> pd.StringDtype:
+    """Arrow-backed strings that use NaN for missing values, like the default pandas text columns"""
+    try:
+        return pd.StringDtype("pyarrow", na_value=np.nan)
+    except TypeError:
+        # pandas before 2.3 has only the pd.NA variant
+        return pd.StringDtype("pyarrow")
+
+
+class ArrowCsvError(ValueError):
+    """Arrow could not parse a file the way the C parser would"""
+
+    def __init__(self, message: str, rows_read: int = 0):
+        """
+        Initialize the error
+
+        Args:
+            message: Description of the problem
+            rows_read: Rows already produced before the problem was found
+        """
+        super().__init__(message)
+        self.rows_read = rows_read
+
+
+def _schema_type(dtype: str):
+    """Arrow type for a column type of utils.csv_schema"""
+    return {'Int64': pa.int64(), 'float64': pa.float64(), 'boolean': pa.bool_(), 'str': pa.string()}[dtype]
+
+
+def _header(file_path: str) -> List[str]:
+    """Read the column names from the first line of a CSV file"""
+    with open(file_path, newline='', encoding='utf-8-sig') as f:
+        return next(csv.reader(f), [])
+
+
+def _options(file_path: str, usecols: Optional[List[str]], schema: Optional[Dict[str, str]] = None):
+    """
+    Work out Arrow read options giving the NA handling of read_file
+
+    Only NA_VALUES are missing (keep_default_na=False), and columns Arrow
+    would turn into dates or times are kept as text, as the C parser does.
+    Columns in schema get its types instead of inferred ones.
+
+    Returns:
+        Tuple of (read options, convert options, column names in file order)
+    """
+    header = _header(file_path)
+    if len(set(header)) != len(header):
+        # The C parser renames repeated names ('a', 'a.1'); Arrow does not
+        raise ArrowCsvError("Repeated column names")
+    columns = header if usecols is None else [name for name in header if name in set(usecols)]
+    if usecols is not None and len(columns) != len(set(usecols)):
+        raise ArrowCsvError("Usecols do not match columns")
+
+    read_options = pa_csv.ReadOptions(use_threads=True, block_size=BLOCK_BYTES)
+    column_types = {
+        name: _schema_type(dtype)
+        for name, dtype in (schema or {}).items() if name in columns
+    }
+    while True:
+        convert_options = pa_csv.ConvertOptions(
+            null_values=NA_VALUES,
+            strings_can_be_null=True,
+            quoted_strings_can_be_null=True,
+            include_columns=columns,
+            column_types=column_types
+        )
+        # Types are inferred from the first block, so opening a stream is enough
+        reader = pa_csv.open_csv(file_path, read_options=read_options, convert_options=convert_options)
+        temporal = [
+            field.name for field in reader.schema
+            if pa.types.is_temporal(field.type) and field.name not in column_types
+        ]
+        reader.close()
+        if not temporal:
+            return read_options, convert_options, columns
+        column_types.update({name: pa.string() for name in temporal})
+
+
+def _to_pandas(table, start: int = 0, nullable: bool = False) -> pd.DataFrame:
+    """Convert an Arrow table, keeping text columns Arrow-backed (and integers and booleans nullable if asked)"""
+    string_dtype = _string_dtype()
+    types = {pa.string(): string_dtype, pa.large_string(): string_dtype}
+    if nullable:
+        types.update({pa.int64(): pd.Int64Dtype(), pa.bool_(): pd.BooleanDtype()})
+    df = table.to_pandas(types_mapper=types.get)
+    for field in table.schema:
+        # Columns with no values at all are float NaN, as with the C parser
+        if pa.types.is_null(field.type):
+            df[field.name] = df[field.name].astype('float64')
+    df.index = pd.RangeIndex(start, start + len(df))
+    return df
+
+
+def read_batches(
+    file_path: str,
+    batch_rows: int,
+    usecols: Optional[List[str]] = None,
+    schema: Optional[Dict[str, str]] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Read a CSV file as DataFrame batches with the Arrow parser
+
+    Column types are inferred from the first block. A later value that does
+    not fit raises ArrowCsvError carrying the number of rows already
+    produced, so the caller can finish the file with the C parser.
+
+    Args:
+        file_path: Path to the CSV file
+        batch_rows: Rows per batch (the last batch may hold fewer)
+        usecols: Only read these columns (None for all)
+        schema: Column types from utils.csv_schema, used instead of inferring them
+
+    Yields:
+        DataFrame batches in file order, columns in file order; at least one
+        (possibly empty) batch
+
+    Raises:
+        ArrowCsvError: If the file cannot be parsed like the C parser would
+    """
+    rows_read = 0
+    try:
+        read_options, convert_options, columns = _options(file_path, usecols, schema)
+        reader = pa_csv.open_csv(file_path, read_options=read_options, convert_options=convert_options)
+        pending = []
+        pending_rows = 0
+        produced = False
+        for record_batch in reader:
+            pending.append(record_batch)
+            pending_rows += record_batch.num_rows
+            while pending_rows >= batch_rows:
+                table = pa.Table.from_batches(pending)
+                yield _to_pandas(table.slice(0, batch_rows).select(columns), rows_read, schema is not None)
+                produced = True
+                rows_read += batch_rows
+                pending = table.slice(batch_rows).to_batches()
+                pending_rows -= batch_rows
+        if pending_rows or not produced:
+            table = pa.Table.from_batches(pending, schema=reader.schema)
+            yield _to_pandas(table.select(columns), rows_read, schema is not None)
+    except pa.ArrowException as e:
+        raise ArrowCsvError(str(e), rows_read)
+
+
+def read_csv(file_path: str, usecols: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a whole CSV file with the multithreaded Arrow parser
+
+    Args:
+        file_path: Path to the CSV file
+        usecols: Only read these columns (None for all)
+
+    Returns:
+        DataFrame with Arrow-backed text columns
+
+    Raises:
+        ArrowCsvError: If the file cannot be parsed like the C parser would
+    """
+    try:
+        read_options, convert_options, columns = _options(file_path, usecols)
+        table = pa_csv.read_csv(file_path, read_options=read_options, convert_options=convert_options)
+        return _to_pandas(table.select(columns))
+    except pa.ArrowException as e:
+        raise ArrowCsvError(str(e))
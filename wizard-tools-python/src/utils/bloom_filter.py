@@ -0,0 +1,79 @@
+"""
+Bloom filters over join keys for Wizard Tools application
+Compact approximate key sets used to drop rows that cannot match before they are joined
+"""
+import math
+
+import numpy as np
+
+MIN_BITS = 1024
+MAX_HASHES = 16
+_LOW_BITS = np.uint64(0xFFFFFFFF)
+_BIT_MASKS = np.left_shift(1, np.arange(8)).astype(np.uint8)
+
+
+class BloomFilter:
+    """Bit-array Bloom filter over 64-bit join key hashes"""
+
+    def __init__(self, capacity: int, false_positive_rate: float = 0.01, max_bytes: float = float('inf')):
+        """
+        Size an empty filter for an expected number of distinct keys
+
+        Args:
+            capacity: Expected number of distinct keys
+            false_positive_rate: Target rate of non-members reported as members
+            max_bytes: Upper bound on the bit array size; a smaller array
+                raises the false positive rate but never drops a member
+        """
+        capacity = max(int(capacity), 1)
+        bits = -capacity * math.log(false_positive_rate) / (math.log(2) ** 2)
+        # A power of two, so positions are masked rather than divided
+        bits = 1 << math.ceil(math.log2(max(bits, MIN_BITS)))
+        while bits > MIN_BITS and bits > max_bytes * 8:
+            bits //= 2
+        self.n_bits = bits
+        self.n_hashes = min(max(round(bits / capacity * math.log(2)), 1), MAX_HASHES)
+        self.mask = np.uint64(bits - 1)
+        self.bits = np.zeros(bits // 8, dtype=np.uint8)
+
+    @staticmethod
+    def _hash_pair(hashes: np.ndarray):
+        """Start and step of the double hashing sequence of each key"""
+        return hashes & _LOW_BITS, (hashes >> np.uint64(32)) | np.uint64(1)
+
+    def add(self, hashes: np.ndarray) -> None:
+        """
+        Add keys to the filter
+
+        Args:
+            hashes: 64-bit key hashes (see join_engine.hash_keys)
+        """
+        position, step = self._hash_pair(hashes)
+        for _ in range(self.n_hashes):
+            position &= self.mask
+            np.bitwise_or.at(self.bits, position >> np.uint64(3), _BIT_MASKS[position & np.uint64(7)])
+            position += step
+
+    def might_contain(self, hashes: np.ndarray) -> np.ndarray:
+        """
+        Check which keys may have been added
+
+        Args:
+            hashes: 64-bit key hashes (see join_engine.hash_keys)
+
+        Returns:
+            Boolean array; False means the key was certainly never added
+        """
+        position, step = self._hash_pair(hashes)
+        result = np.ones(len(hashes), dtype=bool)
+        candidates = np.arange(len(hashes))
+        for _ in range(self.n_hashes):
+            # Only keys that passed every earlier probe are checked again
+            position &= self.mask
+            hit = (self.bits[position >> np.uint64(3)] & _BIT_MASKS[position & np.uint64(7)]) != 0
+            result[candidates[~hit]] = False
+            candidates, position, step = candidates[hit], position[hit], step[hit]
+            if len(candidates) == 0:
+                break
+            position += step
+        return result
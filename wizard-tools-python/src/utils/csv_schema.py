@@ -0,0 +1,229 @@
+"""
+CSV schema inference for Wizard Tools application
+Infers column types once from a sample of a CSV file and caches them per file, so every batch is parsed alike
+"""
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import NA_VALUES, SCHEMA_CACHE_DIRECTORY
+
+SCHEMA_FORMAT_VERSION = 1
+# Rows sampled from the start of the file
+SAMPLE_ROWS = 10000
+# Further blocks sampled evenly through the rest of the file, and their size
+SAMPLE_BLOCKS = 8
+SAMPLE_BLOCK_BYTES = 256 * 1024
+
+# Column types, from narrowest to text. Integers are nullable so a column
+# keeps its type in batches with blank cells.
+WIDER = {'Int64': 'float64', 'float64': 'str', 'boolean': 'str', 'str': None}
+_BOOLEAN_VALUES = {'True': True, 'TRUE': True, 'true': True, 'False': False, 'FALSE': False, 'false': False}
+_INTEGER = r'\s*[+-]?\d{1,18}\s*'
+
+# Schemas already loaded in this session, by absolute path
+_loaded: Dict[str, Tuple[Dict[str, int], Dict[str, str]]] = {}
+
+
+def _cache_path(file_path: str, cache_dir: Optional[str]) -> str:
+    """Path of the cached schema for a file"""
+    identity = os.path.abspath(file_path).encode('utf-8')
+    return os.path.join(cache_dir or SCHEMA_CACHE_DIRECTORY, hashlib.sha1(identity).hexdigest() + '.json')
+
+
+def _file_signature(file_path: str) -> Dict[str, int]:
+    """Size and modification time used to detect changed files"""
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _sample(file_path: str) -> pd.DataFrame:
+    """
+    Read a sample of a CSV file as text
+
+    The first SAMPLE_ROWS rows are read, plus whole lines from blocks spread
+    through the rest of the file, so values that only appear late (blanks,
+    decimals, text) are seen too.
+    """
+    head = pd.read_csv(
+        file_path, nrows=SAMPLE_ROWS, dtype=str, na_values=NA_VALUES, keep_default_na=False
+    )
+    size = os.path.getsize(file_path)
+    if len(head) < SAMPLE_ROWS or size <= 2 * SAMPLE_BLOCKS * SAMPLE_BLOCK_BYTES:
+        # Small files are sampled in full
+        if len(head) == SAMPLE_ROWS:
+            head = pd.read_csv(file_path, dtype=str, na_values=NA_VALUES, keep_default_na=False)
+        return head
+
+    parts = [head]
+    with open(file_path, 'rb') as f:
+        for offset in np.linspace(0, size - SAMPLE_BLOCK_BYTES, SAMPLE_BLOCKS + 1)[1:].astype(np.int64):
+            f.seek(offset)
+            block = f.read(SAMPLE_BLOCK_BYTES)
+            # Keep whole lines only
+            block = block[block.find(b'\n') + 1:block.rfind(b'\n') + 1]
+            try:
+                parts.append(pd.read_csv(
+                    io.BytesIO(block),
+                    header=None,
+                    names=list(head.columns),
+                    dtype=str,
+                    na_values=NA_VALUES,
+                    keep_default_na=False,
+                    on_bad_lines='skip',
+                    encoding_errors='replace'
+                ))
+            except (ValueError, pd.errors.EmptyDataError):
+                # A block starting inside a quoted value may not parse; it only
+                # adds evidence, so it can be skipped
+                continue
+    return pd.concat(parts, ignore_index=True)
+
+
+def _column_type(values: pd.Series) -> str:
+    """Narrowest column type holding every sampled value"""
+    values = values.dropna()
+    if len(values) == 0:
+        # Nothing to go on; text holds any value
+        return 'str'
+    text = values.astype(str)
+    if text.str.fullmatch(_INTEGER).all():
+        return 'Int64'
+    if pd.to_numeric(text, errors='coerce').notna().all():
+        return 'float64'
+    if text.isin(_BOOLEAN_VALUES.keys()).all():
+        return 'boolean'
+    return 'str'
+
+
+def infer_schema(file_path: str, cache_dir: Optional[str] = None) -> Dict[str, str]:
+    """
+    Get the column types of a CSV file, inferring them on first use
+
+    Schemas are cached in memory and on disk by file path, size and
+    modification time, so inference runs once per file version.
+
+    Args:
+        file_path: Path to the CSV file
+        cache_dir: Directory holding cached schemas (None for SCHEMA_CACHE_DIRECTORY)
+
+    Returns:
+        Mapping of column name to pandas dtype name ('Int64', 'float64',
+        'boolean' or 'str'), in file order
+    """
+    key = os.path.abspath(file_path)
+    signature = _file_signature(file_path)
+    loaded = _loaded.get(key)
+    if loaded is not None and loaded[0] == signature:
+        return dict(loaded[1])
+
+    path = _cache_path(file_path, cache_dir)
+    try:
+        with open(path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') == SCHEMA_FORMAT_VERSION and all(meta.get(k) == v for k, v in signature.items()):
+            _loaded[key] = (signature, meta['columns'])
+            return dict(meta['columns'])
+    except (OSError, ValueError):
+        pass
+
+    sample = _sample(file_path)
+    schema = {name: _column_type(sample[name]) for name in sample.columns}
+    store_schema(file_path, schema, cache_dir)
+    return dict(schema)
+
+
+def store_schema(file_path: str, schema: Dict[str, str], cache_dir: Optional[str] = None) -> None:
+    """
+    Cache the schema of a CSV file for later reads
+
+    Args:
+        file_path: Path to the CSV file
+        schema: Column types (see infer_schema)
+        cache_dir: Directory holding cached schemas (None for SCHEMA_CACHE_DIRECTORY)
+    """
+    signature = _file_signature(file_path)
+    _loaded[os.path.abspath(file_path)] = (signature, dict(schema))
+    meta = {
+        'version': SCHEMA_FORMAT_VERSION,
+        'file': os.path.abspath(file_path),
+        'columns': schema,
+        **signature
+    }
+    path = _cache_path(file_path, cache_dir)
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+    except OSError:
+        # The cache only saves time; reads work without it
+        pass
+
+
+def _convert(values: pd.Series, dtype: str) -> pd.Series:
+    """Convert a parsed column to a column type, raising if any value does not fit"""
+    if dtype == 'str':
+        if values.dtype == object or isinstance(values.dtype, pd.StringDtype):
+            return values
+        return values.astype(str).where(values.notna())
+    if str(values.dtype) == dtype:
+        return values
+    if dtype == 'boolean':
+        converted = values.map({**_BOOLEAN_VALUES, True: True, False: False})
+        if converted.isna().sum() != values.isna().sum():
+            raise ValueError("Value is not a boolean")
+        return converted.astype('boolean')
+    if values.dtype == bool:
+        raise ValueError("Value is not a number")
+    return pd.to_numeric(values).astype(dtype)
+
+
+def parse_dtypes(schema: Dict[str, str]) -> Dict[str, type]:
+    """
+    Types to give the C parser for a schema
+
+    Only text columns are fixed while parsing; numbers and booleans parse
+    fastest with the parser's own inference and are converted by conform.
+    """
+    return {name: str for name, dtype in schema.items() if dtype == 'str'}
+
+
+def conform(batch: pd.DataFrame, schema: Dict[str, str]) -> pd.DataFrame:
+    """
+    Convert a parsed batch to the schema's types
+
+    A column holding a value its type cannot represent is widened (integer
+    to float to text, boolean to text); the schema is updated in place so
+    later batches use the wider type.
+
+    Args:
+        batch: Batch read with the C parser and parse_dtypes(schema)
+        schema: Column types (see infer_schema)
+
+    Returns:
+        The converted batch
+    """
+    converted = {}
+    for name in batch.columns:
+        dtype = schema.get(name, 'str')
+        while True:
+            try:
+                converted[name] = _convert(batch[name], dtype)
+                break
+            except (ValueError, TypeError):
+                dtype = WIDER[dtype]
+        if name in schema:
+            schema[name] = dtype
+    return pd.DataFrame(converted, index=batch.index)
@@ -0,0 +1,236 @@
+"""
+Streaming CSV writer for Wizard Tools application
+Turns DataFrame batches into CSV text column by column and writes it in large, optionally compressed blocks
+"""
+import gzip
+import os
+import re
+from pathlib import Path
+from typing import List, Optional
+import sys
+
+import numpy as np
+import pandas as pd
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import CSV_WRITE_BUFFER_MB
+
+# Compression by file suffix
+COMPRESSIONS = {'.gz': 'gzip', '.zst': 'zstd'}
+SUFFIXES = {compression: suffix for suffix, compression in COMPRESSIONS.items()}
+# Fast levels: output speed matters more here than the last few percent of size
+GZIP_LEVEL = 1
+ZSTD_LEVEL = 3
+
+# pandas writes rows with the csv module, which quotes fields holding the
+# delimiter, the quote character or a line terminator character
+_NEEDS_QUOTES = re.compile('[,"' + re.escape(os.linesep) + ']')
+
+
+def zstd_available() -> bool:
+    """Whether the zstandard package is installed"""
+    return zstandard is not None
+
+
+def compression_for(file_path: str) -> Optional[str]:
+    """Compression of a CSV output path: 'gzip' for .csv.gz, 'zstd' for .csv.zst, None otherwise"""
+    suffixes = [suffix.lower() for suffix in Path(file_path).suffixes[-2:]]
+    if len(suffixes) == 2 and suffixes[0] == '.csv':
+        return COMPRESSIONS.get(suffixes[1])
+    return None
+
+
+def is_csv_output(file_path: str) -> bool:
+    """Whether a path names a CSV output, plain or compressed"""
+    return Path(file_path).suffix.lower() == '.csv' or compression_for(file_path) is not None
+
+
+def csv_extension(compression: Optional[str]) -> str:
+    """File extension for CSV output with a compression (None for plain)"""
+    if compression is None:
+        return '.csv'
+    if compression not in SUFFIXES:
+        raise ValueError(f"Unknown CSV compression: {compression}")
+    return '.csv' + SUFFIXES[compression]
+
+
+def _quote(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"' if _NEEDS_QUOTES.search(text) else text
+
+
+def _column_text(column: pd.Series, missing: str) -> Optional[List[str]]:
+    """
+    CSV fields of one column, as DataFrame.to_csv writes them
+
+    Each distinct value is formatted once and the fields gathered by the
+    factorized codes, so a column costs one hash pass plus work per distinct
+    value rather than per cell.
+
+    Returns:
+        Field per row, or None when only to_csv formats the column exactly
+    """
+    dtype = column.dtype
+    if dtype == np.float64:
+        # Factorize the bit patterns, keeping -0.0 apart from 0.0
+        codes, uniques = pd.factorize(column.to_numpy().view(np.int64))
+        uniques = uniques.view(np.float64)
+        texts = [missing if value != value else repr(value) for value in uniques.tolist()]
+    elif isinstance(dtype, np.dtype) and dtype.kind in 'iub':
+        codes, uniques = pd.factorize(column.to_numpy())
+        texts = list(map(str, uniques.tolist()))
+    elif pd.api.types.infer_dtype(column, skipna=True) in ('string', 'empty'):
+        codes, uniques = column.factorize()
+        texts = uniques.tolist()
+        if _NEEDS_QUOTES.search('\0'.join(texts)):
+            texts = list(map(_quote, texts))
+    elif dtype == object:
+        # Mixed values that compare equal (1, 1.0, True) format differently
+        return None
+    else:
+        # Dates, nullable and categorical columns: pandas formats the
+        # distinct values; anything that would need quoting goes to to_csv
+        codes, uniques = column.factorize()
+        if len(uniques) == 0:
+            texts = []
+        else:
+            text = pd.Series(uniques).to_csv(index=False, header=False)
+            texts = text[:-len(os.linesep)].split(os.linesep)
+            if len(texts) != len(uniques) or '"' in text:
+                return None
+    if missing:
+        # A lone empty field is written quoted so the line is not blank
+        texts = [text or missing for text in texts]
+    texts.append(missing)
+    return np.array(texts, dtype=object)[codes].tolist()
+
+
+def format_csv(df: pd.DataFrame, header: bool = True) -> str:
+    """
+    Format a DataFrame as CSV text, the same as df.to_csv(index=False, header=header)
+
+    Args:
+        df: DataFrame to format
+        header: Include the header line
+
+    Returns:
+        CSV text with os.linesep line endings
+    """
+    width = len(df.columns)
+    columns = []
+    if width and len(df):
+        missing = '""' if width == 1 else ''
+        for i in range(width):
+            text = _column_text(df.iloc[:, i], missing)
+            if text is None:
+                return df.to_csv(index=False, header=header)
+            columns.append(text)
+    elif not width:
+        return df.to_csv(index=False, header=header)
+
+    head = df.iloc[:0].to_csv(index=False) if header else ''
+    if not len(df):
+        return head
+    rows = map(','.join, zip(*columns)) if width > 1 else columns[0]
+    return head + os.linesep.join(rows) + os.linesep
+
+
+class CsvSink:
+    """
+    A CSV file written as a stream of DataFrame batches
+
+    Batches are formatted by format_csv and collected into blocks of
+    CSV_WRITE_BUFFER_MB before each write, so slow and network disks see
+    few large writes. Output to .csv.gz or .csv.zst is compressed as it is
+    written.
+    """
+
+    def __init__(self, file_path: str, compression: Optional[str] = 'infer'):
+        """
+        Open a CSV file for writing
+
+        Args:
+            file_path: Output path
+            compression: 'gzip', 'zstd', None, or 'infer' to go by the file
+                suffix (see compression_for)
+
+        Raises:
+            ValueError: If the compression is unknown, or zstd is asked for
+                without zstandard installed
+        """
+        if compression == 'infer':
+            compression = compression_for(file_path)
+        if compression not in (None, 'gzip', 'zstd'):
+            raise ValueError(f"Unknown CSV compression: {compression}")
+        if compression == 'zstd' and not zstd_available():
+            raise ValueError("zstd compression needs the zstandard package")
+
+        self.rows_written = 0
+        self.header_written = False
+        self._buffer: List[bytes] = []
+        self._buffered = 0
+        self._buffer_bytes = int(CSV_WRITE_BUFFER_MB * 1024 * 1024)
+        self._file = open(file_path, 'wb', buffering=0)
+        if compression == 'gzip':
+            self._out = gzip.GzipFile(fileobj=self._file, mode='wb', compresslevel=GZIP_LEVEL, mtime=0)
+        elif compression == 'zstd':
+            self._out = zstandard.ZstdCompressor(level=ZSTD_LEVEL).stream_writer(self._file, closefd=False)
+        else:
+            self._out = self._file
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, df: pd.DataFrame) -> None:
+        """
+        Append a batch; the first batch also writes the header, even when empty
+
+        Args:
+            df: Batch with the column layout of the first batch
+        """
+        if self.header_written and not len(df):
+            return
+        self.write_bytes(format_csv(df, header=not self.header_written).encode('utf-8'))
+        self.header_written = True
+        self.rows_written += len(df)
+
+    def write_bytes(self, data: bytes) -> None:
+        """Append raw CSV bytes, e.g. lines copied from another CSV file"""
+        self._buffer.append(data)
+        self._buffered += len(data)
+        if self._buffered >= self._buffer_bytes:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write the buffered bytes"""
+        if self._buffer:
+            self._out.write(b''.join(self._buffer))
+            self._buffer, self._buffered = [], 0
+
+    def close(self) -> None:
+        """Write what is buffered, finish the compressed stream and close the file"""
+        if self._file.closed:
+            return
+        try:
+            self.flush()
+            if self._out is not self._file:
+                self._out.close()
+        finally:
+            self._file.close()
+
+
+def write_csv(df: pd.DataFrame, file_path: str, compression: Optional[str] = 'infer') -> None:
+    """Write one DataFrame as a CSV file through a CsvSink"""
+    with CsvSink(file_path, compression) as sink:
+        sink.write(df)
@@ -2,10 +2,14 @@
 File processing utilities for Wizard Tools application
 Handles CSV and Excel file operations
 """
+from concurrent.futures import ProcessPoolExecutor
+import io
+import itertools
+import numpy as np
 import pandas as pd
 import os
 from pathlib import Path
-from typing import List, Optional, Tuple, Dict
+from typing import List, Optional, Tuple, Dict, Iterable, Iterator, Callable, Union
 import sys
 
 # Add parent directory to path for imports
@@ -13,7 +17,21 @@ parent_dir = Path(__file__).parent.parent
 if str(parent_dir) not in sys.path:
     sys.path.insert(0, str(parent_dir))
 
-from config import EXCEL_ENGINE, EXCEL_ENGINE_XLS
+from config import (
+    EXCEL_ENGINE,
+    EXCEL_ENGINE_XLS,
+    EXCEL_WRITER_ENGINE,
+    JOIN_MEMORY_BUDGET_MB,
+    JOIN_WORKERS,
+    JOIN_EXPLOSION_FACTOR,
+    JOIN_PREFILTER_MAX_PASS_RATE,
+    NA_VALUES,
+    CSV_ENGINE,
+    CSV_COMPRESSION,
+    SHEET_WORKERS,
+    WORKBOOK_POOL_SIZE,
+    WORKBOOK_POOL_MB
+)
 from utils.helpers import (
     is_csv_file,
     is_excel_file,
@@ -21,19 +39,182 @@ from utils.helpers import (
     get_file_extension,
     ensure_directory_exists
 )
+from utils.join_engine import (
+    BatchSource,
+    JoinKey,
+    key_columns,
+    normalize_key,
+    estimate_row_bytes,
+    SORT_OVERHEAD_FACTOR,
+    sort_merge_join,
+    hash_join,
+    broadcast_join
+)
+from utils.join_planner import InputStats, estimate_distinct, plan_join, execute_plan, explain
+from utils.key_sketch import KeySketch, estimate_join_rows, estimate_overlap
+from utils.key_index import KeyIndex
+from utils.key_set import KeySet
+from utils.row_filter import RowFilter
+from utils import arrow_csv, csv_schema, csv_sink, memory_governor, reader_engines
+from utils.sqlite_engine import sqlite_join
+from utils.workbook_pool import WorkbookPool
+
+# Rows sampled to estimate per-row memory use
+ROW_SAMPLE_SIZE = 1000
+# Rows per batch when scanning a single key column
+KEY_SCAN_BATCH_ROWS = 500000
+# Rows per batch when filtering rows as a file is read
+FILTER_BATCH_ROWS = 100000
+# xlsx packages are zip-compressed XML, typically several times smaller than the same data as CSV
+XLSX_COMPRESSION_RATIO = 4
+# Peak memory of in-memory operations as a multiple of their inputs' DataFrame size:
+# a union holds the inputs and their concatenation; a join also holds key
+# encodings and the merged result
+UNION_MEMORY_FACTOR = 2
+JOIN_MEMORY_FACTOR = 3
+# Engines used when a join is too large to run in memory: the broadcast join
+# when every input but the largest fits the budget, the Grace hash join otherwise
+GOVERNED_BROADCAST_JOIN = 'broadcast'
+GOVERNED_STREAMING_JOIN = 'hash'
+# Workbooks smaller than this read their sheets in one process; starting workers costs more
+PARALLEL_SHEETS_MIN_BYTES = 1024 * 1024
+
+# Out-of-core join engines selectable in join_files
+STREAMING_JOINS = {
+    'sort_merge': sort_merge_join,
+    'hash': hash_join,
+    'broadcast': broadcast_join,
+    'sqlite': sqlite_join,
+}
+
+
+def _read_sheet(file_path: str, sheet_name: str, usecols: Optional[List[str]]) -> pd.DataFrame:
+    """Read one sheet of a workbook (run in a worker process by read_sheets)"""
+    return FileProcessor.read_file(file_path, sheet_name=sheet_name, usecols=usecols)
+
+
+def _open_workbook(file_path: str, engine: str):
+    """Open a workbook for WORKBOOKS with one of the registered reader engines"""
+    return reader_engines.get_engine(get_file_extension(file_path), engine).open_workbook(file_path)
+
+
+# Workbooks kept open for the session, shared by sheet listing, column detection and reads
+WORKBOOKS = WorkbookPool(_open_workbook, WORKBOOK_POOL_SIZE, WORKBOOK_POOL_MB)
 
 
 class FileProcessor:
     """Handles file processing operations for CSV and Excel files"""
     
     @staticmethod
-    def read_file(file_path: str, sheet_name: Optional[str] = None, **kwargs) -> pd.DataFrame:
+    def _engine_setting(file_path: str, csv_engine: Optional[str] = None) -> str:
+        """Configured reader engine for a file's format ('auto' or an engine name)"""
+        if is_csv_file(file_path):
+            return csv_engine or CSV_ENGINE
+        return EXCEL_ENGINE_XLS if get_file_extension(file_path) == '.xls' else EXCEL_ENGINE
+    
+    @staticmethod
+    def _use_arrow(file_path: str, csv_engine: Optional[str], kwargs: dict) -> bool:
+        """
+        Decide whether a batched CSV read streams through the Arrow parser
+        
+        Other engines read whole files only, so batches come from the C
+        parser unless Arrow is the first engine for the read.
+        
+        Args:
+            file_path: Path to the CSV file
+            csv_engine: Engine name, 'auto', or None for CSV_ENGINE
+            kwargs: Extra pandas arguments of the read
+            
+        Raises:
+            ValueError: If the engine is unknown, or not installed
+        """
+        setting = FileProcessor._engine_setting(file_path, csv_engine)
+        return reader_engines.engine_order('.csv', setting, kwargs, file_path)[0] == 'pyarrow'
+    
+    @staticmethod
+    def _with_engines(file_path: str, setting: str, kwargs: dict, run: Callable[[str], object]):
+        """
+        Run a read with the engines chosen for a file, falling back in turn
+        
+        An engine that fails where a later one succeeds is skipped for this
+        file from then on. If every engine fails, the baseline's error is
+        raised, so errors read as they would with pandas alone.
+        
+        Args:
+            file_path: Path to the file
+            setting: 'auto' or an engine name (see reader_engines.engine_order)
+            kwargs: Extra pandas arguments of the read
+            run: Performs the read with the named engine
+            
+        Returns:
+            The result of the first engine that succeeds
+        """
+        file_format = get_file_extension(file_path)
+        names = reader_engines.engine_order(file_format, setting, kwargs, file_path)
+        failed = []
+        for name in names:
+            try:
+                result = run(name)
+            except Exception:
+                if name == names[-1]:
+                    raise
+                failed.append(name)
+                continue
+            for failed_name in failed:
+                reader_engines.record_failure(file_format, failed_name, file_path)
+            return result
+    
+    @staticmethod
+    def _use_workbook(file_path: str, kwargs: dict, action: Callable):
+        """
+        Run an action on the pooled open workbook of an Excel file
+        
+        Args:
+            file_path: Path to the Excel file
+            kwargs: Extra pandas arguments of the read, to decide which
+                engines can handle it
+            action: Called with the open workbook
+            
+        Returns:
+            The action's result, from the first engine that handles the
+            workbook (see _with_engines)
+        """
+        def run(engine: str):
+            with WORKBOOKS.open(file_path, engine) as workbook:
+                return action(workbook)
+        
+        return FileProcessor._with_engines(file_path, FileProcessor._engine_setting(file_path), kwargs, run)
+    
+    @staticmethod
+    def close_workbooks() -> None:
+        """Close the workbooks kept open between reads, e.g. when a session ends"""
+        WORKBOOKS.clear()
+    
+    @staticmethod
+    def read_file(
+        file_path: str,
+        sheet_name: Optional[str] = None,
+        csv_engine: Optional[str] = None,
+        schema: Optional[Dict[str, str]] = None,
+        **kwargs
+    ) -> pd.DataFrame:
         """
         Read a CSV or Excel file into a DataFrame
         
         Args:
             file_path: Path to the file
             sheet_name: Sheet name for Excel files (None for first sheet or CSV)
+            csv_engine: CSV parser ('c', 'pyarrow' or 'auto'; None for CSV_ENGINE).
+                Engines come from utils.reader_engines: 'auto' uses the
+                fastest installed one for the format, and a read an engine
+                cannot handle the way pandas would falls back to pandas'
+                own parser. Excel engines are set by EXCEL_ENGINE and
+                EXCEL_ENGINE_XLS. Workbooks stay open in WORKBOOKS, so later
+                reads of the same file skip reopening it.
+            schema: Column types for CSV files (see _csv_schema), so a whole
+                file gets the types its batches get from read_batches; a
+                column holding a value its type cannot represent is widened
+                and the file's cached schema updated
             **kwargs: Additional arguments for pandas read functions
             
         Returns:
@@ -43,21 +224,341 @@ class FileProcessor:
             ValueError: If file type is not supported
             Exception: If file cannot be read
         """
-        # Only treat empty strings and whitespace as NA, not "NA" string
-        # This prevents "North Atlantic" abbreviated as "NA" from being treated as missing
-        na_values = ['', ' ', '  ']  # Only empty and whitespace strings
-        
         if is_csv_file(file_path):
-            return pd.read_csv(file_path, na_values=na_values, keep_default_na=False, **kwargs)
+            if schema is not None:
+                kwargs['dtype'] = csv_schema.parse_dtypes(schema)
+            df = FileProcessor._with_engines(
+                file_path,
+                FileProcessor._engine_setting(file_path, csv_engine),
+                kwargs,
+                lambda engine: reader_engines.get_engine('.csv', engine).read(file_path, **kwargs)
+            )
+            if schema is None:
+                return df
+            before = dict(schema)
+            df = csv_schema.conform(df, schema)
+            if schema != before:
+                csv_schema.store_schema(file_path, schema)
+            return df
         elif is_excel_file(file_path):
-            ext = get_file_extension(file_path)
-            engine = EXCEL_ENGINE_XLS if ext == '.xls' else EXCEL_ENGINE
             # Use sheet_name parameter if provided, otherwise default to first sheet (0)
             sheet = sheet_name if sheet_name is not None else 0
-            return pd.read_excel(file_path, engine=engine, sheet_name=sheet, na_values=na_values, keep_default_na=False, **kwargs)
+            return FileProcessor._use_workbook(
+                file_path, kwargs, lambda workbook: workbook.read_sheet(sheet, **kwargs)
+            )
+        else:
+            raise ValueError(f"Unsupported file type: {file_path}")
+    
+    @staticmethod
+    def read_sheets(
+        file_path: str,
+        sheet_names: Optional[List[str]] = None,
+        columns: Optional[Dict[str, List[str]]] = None,
+        workers: Optional[int] = SHEET_WORKERS
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Read several sheets of an Excel workbook
+        
+        Sheets of larger workbooks are parsed in parallel, one sheet per
+        worker process. Smaller workbooks, or a single worker, read every
+        sheet from the pooled open workbook that also lists the sheets, so
+        the package is unzipped and its shared strings parsed once.
+        
+        Args:
+            file_path: Path to the Excel file
+            sheet_names: Sheets to read (None for every sheet)
+            columns: Optional mapping of sheet name to the columns to read from
+                it (sheets not listed read every column)
+            workers: Number of worker processes (None = number of CPUs)
+            
+        Returns:
+            Mapping of sheet name to DataFrame, in the order of sheet_names
+            (workbook order when reading every sheet)
+        """
+        if not is_excel_file(file_path):
+            raise ValueError(f"Not an Excel file: {file_path}")
+        columns = columns or {}
+        
+        if sheet_names is None:
+            sheet_names = FileProcessor.get_excel_sheet_names(file_path)
+        workers = FileProcessor._sheet_workers(file_path, sheet_names, workers)
+        
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                futures = [
+                    pool.submit(_read_sheet, file_path, sheet_name, columns.get(sheet_name))
+                    for sheet_name in sheet_names
+                ]
+                return {sheet_name: future.result() for sheet_name, future in zip(sheet_names, futures)}
+        
+        return FileProcessor._use_workbook(file_path, {}, lambda workbook: {
+            sheet_name: workbook.read_sheet(sheet_name, usecols=columns.get(sheet_name))
+            for sheet_name in sheet_names
+        })
+    
+    @staticmethod
+    def _sheet_workers(file_path: str, sheet_names: List[str], workers: Optional[int]) -> int:
+        """Worker processes read_sheets uses for a workbook (1 to read in this process)"""
+        if os.path.getsize(file_path) < PARALLEL_SHEETS_MIN_BYTES:
+            return 1
+        return max(min(workers or os.cpu_count() or 1, len(sheet_names)), 1)
+    
+    @staticmethod
+    def _csv_batches(file_path: str, batch_rows: int, rows_read: int, **kwargs) -> Iterator[pd.DataFrame]:
+        """
+        Read CSV batches with the C parser, starting after rows_read data rows
+        
+        Args:
+            file_path: Path to the CSV file
+            batch_rows: Maximum number of rows per batch
+            rows_read: Data rows to skip (already read by another parser)
+            **kwargs: Additional arguments for pandas.read_csv
+            
+        Yields:
+            DataFrame batches in file order
+        """
+        if rows_read:
+            kwargs['skiprows'] = range(1, rows_read + 1)
+        with pd.read_csv(
+            file_path,
+            chunksize=batch_rows,
+            na_values=NA_VALUES,
+            keep_default_na=False,
+            **kwargs
+        ) as reader:
+            yield from reader
+    
+    @staticmethod
+    def read_batches(
+        file_path: str,
+        batch_rows: int,
+        sheet_name: Optional[str] = None,
+        columns: Optional[List[str]] = None,
+        csv_engine: Optional[str] = None,
+        schema: Optional[Dict[str, str]] = None,
+        **kwargs
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Read a CSV or Excel file as a stream of DataFrame batches
+        
+        CSV files are parsed incrementally. Excel sheets are read once and
+        sliced. NA handling matches read_file, and at least one (possibly
+        empty) batch is always produced so the column layout is known.
+        
+        Args:
+            file_path: Path to the file
+            batch_rows: Maximum number of rows per batch
+            sheet_name: Sheet name for Excel files (None for first sheet or CSV)
+            columns: Only read these columns (None for all)
+            csv_engine: CSV parser (see read_file); if Arrow meets a value its
+                inferred types cannot hold, the C parser reads the rest
+            schema: Column types for CSV files (see _csv_schema). Every
+                batch gets these types rather than ones inferred from its own
+                rows. A column holding a value its type cannot represent (one
+                the sample missed) is widened from that batch on, and the
+                file's cached schema updated; batches already yielded keep the
+                narrower type, and later reads of the file use the wider one.
+            **kwargs: Additional arguments for pandas read functions
+            
+        Yields:
+            DataFrame batches in file order
+        """
+        if columns is not None:
+            kwargs['usecols'] = columns
+        
+        if is_csv_file(file_path):
+            rows_read = 0
+            if FileProcessor._use_arrow(file_path, csv_engine, kwargs):
+                try:
+                    yield from arrow_csv.read_batches(file_path, batch_rows, columns, schema)
+                    return
+                except arrow_csv.ArrowCsvError as e:
+                    rows_read = e.rows_read
+            produced = rows_read > 0
+            if schema is not None:
+                kwargs['dtype'] = csv_schema.parse_dtypes(schema)
+                before = dict(schema)
+            for batch in FileProcessor._csv_batches(file_path, batch_rows, rows_read, **kwargs):
+                produced = True
+                yield batch if schema is None else csv_schema.conform(batch, schema)
+            if not produced:
+                batch = FileProcessor.read_file(file_path, nrows=0, **kwargs)
+                yield batch if schema is None else csv_schema.conform(batch, schema)
+            if schema is not None and schema != before:
+                # Keep the widened types for later reads of the file
+                csv_schema.store_schema(file_path, schema)
+        elif is_excel_file(file_path):
+            df = FileProcessor.read_file(file_path, sheet_name=sheet_name, **kwargs)
+            if len(df) == 0:
+                yield df
+            for start_idx in range(0, len(df), batch_rows):
+                yield df.iloc[start_idx:start_idx + batch_rows]
         else:
             raise ValueError(f"Unsupported file type: {file_path}")
     
+    @staticmethod
+    def _csv_schema(file_path: str) -> Optional[Dict[str, str]]:
+        """
+        Column types shared by every batch read of a file
+        
+        Returns:
+            The cached or freshly inferred schema of a CSV file (see
+            csv_schema.infer_schema), or None for Excel files, whose sheets
+            are read whole and typed once
+        """
+        return csv_schema.infer_schema(file_path) if is_csv_file(file_path) else None
+    
+    @staticmethod
+    def _batch_source(
+        file_path: str,
+        sheet_name: Optional[str] = None,
+        usecols: Optional[List[str]] = None
+    ) -> BatchSource:
+        """
+        Create a re-readable batch source for a file
+        
+        Args:
+            file_path: Path to the file
+            sheet_name: Sheet name for Excel files (None for first sheet or CSV)
+            usecols: Only read these columns (None for all)
+            
+        Returns:
+            BatchSource with per-row memory and row count estimates from a small sample
+        """
+        sample = FileProcessor.read_file(file_path, sheet_name=sheet_name, nrows=ROW_SAMPLE_SIZE)
+        estimated_rows = FileProcessor._estimate_row_count(file_path, sample)
+        if usecols is not None:
+            sample = sample[[col for col in sample.columns if col in usecols]]
+        
+        def open_batches(batch_rows: int, columns: Optional[List[str]] = None):
+            return FileProcessor.read_batches(
+                file_path,
+                batch_rows,
+                sheet_name=sheet_name,
+                columns=columns if columns is not None else usecols,
+                schema=FileProcessor._csv_schema(file_path)
+            )
+        
+        return BatchSource(
+            os.path.basename(file_path),
+            open_batches,
+            estimate_row_bytes(sample),
+            estimated_rows
+        )
+    
+    @staticmethod
+    def _estimate_memory(file_path: str, sheet_name: Optional[str] = None, usecols: Optional[List[str]] = None) -> int:
+        """
+        Estimate the memory a whole file takes once read into a DataFrame
+        
+        Scales the per-row memory of a small sample by the row count
+        estimated from the file size.
+        
+        Args:
+            file_path: Path to the file
+            sheet_name: Sheet name for Excel files (None for first sheet or CSV)
+            usecols: Only count these columns (None for all)
+            
+        Returns:
+            Estimated size in bytes
+        """
+        sample = FileProcessor.read_file(file_path, sheet_name=sheet_name, nrows=ROW_SAMPLE_SIZE)
+        rows = FileProcessor._estimate_row_count(file_path, sample)
+        if usecols is not None:
+            sample = sample[[col for col in sample.columns if col in usecols]]
+        return int(estimate_row_bytes(sample) * rows)
+    
+    @staticmethod
+    def _input_stats(file_path: str, sheet_name: Optional[str], join_column: JoinKey) -> InputStats:
+        """
+        Gather cheap join statistics for a file from a sample of its first rows
+        
+        Args:
+            file_path: Path to the file
+            sheet_name: Sheet name for Excel files (None for first sheet or CSV)
+            join_column: Join column name, or list of names for a composite key
+            
+        Returns:
+            InputStats with estimated row count and distinct key count
+        """
+        sample = FileProcessor.read_file(file_path, sheet_name=sheet_name, nrows=ROW_SAMPLE_SIZE)
+        rows = FileProcessor._estimate_row_count(file_path, sample)
+        key_ndv = estimate_distinct(sample[join_column], rows)
+        return InputStats(os.path.basename(file_path), rows, key_ndv)
+    
+    @staticmethod
+    def _estimate_row_count(file_path: str, sample: pd.DataFrame) -> int:
+        """
+        Estimate the number of data rows in a file from a sample of its first rows
+        
+        Args:
+            file_path: Path to the file
+            sample: DataFrame holding the first ROW_SAMPLE_SIZE rows (or fewer)
+            
+        Returns:
+            Estimated row count (exact when the file is smaller than the sample)
+        """
+        if len(sample) < ROW_SAMPLE_SIZE:
+            return len(sample)
+        
+        if is_csv_file(file_path):
+            with open(file_path, 'rb') as f:
+                f.readline()  # Skip header
+                sample_bytes = sum(len(f.readline()) for _ in range(len(sample)))
+        else:
+            text_bytes = len(sample.to_csv(index=False, header=False).encode('utf-8'))
+            sample_bytes = text_bytes / XLSX_COMPRESSION_RATIO
+        
+        bytes_per_row = max(sample_bytes / len(sample), 1.0)
+        return int(os.path.getsize(file_path) / bytes_per_row)
+    
+    @staticmethod
+    def _write_batches(batches: Iterable[pd.DataFrame], file_path: str) -> int:
+        """
+        Write a stream of DataFrame batches to a single CSV or Excel file
+        
+        The header is taken from the first batch. CSV output goes through a
+        CsvSink, compressed when the path ends in .csv.gz or .csv.zst. Unlike
+        write_file, errors are raised so callers can report them.
+        
+        Args:
+            batches: DataFrame batches with a consistent column layout
+            file_path: Output file path
+            
+        Returns:
+            Number of data rows written
+            
+        Raises:
+            ValueError: If file type is not supported
+        """
+        output_dir = os.path.dirname(file_path)
+        if output_dir:
+            ensure_directory_exists(output_dir)
+        
+        rows_written = 0
+        header_written = False
+        
+        if csv_sink.is_csv_output(file_path):
+            with csv_sink.CsvSink(file_path) as sink:
+                for batch in batches:
+                    sink.write(batch)
+            rows_written = sink.rows_written
+        elif is_excel_file(file_path):
+            WORKBOOKS.discard(file_path)
+            with pd.ExcelWriter(file_path, engine=EXCEL_WRITER_ENGINE) as writer:
+                for batch in batches:
+                    if header_written and len(batch) == 0:
+                        continue
+                    # The header occupies the first row of the sheet
+                    start_row = rows_written + 1 if header_written else 0
+                    batch.to_excel(writer, index=False, header=not header_written, startrow=start_row)
+                    header_written = True
+                    rows_written += len(batch)
+        else:
+            raise ValueError(f"Unsupported file type: {file_path}")
+        
+        return rows_written
+    
     @staticmethod
     def write_file(
         df: pd.DataFrame,
@@ -69,7 +570,7 @@ class FileProcessor:
         
         Args:
             df: DataFrame to write
-            file_path: Output file path
+            file_path: Output file path (.csv.gz and .csv.zst are written compressed)
             **kwargs: Additional arguments for pandas write functions
             
         Returns:
@@ -81,10 +582,15 @@ class FileProcessor:
             if output_dir:
                 ensure_directory_exists(output_dir)
             
-            if is_csv_file(file_path):
-                df.to_csv(file_path, index=False, **kwargs)
+            if csv_sink.is_csv_output(file_path):
+                if kwargs:
+                    df.to_csv(file_path, index=False, **kwargs)
+                else:
+                    csv_sink.write_csv(df, file_path)
             elif is_excel_file(file_path):
-                df.to_excel(file_path, index=False, engine=EXCEL_ENGINE, **kwargs)
+                # An open handle would keep Windows from replacing the file
+                WORKBOOKS.discard(file_path)
+                df.to_excel(file_path, index=False, engine=EXCEL_WRITER_ENGINE, **kwargs)
             else:
                 raise ValueError(f"Unsupported file type: {file_path}")
             
@@ -93,12 +599,40 @@ class FileProcessor:
             print(f"Error writing file: {e}")
             return False
     
+    @staticmethod
+    def _rechunk(batches: Iterable[pd.DataFrame], chunk_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Regroup a stream of batches into chunks of exactly chunk_size rows
+        
+        Args:
+            batches: DataFrame batches of any size
+            chunk_size: Rows per chunk
+            
+        Yields:
+            Chunks of chunk_size rows; the last one may hold fewer
+        """
+        pieces = []
+        buffered = 0
+        for batch in batches:
+            while len(batch):
+                take = batch.iloc[:chunk_size - buffered]
+                batch = batch.iloc[len(take):]
+                pieces.append(take)
+                buffered += len(take)
+                if buffered == chunk_size:
+                    yield pieces[0] if len(pieces) == 1 else pd.concat(pieces)
+                    pieces, buffered = [], 0
+        if buffered:
+            yield pieces[0] if len(pieces) == 1 else pd.concat(pieces)
+    
     @staticmethod
     def chunk_file(
         file_path: str,
         output_dir: str,
         chunk_size: int,
-        output_format: str = 'csv'
+        output_format: str = 'csv',
+        row_filter: Optional[str] = None,
+        columns: Optional[List[str]] = None
     ) -> Tuple[bool, List[str], str]:
         """
         Split a file into chunks
@@ -108,6 +642,10 @@ class FileProcessor:
             output_dir: Directory for output files
             chunk_size: Number of rows per chunk
             output_format: Output format ('csv' or 'excel')
+            row_filter: Optional filter expression (see RowFilter); only matching
+                rows are written, and chunks still hold chunk_size rows
+            columns: Optional columns to write, in output order; other columns
+                are never parsed
             
         Returns:
             Tuple of (success, list of output files, error message)
@@ -118,55 +656,52 @@ class FileProcessor:
             
             # Get base filename
             base_name = Path(file_path).stem
-            ext = '.csv' if output_format == 'csv' else '.xlsx'
-            
-            # Read file in chunks
-            output_files = []
-            chunk_num = 1
-            
-            if is_csv_file(file_path):
-                # Process CSV file
-                for chunk_df in pd.read_csv(file_path, chunksize=chunk_size):
-                    output_file = os.path.join(
-                        output_dir,
-                        create_output_filename(base_name, '_chunk', ext, chunk_num)
-                    )
-                    
-                    if output_format == 'csv':
-                        chunk_df.to_csv(output_file, index=False)
-                    else:
-                        chunk_df.to_excel(output_file, index=False, engine=EXCEL_ENGINE)
-                    
-                    output_files.append(output_file)
-                    chunk_num += 1
+            ext = csv_sink.csv_extension(CSV_COMPRESSION) if output_format == 'csv' else '.xlsx'
             
-            elif is_excel_file(file_path):
-                # Read entire Excel file (chunking not supported for Excel reading)
-                ext_in = get_file_extension(file_path)
-                engine = EXCEL_ENGINE_XLS if ext_in == '.xls' else EXCEL_ENGINE
-                df = pd.read_excel(file_path, engine=engine)
-                
-                # Split into chunks
-                total_rows = len(df)
-                for start_idx in range(0, total_rows, chunk_size):
-                    end_idx = min(start_idx + chunk_size, total_rows)
-                    chunk_df = df.iloc[start_idx:end_idx]
-                    
-                    output_file = os.path.join(
-                        output_dir,
-                        create_output_filename(base_name, '_chunk', ext, chunk_num)
-                    )
-                    
-                    if output_format == 'csv':
-                        chunk_df.to_csv(output_file, index=False)
-                    else:
-                        chunk_df.to_excel(output_file, index=False, engine=EXCEL_ENGINE)
-                    
-                    output_files.append(output_file)
-                    chunk_num += 1
+            keep = RowFilter(row_filter) if row_filter else None
             
-            else:
+            if not is_csv_file(file_path) and not is_excel_file(file_path):
                 return False, [], "Unsupported file type"
+            header = FileProcessor.read_file(file_path, nrows=0)
+            # One schema for every chunk, inferred once per file version
+            schema = FileProcessor._csv_schema(file_path)
+            
+            # Filter columns are read even when they are not written
+            if keep is not None:
+                keep.validate_columns(list(header.columns), os.path.basename(file_path))
+            usecols = FileProcessor._projection(
+                file_path,
+                header,
+                {file_path: columns} if columns else None,
+                keep.columns if keep is not None else ()
+            )
+            
+            # Read file in chunks (Excel sheets are read whole and sliced); the
+            # empty batch describing an empty file is not a chunk
+            chunks = (
+                batch for batch in FileProcessor.read_batches(file_path, chunk_size, columns=usecols, schema=schema)
+                if len(batch)
+            )
+            
+            if keep is not None:
+                # Filtered batches are regrouped so every chunk is full again
+                chunks = FileProcessor._rechunk((chunk_df[keep(chunk_df)] for chunk_df in chunks), chunk_size)
+            if columns:
+                chunks = (chunk_df[columns] for chunk_df in chunks)
+            
+            output_files = []
+            for chunk_num, chunk_df in enumerate(chunks, start=1):
+                output_file = os.path.join(
+                    output_dir,
+                    create_output_filename(base_name, '_chunk', ext, chunk_num)
+                )
+                
+                if output_format == 'csv':
+                    csv_sink.write_csv(chunk_df, output_file)
+                else:
+                    chunk_df.to_excel(output_file, index=False, engine=EXCEL_WRITER_ENGINE)
+                
+                output_files.append(output_file)
             
             return True, output_files, ""
         
@@ -210,11 +745,46 @@ class FileProcessor:
         
         return aligned_dfs
     
+    @staticmethod
+    def _projection(
+        file_path: str,
+        header: pd.DataFrame,
+        columns: Optional[Dict[str, List[str]]],
+        required: Iterable[str] = ()
+    ) -> Optional[List[str]]:
+        """
+        Work out which columns of an input to read
+        
+        Args:
+            file_path: Path to the file
+            header: Empty DataFrame with the file's columns
+            columns: Optional mapping of file path to the columns to keep from it
+            required: Columns read even when not selected (e.g. join columns)
+            
+        Returns:
+            Columns to read, in file order, or None to read every column
+            
+        Raises:
+            ValueError: If a selected column is not in the file
+        """
+        selected = (columns or {}).get(file_path)
+        if not selected:
+            return None
+        for column in selected:
+            if column not in header.columns:
+                raise ValueError(f"Column '{column}' not found in {os.path.basename(file_path)}")
+        wanted = set(selected) | set(required)
+        return [column for column in header.columns if column in wanted]
+    
     @staticmethod
     def union_files(
         file_paths: List[str],
         output_path: str,
-        align_columns: bool = False
+        align_columns: bool = False,
+        sheet_names: Optional[Dict[str, Union[str, List[str]]]] = None,
+        columns: Optional[Dict[str, List[str]]] = None,
+        row_filter: Optional[str] = None,
+        streaming: Optional[bool] = None
     ) -> Tuple[bool, str]:
         """
         Combine files using union (concatenate rows)
@@ -223,6 +793,16 @@ class FileProcessor:
             file_paths: List of input file paths
             output_path: Output file path
             align_columns: If True, align columns across all files before union
+            sheet_names: Optional mapping of Excel file path to sheet name, or to a
+                list of sheet names to union every one of them (read in parallel)
+            columns: Optional mapping of file path to the columns to keep from it;
+                other columns are never parsed (files not listed keep every column)
+            row_filter: Optional filter expression (see RowFilter) applied to each
+                file in batches as it is read; a filter column missing from a
+                file counts as empty there
+            streaming: True to write the files batch by batch instead of
+                concatenating them in memory; None lets the memory governor
+                decide from the estimated size of the inputs
             
         Returns:
             Tuple of (success, error message)
@@ -231,11 +811,109 @@ class FileProcessor:
             if not file_paths:
                 return False, "No files provided"
             
-            # Read all files
-            dfs = []
+            sheet_names = sheet_names or {}
+            keep = RowFilter(row_filter) if row_filter else None
+            
+            # Each selected sheet of a workbook is an input of its own
+            inputs = []
             for file_path in file_paths:
-                df = FileProcessor.read_file(file_path)
-                dfs.append(df)
+                sheets = sheet_names.get(file_path)
+                if isinstance(sheets, (list, tuple)):
+                    inputs.extend((file_path, sheet) for sheet in sheets)
+                else:
+                    inputs.append((file_path, sheets))
+            
+            headers = {}
+            usecols = {}
+            if columns:
+                for file_path, sheet in inputs:
+                    if columns.get(file_path):
+                        headers[(file_path, sheet)] = FileProcessor.read_file(file_path, sheet_name=sheet, nrows=0)
+                        usecols[(file_path, sheet)] = FileProcessor._projection(file_path, headers[(file_path, sheet)], columns)
+            
+            if streaming is None:
+                footprint = UNION_MEMORY_FACTOR * sum(
+                    FileProcessor._estimate_memory(file_path, sheet, usecols.get((file_path, sheet)))
+                    for file_path, sheet in inputs
+                )
+                streaming = not memory_governor.fits_in_memory(footprint)
+            
+            if streaming or keep is not None:
+                for file_path, sheet in inputs:
+                    if (file_path, sheet) not in headers:
+                        headers[(file_path, sheet)] = FileProcessor.read_file(file_path, sheet_name=sheet, nrows=0)
+            if keep is not None:
+                keep.validate_columns(
+                    [column for header in headers.values() for column in header.columns],
+                    "any of the files"
+                )
+            
+            # Columns to read from each input, and the ones it contributes
+            reads = dict(usecols)
+            outputs = {}
+            if keep is not None:
+                for key, header in headers.items():
+                    outputs[key] = usecols.get(key) or list(header.columns)
+                    # Filter columns are read even when not kept
+                    reads[key] = [column for column in header.columns if column in outputs[key] or column in keep.columns]
+            
+            def select(batch: pd.DataFrame, key: Tuple[str, Optional[str]]) -> pd.DataFrame:
+                if keep is None:
+                    return batch
+                # Filter columns missing from this input are empty
+                mask = keep(batch.reindex(columns=list(batch.columns) + [
+                    column for column in keep.columns if column not in batch.columns
+                ]))
+                return batch.loc[mask, outputs[key]]
+            
+            def input_batches(key: Tuple[str, Optional[str]], batch_rows: int) -> Iterator[pd.DataFrame]:
+                file_path, sheet = key
+                schema = FileProcessor._csv_schema(file_path)
+                for batch in FileProcessor.read_batches(
+                    file_path, batch_rows, sheet_name=sheet, columns=reads.get(key), schema=schema
+                ):
+                    yield select(batch, key)
+            
+            if streaming:
+                # Every batch gets the union of the columns, in order of first appearance
+                all_columns = []
+                for key in inputs:
+                    for column in usecols.get(key) or headers[key].columns:
+                        if column not in all_columns:
+                            all_columns.append(column)
+                FileProcessor._write_batches(
+                    (
+                        batch.reindex(columns=all_columns)
+                        for key in inputs
+                        for batch in input_batches(key, FILTER_BATCH_ROWS)
+                    ),
+                    output_path
+                )
+                return True, ""
+            
+            # Read all files; several sheets of one workbook are read together
+            dfs = []
+            for file_path, group in itertools.groupby(inputs, key=lambda key: key[0]):
+                keys = list(group)
+                if len(keys) > 1 and is_excel_file(file_path):
+                    frames = FileProcessor.read_sheets(
+                        file_path,
+                        [sheet for _, sheet in keys],
+                        columns={key[1]: reads[key] for key in keys if reads.get(key)}
+                    )
+                    dfs.extend(select(frames[key[1]], key) for key in keys)
+                    continue
+                # A CSV file listed several times is read once per listing
+                for key in keys:
+                    if keep is None:
+                        dfs.append(FileProcessor.read_file(
+                            file_path,
+                            sheet_name=key[1],
+                            schema=FileProcessor._csv_schema(file_path),
+                            usecols=usecols.get(key)
+                        ))
+                    else:
+                        dfs.append(pd.concat(list(input_batches(key, FILTER_BATCH_ROWS)), ignore_index=True))
             
             # Align columns if requested
             if align_columns:
@@ -259,8 +937,13 @@ class FileProcessor:
     def join_files(
         file_paths: List[str],
         output_path: str,
-        join_column: str,
-        join_type: str = 'inner'
+        join_column: Union[str, List[str]],
+        join_type: str = 'inner',
+        sheet_names: Optional[Dict[str, str]] = None,
+        engine: str = 'auto',
+        memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB,
+        confirm: Optional[Callable[[Dict[str, any]], bool]] = None,
+        columns: Optional[Dict[str, List[str]]] = None
     ) -> Tuple[bool, str]:
         """
         Combine files using join operation
@@ -268,8 +951,25 @@ class FileProcessor:
         Args:
             file_paths: List of input file paths (at least 2)
             output_path: Output file path
-            join_column: Column name to join on
-            join_type: Type of join ('inner', 'outer', 'left', 'right')
+            join_column: Column name to join on, or list of column names for a
+                composite key such as ['store_id', 'date']
+            join_type: Type of join ('inner', 'outer', 'left', 'right'), or 'semi' /
+                'anti' to keep the rows of the first file whose key is / is not in
+                the other files (see filter_by_keys)
+            sheet_names: Optional mapping of Excel file path to sheet name
+            engine: Join engine ('memory', or 'sort_merge' / 'hash' / 'broadcast' /
+                'sqlite' for inputs larger than memory); 'auto' joins in memory when
+                the memory governor expects the join to fit, and otherwise streams:
+                with a broadcast join when every input but the largest fits the
+                budget, else with a grace hash join
+            memory_budget_mb: Approximate memory budget for out-of-core engines
+                (with 'auto', at most the governor's budget)
+            confirm: Optional callback run before joining when the cardinality
+                check flags a possible row explosion; receives the report from
+                check_join_cardinality and returns False to cancel
+            columns: Optional mapping of file path to the columns to keep from it;
+                other columns are never parsed. Join columns are always read and
+                appear once in the output.
             
         Returns:
             Tuple of (success, error message)
@@ -278,28 +978,97 @@ class FileProcessor:
             if len(file_paths) < 2:
                 return False, "At least 2 files required for join"
             
-            # Read first file
-            result_df = FileProcessor.read_file(file_paths[0])
+            sheet_names = sheet_names or {}
+            join_column = normalize_key(join_column)
+            if not key_columns(join_column):
+                return False, "At least one join column required"
             
-            # Check if join column exists
-            if join_column not in result_df.columns:
-                return False, f"Join column '{join_column}' not found in first file"
+            # Check that every file has the join columns before reading any data
+            usecols = {}
+            for i, file_path in enumerate(file_paths):
+                header = FileProcessor.read_file(file_path, sheet_name=sheet_names.get(file_path), nrows=0)
+                for column in key_columns(join_column):
+                    if column not in header.columns:
+                        if i == 0:
+                            return False, f"Join column '{column}' not found in first file"
+                        return False, f"Join column '{column}' not found in {os.path.basename(file_path)}"
+                usecols[file_path] = FileProcessor._projection(file_path, header, columns, key_columns(join_column))
             
-            # Join with remaining files
-            for file_path in file_paths[1:]:
-                df = FileProcessor.read_file(file_path)
-                
-                # Check if join column exists
-                if join_column not in df.columns:
-                    return False, f"Join column '{join_column}' not found in {os.path.basename(file_path)}"
-                
-                # Perform join
-                result_df = result_df.merge(
-                    df,
-                    on=join_column,
+            if engine == 'auto':
+                memory_budget_mb = min(memory_budget_mb, memory_governor.memory_budget_mb())
+                if join_type in ('semi', 'anti'):
+                    # Key filters stream the first file whatever its size
+                    engine = 'memory'
+                else:
+                    sizes = [
+                        FileProcessor._estimate_memory(file_path, sheet_names.get(file_path), usecols[file_path])
+                        for file_path in file_paths
+                    ]
+                    if memory_governor.fits_in_memory(JOIN_MEMORY_FACTOR * sum(sizes)):
+                        engine = 'memory'
+                    elif (sum(sizes) - max(sizes)) * SORT_OVERHEAD_FACTOR <= memory_budget_mb * 1024 * 1024:
+                        # A large input against small lookups: stream it past them
+                        engine = GOVERNED_BROADCAST_JOIN
+                    else:
+                        engine = GOVERNED_STREAMING_JOIN
+            
+            if join_type in ('semi', 'anti') and engine != 'sqlite':
+                # Filters never add rows, so there is nothing to confirm
+                return FileProcessor.filter_by_keys(
+                    file_paths[0],
+                    file_paths[1:],
+                    output_path,
+                    join_column,
+                    anti=join_type == 'anti',
+                    sheet_names=sheet_names,
+                    memory_budget_mb=memory_budget_mb,
+                    columns=usecols[file_paths[0]]
+                )
+            
+            if confirm is not None and join_type not in ('semi', 'anti'):
+                report = FileProcessor.check_join_cardinality(file_paths, join_column, join_type, sheet_names)
+                if report['risky'] and not confirm(report):
+                    return False, "Join cancelled: " + report['summary']
+            
+            if engine in STREAMING_JOINS:
+                sources = [
+                    FileProcessor._batch_source(file_path, sheet_names.get(file_path), usecols[file_path])
+                    for file_path in file_paths
+                ]
+                batches = STREAMING_JOINS[engine](
+                    sources,
+                    join_column,
                     how=join_type,
-                    suffixes=('', f'_{os.path.basename(file_path)}')
+                    memory_budget_mb=memory_budget_mb
                 )
+                FileProcessor._write_batches(batches, output_path)
+                return True, ""
+            elif engine != 'memory':
+                return False, f"Unknown join engine: {engine}"
+            
+            load_input = FileProcessor._join_input_loader(file_paths, sheet_names, join_column, join_type, usecols)
+            
+            labels = [os.path.basename(file_path) for file_path in file_paths]
+            if len(file_paths) > 2:
+                # Let the planner pick the join order for multi-way joins
+                stats = [
+                    FileProcessor._input_stats(file_path, sheet_names.get(file_path), join_column)
+                    for file_path in file_paths
+                ]
+            else:
+                # Two inputs are joined in selection order whatever their size
+                stats = [InputStats(label, 0, 0) for label in labels]
+            plan = plan_join(stats, join_type)
+            result_df = execute_plan(
+                plan,
+                load_input,
+                join_column,
+                join_type,
+                labels,
+                workers=JOIN_WORKERS
+            )
+            if len(file_paths) > 2:
+                print(explain(plan, join_column))
             
             # Write output file
             success = FileProcessor.write_file(result_df, output_path)
@@ -312,6 +1081,561 @@ class FileProcessor:
         except Exception as e:
             return False, str(e)
     
+    @staticmethod
+    def filter_by_keys(
+        file_path: str,
+        filter_paths: List[str],
+        output_path: str,
+        join_column: Union[str, List[str]],
+        anti: bool = False,
+        sheet_names: Optional[Dict[str, str]] = None,
+        memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB,
+        columns: Optional[List[str]] = None
+    ) -> Tuple[bool, str]:
+        """
+        Keep the rows of a file whose key appears in other files (semi join),
+        or in none of them (anti join)
+        
+        Only the key columns of the filter files are read, into key sets that
+        spill to disk when they outgrow the memory budget. The main file is then
+        streamed through them. With several filter files a semi join keeps keys
+        found in all of them. Rows keep the main file's columns (or the selected
+        ones), and for CSV to CSV with every column they are copied byte for byte.
+        
+        Args:
+            file_path: Path to the main file
+            filter_paths: Paths to the files holding the keys to match
+            output_path: Output file path
+            join_column: Column name to match on, or list of names for a composite key
+            anti: Keep rows whose key is in none of the filter files
+            sheet_names: Optional mapping of Excel file path to sheet name
+            memory_budget_mb: Memory budget for the key sets
+            columns: Columns of the main file to write (None for all)
+            
+        Returns:
+            Tuple of (success, error message)
+        """
+        sheet_names = sheet_names or {}
+        keys = key_columns(join_column)
+        key_sets = []
+        try:
+            for filter_path in filter_paths:
+                key_set = KeySet(join_column, memory_budget_mb / len(filter_paths))
+                key_sets.append(key_set)
+                for batch in FileProcessor.read_batches(
+                    filter_path,
+                    KEY_SCAN_BATCH_ROWS,
+                    sheet_name=sheet_names.get(filter_path),
+                    columns=keys,
+                    schema=FileProcessor._csv_schema(filter_path)
+                ):
+                    key_set.add(batch)
+                key_set.finish()
+            
+            def keep(batch: pd.DataFrame) -> np.ndarray:
+                if anti:
+                    return ~np.logical_or.reduce([key_set.contains(batch) for key_set in key_sets])
+                return np.logical_and.reduce([key_set.contains(batch) for key_set in key_sets])
+            
+            if columns is None and is_csv_file(file_path) and csv_sink.is_csv_output(output_path):
+                try:
+                    FileProcessor._filter_csv_lines(file_path, output_path, keys, keep)
+                    return True, ""
+                except ValueError:
+                    # Records span several lines; fall back to rewriting parsed rows
+                    pass
+            
+            read = None if columns is None else list(columns) + [key for key in keys if key not in columns]
+            batches = (
+                batch.loc[keep(batch), columns if columns is not None else batch.columns]
+                for batch in FileProcessor.read_batches(
+                    file_path,
+                    KEY_SCAN_BATCH_ROWS,
+                    sheet_name=sheet_names.get(file_path),
+                    columns=read,
+                    schema=FileProcessor._csv_schema(file_path)
+                )
+            )
+            FileProcessor._write_batches(batches, output_path)
+            return True, ""
+        
+        except Exception as e:
+            return False, str(e)
+        
+        finally:
+            for key_set in key_sets:
+                key_set.close()
+    
+    @staticmethod
+    def _csv_line_batches(
+        source,
+        file_path: str,
+        columns: Optional[List[str]],
+        schema: Optional[Dict[str, str]] = None
+    ) -> Iterator[Tuple[pd.DataFrame, List[bytes]]]:
+        """
+        Parse some columns of a CSV file in batches, alongside the raw lines of each batch
+        
+        Args:
+            source: The file opened in binary mode, positioned after the header line
+            file_path: Path to the CSV file
+            columns: Columns to parse (None for all)
+            schema: Optional column types for the batches (see read_batches)
+            
+        Yields:
+            Tuples of (parsed batch, raw data lines of the batch)
+            
+        Raises:
+            ValueError: If parsed rows and lines do not line up (quoted line breaks)
+        """
+        # Blank lines are kept as rows so that rows and lines stay aligned
+        for batch in FileProcessor.read_batches(
+            file_path,
+            KEY_SCAN_BATCH_ROWS,
+            columns=columns,
+            schema=schema,
+            skip_blank_lines=False
+        ):
+            lines = list(itertools.islice(source, len(batch)))
+            if len(lines) != len(batch):
+                raise ValueError("CSV rows do not match lines")
+            yield batch, lines
+        if source.readline():
+            raise ValueError("CSV rows do not match lines")
+    
+    @staticmethod
+    def _filter_csv_lines(
+        file_path: str,
+        output_path: str,
+        columns: List[str],
+        keep: Callable[[pd.DataFrame], np.ndarray]
+    ) -> None:
+        """
+        Copy the header and the selected data lines of a CSV file unchanged
+        
+        Only the given columns are parsed, to decide which lines to keep; the
+        raw lines are read alongside and written as they are.
+        
+        Args:
+            file_path: Path to the CSV file
+            output_path: Output CSV path, plain or compressed
+            columns: Columns passed to keep
+            keep: Callable returning a boolean mask for a batch of rows
+            
+        Raises:
+            ValueError: If parsed rows and lines do not line up (quoted line breaks)
+        """
+        output_dir = os.path.dirname(output_path)
+        if output_dir:
+            ensure_directory_exists(output_dir)
+        
+        with open(file_path, 'rb') as source, csv_sink.CsvSink(output_path) as out:
+            out.write_bytes(source.readline())
+            for batch, lines in FileProcessor._csv_line_batches(source, file_path, columns):
+                out.write_bytes(b''.join(itertools.compress(lines, keep(batch))))
+    
+    @staticmethod
+    def _read_csv_matching(
+        file_path: str,
+        columns: List[str],
+        keep: Callable[[pd.DataFrame], np.ndarray],
+        usecols: Optional[List[str]] = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Read only the rows of a CSV file selected by their key columns
+        
+        The file is scanned in batches with its schema (see _csv_schema) to
+        select rows; the scan also widens the schema for values the sample
+        missed, so it holds every value of the file. Only the selected lines
+        are kept, and they are parsed again with that schema. The result
+        holds the same values and types as read_file with the schema,
+        filtered to the selected rows.
+        
+        Args:
+            file_path: Path to the CSV file
+            columns: Columns passed to keep
+            keep: Callable returning a boolean mask for a batch of rows
+            usecols: Columns to return, including the key columns (None for all)
+            
+        Returns:
+            DataFrame of the selected rows, or None when the first batch shows
+            that most rows are selected and a plain read is cheaper
+            
+        Raises:
+            ValueError: If parsed rows and lines do not line up (quoted line breaks)
+        """
+        schema = FileProcessor._csv_schema(file_path)
+        scanned = None if usecols is None else list(dict.fromkeys(list(columns) + list(usecols)))
+        checked = False
+        with open(file_path, 'rb') as source:
+            parts = [source.readline()]
+            for batch, lines in FileProcessor._csv_line_batches(source, file_path, scanned, schema):
+                mask = keep(batch)
+                if not checked and len(batch):
+                    if mask.mean() > JOIN_PREFILTER_MAX_PASS_RATE:
+                        return None
+                    checked = True
+                parts.extend(itertools.compress(lines, mask))
+        
+        if not parts[0].endswith(b'\n'):
+            parts[0] += b'\n'
+        df = pd.read_csv(
+            io.BytesIO(b''.join(parts)),
+            na_values=NA_VALUES,
+            keep_default_na=False,
+            dtype=csv_schema.parse_dtypes(schema),
+            usecols=usecols
+        )
+        return csv_schema.conform(df, schema)
+    
+    @staticmethod
+    def _join_input_loader(
+        file_paths: List[str],
+        sheet_names: Dict[str, str],
+        join_column: JoinKey,
+        join_type: str,
+        usecols: Optional[Dict[str, Optional[List[str]]]] = None
+    ) -> Callable[[int], pd.DataFrame]:
+        """
+        Create a loader for in-memory join inputs that skips rows that cannot match
+        
+        The input whose rows are all kept (the first file, or the last one for
+        right joins) is read in full. Any other file with a valid key index is
+        probed with the keys of that input and only matching rows are read,
+        since other rows cannot appear in the result. Inner joins read the
+        smallest file in full instead, and keep only the lines of other CSV
+        files whose key it contains (see _read_csv_matching), so rows that
+        cannot match never become DataFrame rows. Outer joins read every file
+        in full.
+        
+        Args:
+            file_paths: List of input file paths, in join order
+            sheet_names: Mapping of Excel file path to sheet name
+            join_column: Join column name, or list of names for a composite key
+            join_type: Type of join ('inner', 'outer', 'left', 'right')
+            usecols: Optional mapping of file path to the columns to read
+            
+        Returns:
+            Callable reading input i into a DataFrame
+        """
+        usecols = usecols or {}
+        
+        def read(i: int) -> pd.DataFrame:
+            return FileProcessor.read_file(
+                file_paths[i],
+                sheet_name=sheet_names.get(file_paths[i]),
+                schema=FileProcessor._csv_schema(file_paths[i]),
+                usecols=usecols.get(file_paths[i])
+            )
+        
+        if join_type == 'outer':
+            return read
+        
+        if join_type == 'inner':
+            anchor = min(range(len(file_paths)), key=lambda i: os.path.getsize(file_paths[i]))
+        else:
+            anchor = len(file_paths) - 1 if join_type == 'right' else 0
+        indexes = {
+            i: KeyIndex.open(file_path, join_column)
+            for i, file_path in enumerate(file_paths)
+            if i != anchor and is_csv_file(file_path)
+        }
+        indexes = {i: index for i, index in indexes.items() if index is not None}
+        if not indexes and join_type != 'inner':
+            return read
+        
+        anchor_df = read(anchor)
+        anchor_keys = anchor_df[join_column].drop_duplicates()
+        
+        def read_matching(i: int) -> pd.DataFrame:
+            key_set = KeySet(join_column)
+            try:
+                key_set.add(anchor_df)
+                key_set.finish()
+                if is_csv_file(file_paths[i]):
+                    try:
+                        df = FileProcessor._read_csv_matching(
+                            file_paths[i],
+                            key_columns(join_column),
+                            key_set.contains,
+                            usecols=usecols.get(file_paths[i])
+                        )
+                        if df is not None:
+                            return df
+                    except ValueError:
+                        pass
+                return read(i)
+            finally:
+                key_set.close()
+        
+        def load(i: int) -> pd.DataFrame:
+            if i == anchor:
+                return anchor_df
+            if i in indexes:
+                matching = indexes[i].fetch_matching(anchor_keys, columns=usecols.get(file_paths[i]))
+                return csv_schema.conform(matching, FileProcessor._csv_schema(file_paths[i]))
+            if join_type == 'inner':
+                return read_matching(i)
+            return read(i)
+        
+        return load
+    
+    @staticmethod
+    def build_key_index(
+        file_path: str,
+        column: Union[str, List[str]],
+        sheet_name: Optional[str] = None
+    ) -> Tuple[bool, str]:
+        """
+        Build a persistent key index for a file, used by later joins against it
+        
+        The index maps key values to rows and byte offsets, so joins can read
+        only the rows whose keys match. It is stored under INDEX_DIRECTORY and
+        rebuilt automatically when the file's size or modification time changes.
+        
+        Args:
+            file_path: Path to a CSV file
+            column: Column to index, or list of columns for a composite key
+            sheet_name: Not supported; Excel files cannot be read by offset
+            
+        Returns:
+            Tuple of (success, error message)
+        """
+        try:
+            if not is_csv_file(file_path) or sheet_name is not None:
+                return False, "Key indexes are only supported for CSV files"
+            
+            header = FileProcessor.read_file(file_path, nrows=0)
+            for name in key_columns(column):
+                if name not in header.columns:
+                    return False, f"Column '{name}' not found in {os.path.basename(file_path)}"
+            
+            KeyIndex.build(file_path, column, FileProcessor.read_batches(file_path, KEY_SCAN_BATCH_ROWS))
+            return True, ""
+        
+        except Exception as e:
+            return False, str(e)
+    
+    @staticmethod
+    def _reference_lookup(
+        reference_path: str,
+        join_column: JoinKey,
+        read_columns: List[str],
+        sheet_name: Optional[str] = None
+    ) -> Callable[[Union[pd.Series, pd.DataFrame]], pd.DataFrame]:
+        """
+        Create a function returning the first reference row for each of a set of keys
+        
+        CSV references are looked up through their persistent key index, built
+        on first use, so only matching rows are read. Excel references and CSV
+        files that cannot be indexed are held in memory, reduced to read_columns.
+        
+        Args:
+            reference_path: Path to the reference file
+            join_column: Join column name, or list of names for a composite key
+            read_columns: Columns to return, including the join columns
+            sheet_name: Sheet name for Excel files (None for first sheet or CSV)
+            
+        Returns:
+            Callable taking distinct keys and returning matching reference rows,
+            one per key, with integer and boolean columns in nullable types
+        """
+        keys = key_columns(join_column)
+        index = None
+        if is_csv_file(reference_path):
+            index = KeyIndex.open(reference_path, join_column)
+            if index is None:
+                try:
+                    index = KeyIndex.build(
+                        reference_path,
+                        join_column,
+                        FileProcessor.read_batches(reference_path, KEY_SCAN_BATCH_ROWS)
+                    )
+                except ValueError:
+                    # Records span several lines; fall back to reading the reference
+                    pass
+        
+        def nullable(rows: pd.DataFrame) -> pd.DataFrame:
+            # Unmatched keys leave gaps; keep whole numbers whole in every batch
+            return rows.astype({
+                column: 'Int64' if pd.api.types.is_integer_dtype(dtype) else 'boolean'
+                for column, dtype in rows.dtypes.items()
+                if column not in keys and (
+                    pd.api.types.is_integer_dtype(dtype) or pd.api.types.is_bool_dtype(dtype)
+                )
+            })
+        
+        if index is None:
+            table = FileProcessor.read_file(reference_path, sheet_name=sheet_name, usecols=read_columns)
+            table = nullable(table.drop_duplicates(subset=keys, ignore_index=True))
+            return lambda batch_keys: table
+        
+        def lookup(batch_keys: Union[pd.Series, pd.DataFrame]) -> pd.DataFrame:
+            rows = index.fetch_matching(batch_keys, columns=read_columns)
+            return nullable(rows.drop_duplicates(subset=keys, ignore_index=True))
+        
+        return lookup
+    
+    @staticmethod
+    def enrich_file(
+        file_path: str,
+        reference_path: str,
+        output_path: str,
+        join_column: Union[str, List[str]],
+        lookup_columns: Optional[List[str]] = None,
+        sheet_names: Optional[Dict[str, str]] = None,
+        columns: Optional[List[str]] = None,
+        memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB
+    ) -> Tuple[bool, str]:
+        """
+        Add columns looked up from a reference file by key, like VLOOKUP
+        
+        The main file is streamed in batches and written in its original row
+        order, one output row per input row. Each batch's keys are looked up in
+        the reference, whose key index (see build_key_index) is built on first
+        use and reused by later runs until the reference changes. When a key
+        appears several times in the reference its first row is used; rows
+        without a match get empty lookup columns. Missing keys match missing
+        keys, as in join_files.
+        
+        Args:
+            file_path: Path to the main file
+            reference_path: Path to the reference file
+            output_path: Output file path
+            join_column: Column name to look up by, or list of names for a composite key
+            lookup_columns: Reference columns to add (None for every non-key column)
+            sheet_names: Optional mapping of Excel file path to sheet name
+            columns: Columns of the main file to keep (None for all)
+            memory_budget_mb: Approximate memory budget for main file batches
+            
+        Returns:
+            Tuple of (success, error message)
+        """
+        try:
+            sheet_names = sheet_names or {}
+            join_column = normalize_key(join_column)
+            keys = key_columns(join_column)
+            if not keys:
+                return False, "At least one join column required"
+            
+            main_header = FileProcessor.read_file(file_path, sheet_name=sheet_names.get(file_path), nrows=0)
+            reference_header = FileProcessor.read_file(
+                reference_path, sheet_name=sheet_names.get(reference_path), nrows=0
+            )
+            for column in keys:
+                if column not in main_header.columns:
+                    return False, f"Join column '{column}' not found in first file"
+                if column not in reference_header.columns:
+                    return False, f"Join column '{column}' not found in {os.path.basename(reference_path)}"
+            
+            if not lookup_columns:
+                lookup_columns = [column for column in reference_header.columns if column not in keys]
+            lookup_columns = [column for column in lookup_columns if column not in keys]
+            read_columns = FileProcessor._projection(
+                reference_path, reference_header, {reference_path: lookup_columns}, keys
+            ) or keys
+            usecols = FileProcessor._projection(file_path, main_header, {file_path: columns}, keys)
+            
+            lookup = FileProcessor._reference_lookup(
+                reference_path, join_column, read_columns, sheet_names.get(reference_path)
+            )
+            suffix = f'_{os.path.basename(reference_path)}'
+            
+            source = FileProcessor._batch_source(file_path, sheet_names.get(file_path), usecols)
+            
+            def enriched() -> Iterator[pd.DataFrame]:
+                for batch in source.open_batches(source.batch_rows(memory_budget_mb)):
+                    rows = lookup(batch[join_column].drop_duplicates())
+                    # A left merge keeps the batch's row order
+                    yield batch.merge(rows, on=join_column, how='left', suffixes=('', suffix))
+            
+            FileProcessor._write_batches(enriched(), output_path)
+            return True, ""
+        
+        except Exception as e:
+            return False, str(e)
+    
+    @staticmethod
+    def check_join_cardinality(
+        file_paths: List[str],
+        join_column: Union[str, List[str]],
+        join_type: str = 'inner',
+        sheet_names: Optional[Dict[str, str]] = None
+    ) -> Dict[str, any]:
+        """
+        Estimate the size of a join before running it
+        
+        Only the join column of each file is read, into bounded-size key
+        sketches, so duplicate keys and many-to-many blow-ups are caught
+        without materializing any join.
+        
+        Args:
+            file_paths: List of input file paths, in join order
+            join_column: Column name to join on, or list of names for a composite key
+            join_type: Type of join ('inner', 'outer', 'left', 'right')
+            sheet_names: Optional mapping of Excel file path to sheet name
+            
+        Returns:
+            Dictionary with per-file key statistics ('files'), the estimated
+            output row count ('estimated_rows'), whether the join looks like an
+            explosion ('risky') and a readable 'summary'
+        """
+        sheet_names = sheet_names or {}
+        join_column = normalize_key(join_column)
+        sketches = []
+        for file_path in file_paths:
+            # Count the heavy keys of earlier files exactly in this one
+            watch = set()
+            for sketch in sketches:
+                watch.update(sketch.candidates)
+            sketch = KeySketch(os.path.basename(file_path), watch=watch)
+            for batch in FileProcessor.read_batches(
+                file_path,
+                KEY_SCAN_BATCH_ROWS,
+                sheet_name=sheet_names.get(file_path),
+                columns=key_columns(join_column)
+            ):
+                sketch.update(batch[join_column])
+            sketches.append(sketch)
+        
+        estimated_rows = int(estimate_join_rows(sketches, join_type))
+        largest = max(sketch.rows for sketch in sketches)
+        risky = estimated_rows > JOIN_EXPLOSION_FACTOR * max(largest, 1)
+        
+        files = []
+        lines = [f"Estimated output: ~{estimated_rows:,} rows (largest input: {largest:,} rows)"]
+        for i, sketch in enumerate(sketches):
+            overlap = estimate_overlap(sketches[0], sketch) if i > 0 else None
+            info = {
+                'name': sketch.label,
+                'rows': sketch.rows,
+                'distinct_keys': min(sketch.distinct(), sketch.rows),
+                'top_duplicate_keys': sketch.top_keys(),
+                'overlap_with_first': overlap
+            }
+            files.append(info)
+            
+            line = f"{info['name']}: {info['rows']:,} rows, ~{info['distinct_keys']:,} distinct keys"
+            if info['top_duplicate_keys']:
+                key, count = info['top_duplicate_keys'][0]
+                if isinstance(key, tuple):
+                    key = ", ".join(str(value) for value in key)
+                line += f", duplicate keys (e.g. '{key}' x{count:,})"
+            if overlap is not None:
+                line += f", ~{overlap:.0%} of keys found in {sketches[0].label}"
+            lines.append(line)
+        
+        if risky:
+            ratio = estimated_rows / max(largest, 1)
+            lines.append(f"Warning: this join may produce {ratio:,.0f}x more rows than the largest input.")
+        
+        return {
+            'files': files,
+            'estimated_rows': estimated_rows,
+            'risky': risky,
+            'summary': "\n".join(lines)
+        }
+    
     @staticmethod
     def get_file_info(file_path: str) -> Dict[str, any]:
         """
@@ -339,18 +1663,21 @@ class FileProcessor:
             }
     
     @staticmethod
-    def get_column_names(file_path: str, sheet_name: Optional[str] = None) -> List[str]:
+    def get_column_names(file_path: str, sheet_name: Optional[Union[str, List[str]]] = None) -> List[str]:
         """
         Get column names from a file
         
         Args:
             file_path: Path to the file
-            sheet_name: Sheet name for Excel files (None for first sheet)
+            sheet_name: Sheet name for Excel files (None for first sheet; for a
+                list of sheets, the first of them)
             
         Returns:
             List of column names
         """
         try:
+            if isinstance(sheet_name, (list, tuple)):
+                sheet_name = sheet_name[0] if sheet_name else None
             # Read only first row to get column names
             df = FileProcessor.read_file(file_path, sheet_name=sheet_name, nrows=1)
             return list(df.columns)
@@ -372,11 +1699,6 @@ class FileProcessor:
             if not is_excel_file(file_path):
                 return []
             
-            ext = get_file_extension(file_path)
-            engine = EXCEL_ENGINE_XLS if ext == '.xls' else EXCEL_ENGINE
-            
-            # Read Excel file to get sheet names
-            excel_file = pd.ExcelFile(file_path, engine=engine)
-            return excel_file.sheet_names
+            return FileProcessor._use_workbook(file_path, {}, lambda workbook: workbook.sheet_names)
         except Exception:
             return []
\ No newline at end of file
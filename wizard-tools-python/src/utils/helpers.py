@@ -87,6 +87,30 @@ def create_output_filename(
     return f"{base_name}{suffix}{extension}"
 
 
+def parse_column_list(text: str, known_columns: Optional[List[str]] = None) -> List[str]:
+    """
+    Parse a comma-separated list of column names
+    
+    Args:
+        text: Column names separated by commas (e.g., 'store_id, date')
+        known_columns: Optional column names; text matching one exactly is
+            kept whole even if it contains a comma
+        
+    Returns:
+        List of column names, without blanks or duplicates
+    """
+    text = text.strip()
+    if known_columns and text in known_columns:
+        return [text]
+    
+    columns = []
+    for name in text.split(','):
+        name = name.strip()
+        if name and name not in columns:
+            columns.append(name)
+    return columns
+
+
 def create_zip_file(file_paths: List[str], zip_path: str) -> bool:
     """
     Create a ZIP file containing the specified files
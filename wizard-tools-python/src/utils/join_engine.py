@@ -0,0 +1,989 @@
+"""
+Out-of-core join engines for Wizard Tools application
+Joins inputs that are too large to hold in memory by streaming them in batches
+"""
+import os
+import math
+import pickle
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Tuple, Union
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import (
+    JOIN_MEMORY_BUDGET_MB,
+    SPILL_DIRECTORY,
+    JOIN_WORKERS,
+    JOIN_BLOOM_FALSE_POSITIVE_RATE,
+    JOIN_PREFILTER_MAX_PASS_RATE
+)
+from utils.bloom_filter import BloomFilter
+
+# Working memory is a multiple of the raw batch size while sorting and merging
+SORT_OVERHEAD_FACTOR = 3
+# Each sorted run is written as this many blocks so merges read small pieces
+BLOCKS_PER_RUN = 32
+MIN_BATCH_ROWS = 100
+# Hash join partitioning limits
+MAX_PARTITIONS = 256
+MAX_REPARTITION_DEPTH = 3
+REPARTITION_FANOUT = 8
+# Hidden column holding the hash of a composite key while an engine runs
+KEY_HASH_COLUMN = '__wizard_key_hash__'
+# Share of the memory budget a join prefilter may use
+BLOOM_BUDGET_SHARE = 0.25
+
+# A join key is one column name or a list of column names
+JoinKey = Union[str, List[str]]
+
+
+class BatchSource:
+    """A re-readable stream of DataFrame batches from one input"""
+
+    def __init__(
+        self,
+        label: str,
+        open_batches: Callable[..., Iterator[pd.DataFrame]],
+        row_bytes: float,
+        estimated_rows: Optional[int] = None
+    ):
+        """
+        Initialize a batch source
+
+        Args:
+            label: Display name of the input (used for merge suffixes)
+            open_batches: Callable taking (batch_rows, columns=None) and returning
+                a fresh iterator of DataFrame batches
+            row_bytes: Estimated in-memory size of one row in bytes
+            estimated_rows: Estimated number of rows (None if unknown)
+        """
+        self.label = label
+        self.open_batches = open_batches
+        self.row_bytes = max(float(row_bytes), 1.0)
+        self.estimated_rows = estimated_rows
+
+    @property
+    def estimated_bytes(self) -> float:
+        """Estimated in-memory size of the whole input in bytes (0 if unknown)"""
+        return (self.estimated_rows or 0) * self.row_bytes
+
+    def batch_rows(self, memory_budget_mb: float) -> int:
+        """
+        Get the number of rows per batch that fits the memory budget
+
+        Args:
+            memory_budget_mb: Memory budget in MB
+
+        Returns:
+            Rows per batch
+        """
+        budget_bytes = memory_budget_mb * 1024 * 1024
+        rows = int(budget_bytes / (self.row_bytes * SORT_OVERHEAD_FACTOR))
+        return max(rows, MIN_BATCH_ROWS)
+
+
+def estimate_row_bytes(df: pd.DataFrame) -> float:
+    """
+    Estimate the in-memory size of one row of a DataFrame
+
+    Args:
+        df: Sample DataFrame
+
+    Returns:
+        Average bytes per row
+    """
+    if len(df) == 0:
+        return 1.0
+    return float(df.memory_usage(index=False, deep=True).sum()) / len(df)
+
+
+def key_columns(key: JoinKey) -> List[str]:
+    """
+    Normalize a join key to a list of column names
+
+    Args:
+        key: Column name, or list of column names for a composite key
+
+    Returns:
+        List of key column names
+    """
+    return [key] if isinstance(key, str) else list(key)
+
+
+def normalize_key(key: JoinKey) -> JoinKey:
+    """
+    Reduce a one-column list key to the plain column name
+
+    Args:
+        key: Column name, or list of column names for a composite key
+
+    Returns:
+        The column name for single keys, otherwise the list of names
+    """
+    columns = key_columns(key)
+    return columns[0] if len(columns) == 1 else columns
+
+
+def _hashed_key_source(source: BatchSource, key: List[str]) -> BatchSource:
+    """Wrap a source so its batches carry KEY_HASH_COLUMN, the hash of a composite key"""
+    def open_batches(batch_rows: int, columns: Optional[List[str]] = None):
+        read = None
+        if columns is not None:
+            read = [col for col in columns if col != KEY_HASH_COLUMN]
+            read += [col for col in key if col not in read]
+        for batch in source.open_batches(batch_rows, columns=read):
+            batch = batch.assign(**{KEY_HASH_COLUMN: hash_keys(batch[key])})
+            yield batch if columns is None else batch[columns]
+
+    return BatchSource(source.label, open_batches, source.row_bytes + 8, source.estimated_rows)
+
+
+def _resolve_key(sources: List[BatchSource], key: JoinKey) -> Tuple[List[BatchSource], str, JoinKey]:
+    """
+    Pick the column an engine sorts and partitions on, and the columns it merges on
+
+    A composite key is reduced to one 64-bit hash column, so sorting, range
+    bounds and partitioning work on a single integer. Merges still compare the
+    real key columns alongside the hash, so colliding keys never match.
+
+    Returns:
+        Tuple of (sources, order column, merge columns)
+    """
+    columns = key_columns(key)
+    if len(columns) == 1:
+        return sources, columns[0], columns[0]
+    sources = [_hashed_key_source(source, columns) for source in sources]
+    return sources, KEY_HASH_COLUMN, [KEY_HASH_COLUMN] + columns
+
+
+def _drop_key_hash(blocks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+    """Remove the composite key hash column from engine output"""
+    for block in blocks:
+        if KEY_HASH_COLUMN in block.columns:
+            block = block.drop(columns=[KEY_HASH_COLUMN])
+        yield block
+
+
+def _prefiltered_source(source: BatchSource, key: JoinKey, bloom: BloomFilter) -> BatchSource:
+    """Wrap a source so rows whose key is not in the Bloom filter are dropped as batches are read"""
+    key_cols = key_columns(key)
+
+    def open_batches(batch_rows: int, columns: Optional[List[str]] = None):
+        read = None
+        if columns is not None:
+            read = list(columns) + [col for col in key_cols if col not in columns]
+        seen = passed = 0
+        for batch in source.open_batches(batch_rows, columns=read):
+            # Checking keys costs more than it saves once most rows match
+            if seen == 0 or passed <= seen * JOIN_PREFILTER_MAX_PASS_RATE:
+                seen += len(batch)
+                batch = batch[bloom.might_contain(hash_keys(batch[key]))]
+                passed += len(batch)
+            yield batch if columns is None else batch[columns]
+
+    return BatchSource(source.label, open_batches, source.row_bytes, source.estimated_rows)
+
+
+def bloom_prefilter(
+    sources: List[BatchSource],
+    key: JoinKey,
+    memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB
+) -> List[BatchSource]:
+    """
+    Drop rows that cannot appear in an inner join before an engine sorts or spills them
+
+    A Bloom filter is built from the keys of the smallest input, reading only
+    its key columns, and every other input is streamed through it. Rows whose
+    key is certainly absent from the smallest input are dropped as each batch
+    is read; the few false positives are removed by the join itself. Inputs
+    where most rows match stop being checked after their first batch.
+
+    Args:
+        sources: Input batch sources
+        key: Join column name, or list of names for a composite key
+        memory_budget_mb: Memory budget in MB; the filter uses at most a quarter of it
+
+    Returns:
+        Sources in the same order, every input but the smallest one filtered
+    """
+    build_idx = min(range(len(sources)), key=lambda i: sources[i].estimated_bytes)
+    build = sources[build_idx]
+    if build.estimated_rows is None:
+        return sources
+
+    key = normalize_key(key)
+    bloom = BloomFilter(
+        build.estimated_rows,
+        JOIN_BLOOM_FALSE_POSITIVE_RATE,
+        max_bytes=memory_budget_mb * 1024 * 1024 * BLOOM_BUDGET_SHARE
+    )
+    for batch in build.open_batches(build.batch_rows(memory_budget_mb), columns=key_columns(key)):
+        bloom.add(hash_keys(batch[key]))
+
+    return [
+        source if i == build_idx else _prefiltered_source(source, key, bloom)
+        for i, source in enumerate(sources)
+    ]
+
+
+def _split_null_keys(df: pd.DataFrame, key: str):
+    """Split a DataFrame into (rows with a key, rows with a missing key)"""
+    mask = df[key].isna()
+    if not mask.any():
+        return df, df.iloc[0:0]
+    return df[~mask], df[mask]
+
+
+def _spill(blocks: Iterator[pd.DataFrame], path: str) -> None:
+    """Write a sequence of DataFrame blocks to a spill file"""
+    with open(path, 'wb') as f:
+        for block in blocks:
+            pickle.dump(block, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _read_spill(path: str) -> Iterator[pd.DataFrame]:
+    """Read DataFrame blocks back from a spill file"""
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                yield pickle.load(f)
+            except EOFError:
+                return
+
+
+def _blocks_of(df: pd.DataFrame, block_rows: int) -> Iterator[pd.DataFrame]:
+    """Slice a DataFrame into blocks of at most block_rows rows"""
+    for start in range(0, len(df), block_rows):
+        yield df.iloc[start:start + block_rows]
+
+
+def is_sorted_on_key(source: BatchSource, key: str, batch_rows: int) -> bool:
+    """
+    Check whether an input is already sorted ascending on a key
+
+    Only the key column is read. Inputs with missing keys are reported as
+    unsorted so they go through the regular sort path.
+
+    Args:
+        source: Input batch source
+        key: Key column name
+        batch_rows: Rows per batch while scanning
+
+    Returns:
+        True if the key column is non-decreasing across the whole input
+    """
+    previous_last = None
+    try:
+        for batch in source.open_batches(batch_rows, columns=[key]):
+            keys = batch[key]
+            if len(keys) == 0:
+                continue
+            if keys.isna().any() or not keys.is_monotonic_increasing:
+                return False
+            if previous_last is not None and keys.iloc[0] < previous_last:
+                return False
+            previous_last = keys.iloc[-1]
+    except TypeError:
+        # Mixed, non-comparable key types
+        return False
+    return True
+
+
+def _merge_sorted_runs(run_paths: List[str], key: str) -> Iterator[pd.DataFrame]:
+    """
+    K-way merge of sorted spill runs into one sorted stream of blocks
+
+    Rows up to the smallest "last key" among the current blocks are safe to
+    emit, because every remaining row of every run is at least that large.
+    """
+    readers = [_read_spill(path) for path in run_paths]
+    buffers = {}
+    for i, reader in enumerate(readers):
+        block = next(reader, None)
+        if block is not None:
+            buffers[i] = block
+
+    while buffers:
+        bound = min(block[key].iloc[-1] for block in buffers.values())
+        parts = []
+        for i in list(buffers):
+            block = buffers[i]
+            cut = int(block[key].searchsorted(bound, side='right'))
+            parts.append(block.iloc[:cut])
+            rest = block.iloc[cut:]
+            if len(rest) == 0:
+                rest = next(readers[i], None)
+            if rest is None:
+                del buffers[i]
+            else:
+                buffers[i] = rest
+
+        merged = pd.concat(parts, ignore_index=True)
+        yield merged.sort_values(key, kind='mergesort', ignore_index=True)
+
+
+def sorted_stream(
+    source: BatchSource,
+    key: str,
+    workdir: str,
+    memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB
+) -> Iterator[pd.DataFrame]:
+    """
+    Stream an input in ascending key order using disk-backed sorted runs
+
+    Inputs that are already sorted on the key are streamed as-is. Rows with a
+    missing key are emitted last.
+
+    Args:
+        source: Input batch source
+        key: Key column name
+        workdir: Directory for spill files
+        memory_budget_mb: Memory budget in MB
+
+    Yields:
+        DataFrame blocks sorted on the key
+    """
+    batch_rows = source.batch_rows(memory_budget_mb)
+
+    if is_sorted_on_key(source, key, batch_rows):
+        yield from source.open_batches(batch_rows)
+        return
+
+    block_rows = max(batch_rows // BLOCKS_PER_RUN, MIN_BATCH_ROWS)
+    run_prefix = os.path.join(workdir, f"run_{id(source)}")
+    run_paths = []
+    null_parts = []
+    template = None
+
+    for batch in source.open_batches(batch_rows):
+        if template is None:
+            template = batch.iloc[0:0]
+        batch, nulls = _split_null_keys(batch, key)
+        if len(nulls):
+            null_parts.append(nulls)
+        if len(batch) == 0:
+            continue
+        batch = batch.sort_values(key, kind='mergesort', ignore_index=True)
+        run_path = f"{run_prefix}_{len(run_paths)}.pkl"
+        _spill(_blocks_of(batch, block_rows), run_path)
+        run_paths.append(run_path)
+
+    if template is not None:
+        # Always emit the schema, even for inputs without rows
+        yield template
+
+    yield from _merge_sorted_runs(run_paths, key)
+
+    for nulls in null_parts:
+        yield nulls
+
+
+def merge_join_sorted(
+    left: Iterator[pd.DataFrame],
+    right: Iterator[pd.DataFrame],
+    key: str,
+    how: str = 'inner',
+    suffixes=('', '_y'),
+    on: Optional[JoinKey] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Merge-join two streams that are sorted ascending on the key
+
+    Each step joins the key range that is complete on both sides with
+    DataFrame.merge, so join semantics and column suffixes match an in-memory
+    merge. Rows with a missing key are joined together at the end, as pandas
+    matches missing keys with each other.
+
+    Args:
+        left: Sorted left stream
+        right: Sorted right stream
+        key: Key column name the streams are sorted on
+        how: Join type ('inner', 'outer', 'left', 'right')
+        suffixes: Suffixes for overlapping column names
+        on: Columns to merge on (None for the key column)
+
+    Yields:
+        Joined DataFrame blocks in ascending key order
+    """
+    on = key if on is None else on
+    streams = [left, right]
+    buffers = [None, None]
+    nulls = [[], []]
+    done = [False, False]
+
+    def pull(side: int) -> None:
+        block = next(streams[side], None)
+        if block is None:
+            done[side] = True
+            return
+        block, null_rows = _split_null_keys(block, key)
+        if len(null_rows):
+            nulls[side].append(null_rows)
+        if buffers[side] is None or len(buffers[side]) == 0:
+            buffers[side] = block
+        elif len(block):
+            buffers[side] = pd.concat([buffers[side], block], ignore_index=True)
+
+    def join(left_df: pd.DataFrame, right_df: pd.DataFrame) -> pd.DataFrame:
+        return left_df.merge(right_df, on=on, how=how, suffixes=suffixes, sort=True)
+
+    # Prime both sides so the column layout of each is known
+    for side in (0, 1):
+        while buffers[side] is None and not done[side]:
+            pull(side)
+        if buffers[side] is None:
+            raise ValueError("Join input produced no data")
+
+    while True:
+        for side in (0, 1):
+            while len(buffers[side]) == 0 and not done[side]:
+                pull(side)
+
+        if all(done):
+            break
+
+        # Keys below the bound cannot appear again on either side
+        bound = min(
+            buffers[side][key].iloc[-1]
+            for side in (0, 1)
+            if not done[side]
+        )
+        cuts = [int(buffers[side][key].searchsorted(bound, side='left')) for side in (0, 1)]
+
+        if cuts[0] == 0 and cuts[1] == 0:
+            # Only rows at the bound remain; read more from the side(s) that end there
+            for side in (0, 1):
+                if not done[side] and buffers[side][key].iloc[-1] == bound:
+                    pull(side)
+            continue
+
+        heads = [buffers[side].iloc[:cuts[side]] for side in (0, 1)]
+        buffers = [buffers[side].iloc[cuts[side]:] for side in (0, 1)]
+        yield join(heads[0], heads[1])
+
+    yield join(buffers[0], buffers[1])
+
+    if nulls[0] or nulls[1]:
+        null_frames = [
+            pd.concat(nulls[side], ignore_index=True) if nulls[side] else buffers[side].iloc[0:0]
+            for side in (0, 1)
+        ]
+        yield join(null_frames[0], null_frames[1])
+
+
+def sort_merge_join(
+    sources: List[BatchSource],
+    key: JoinKey,
+    how: str = 'inner',
+    memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB,
+    spill_dir: Optional[str] = SPILL_DIRECTORY
+) -> Iterator[pd.DataFrame]:
+    """
+    Join several inputs with an external sort-merge join
+
+    Inputs are joined in order, with the first input as the left table. Each
+    input is sorted into disk-backed runs (unless already sorted) and joined
+    as a stream, so memory use stays near the budget rather than the input size.
+    Inner joins first drop rows that cannot match (see bloom_prefilter).
+
+    Args:
+        sources: Input batch sources (at least 2)
+        key: Join column name, or list of names for a composite key
+        how: Join type ('inner', 'outer', 'left', 'right')
+        memory_budget_mb: Memory budget in MB, shared across inputs
+        spill_dir: Directory for temporary spill files (None = system temp)
+
+    Yields:
+        Joined DataFrame blocks in ascending key order (composite keys in hash order)
+    """
+    if len(sources) < 2:
+        raise ValueError("At least 2 inputs required for join")
+
+    if how == 'inner':
+        sources = bloom_prefilter(sources, key, memory_budget_mb)
+    sources, key, on = _resolve_key(sources, key)
+
+    per_input_budget = memory_budget_mb / len(sources)
+
+    with tempfile.TemporaryDirectory(prefix="wizard_join_", dir=spill_dir) as workdir:
+        result = sorted_stream(sources[0], key, workdir, per_input_budget)
+        for source in sources[1:]:
+            right = sorted_stream(source, key, workdir, per_input_budget)
+            result = merge_join_sorted(
+                result,
+                right,
+                key,
+                how=how,
+                suffixes=('', f'_{source.label}'),
+                on=on
+            )
+        yield from _drop_key_hash(result)
+
+
+def hash_keys(keys: Union[pd.Series, pd.DataFrame], seed: int = 0) -> np.ndarray:
+    """
+    Hash join keys to 64-bit integers
+
+    Numeric keys are hashed as float64 so that, as in DataFrame.merge, 5 and
+    5.0 get the same hash. Missing keys all share one hash. For composite keys
+    the column hashes of each row are combined into one value.
+
+    Args:
+        keys: Key values, or a DataFrame of key columns
+        seed: Hash seed (0-99999)
+
+    Returns:
+        Array of uint64 hashes
+    """
+    if isinstance(keys, pd.DataFrame):
+        keys = keys.astype({
+            col: 'float64' for col in keys.columns if pd.api.types.is_numeric_dtype(keys[col])
+        })
+    elif pd.api.types.is_numeric_dtype(keys):
+        keys = keys.astype('float64')
+    return pd.util.hash_pandas_object(keys, index=False, hash_key=f"wizardtools{seed:05d}").to_numpy()
+
+
+def _partition_ids(keys: pd.Series, n_partitions: int, level: int = 0) -> np.ndarray:
+    """
+    Assign each key to a hash partition
+
+    Each repartitioning level uses a different hash seed so skewed partitions
+    are actually split.
+    """
+    return (hash_keys(keys, level) % np.uint64(n_partitions)).astype(np.int64)
+
+
+def _partition_streams(
+    streams: List[Iterator[pd.DataFrame]],
+    key: str,
+    n_partitions: int,
+    level: int,
+    workdir: str
+) -> Tuple[List[List[Optional[str]]], List[List[int]], List[pd.DataFrame]]:
+    """
+    Hash-partition several streams on a key into spill files
+
+    Returns:
+        Tuple of (spill paths [input][partition], row counts [input][partition],
+        empty template DataFrame per input)
+    """
+    paths = [[None] * n_partitions for _ in streams]
+    counts = [[0] * n_partitions for _ in streams]
+    templates = []
+
+    for i, stream in enumerate(streams):
+        handles = {}
+        template = None
+        try:
+            for batch in stream:
+                if template is None:
+                    template = batch.iloc[0:0]
+                if len(batch) == 0:
+                    continue
+                ids = _partition_ids(batch[key], n_partitions, level)
+                for part, piece in batch.groupby(ids, sort=False):
+                    if part not in handles:
+                        paths[i][part] = os.path.join(workdir, f"in{i}_p{part}.pkl")
+                        handles[part] = open(paths[i][part], 'wb')
+                    pickle.dump(piece, handles[part], protocol=pickle.HIGHEST_PROTOCOL)
+                    counts[i][part] += len(piece)
+        finally:
+            for handle in handles.values():
+                handle.close()
+        if template is None:
+            raise ValueError("Join input produced no data")
+        templates.append(template)
+
+    return paths, counts, templates
+
+
+def _load_partition(path: Optional[str], template: pd.DataFrame) -> pd.DataFrame:
+    """Load one spilled partition, or an empty frame if nothing was routed to it"""
+    if path is None:
+        return template
+    blocks = list(_read_spill(path))
+    return pd.concat(blocks, ignore_index=True) if len(blocks) > 1 else blocks[0]
+
+
+def _join_frames(
+    frames: List[pd.DataFrame],
+    on: JoinKey,
+    how: str,
+    labels: List[str]
+) -> pd.DataFrame:
+    """Chain DataFrame.merge over frames, first frame as the left table"""
+    result = frames[0]
+    for frame, label in zip(frames[1:], labels[1:]):
+        result = result.merge(frame, on=on, how=how, suffixes=('', f'_{label}'))
+    return result
+
+
+def _join_partition(
+    part_paths: List[Optional[str]],
+    part_counts: List[int],
+    templates: List[pd.DataFrame],
+    row_bytes: List[float],
+    key: str,
+    on: JoinKey,
+    how: str,
+    labels: List[str],
+    budget_bytes: float,
+    level: int,
+    out_path: str
+) -> str:
+    """
+    Join one partition of every input, repartitioning it if it is too large
+
+    Runs in a worker process. The joined rows are spilled to out_path.
+
+    Returns:
+        Path of the spilled join result
+    """
+    size = sum(count * rb for count, rb in zip(part_counts, row_bytes)) * SORT_OVERHEAD_FACTOR
+
+    if size > budget_bytes and level < MAX_REPARTITION_DEPTH:
+        sub_dir = out_path + ".parts"
+        os.makedirs(sub_dir, exist_ok=True)
+        streams = [
+            _read_spill(path) if path is not None else iter([template])
+            for path, template in zip(part_paths, templates)
+        ]
+        sub_paths, sub_counts, _ = _partition_streams(
+            streams, key, REPARTITION_FANOUT, level + 1, sub_dir
+        )
+
+        # A partition dominated by one key cannot be split further
+        largest = max(sum(counts[p] for counts in sub_counts) for p in range(REPARTITION_FANOUT))
+        if largest < sum(part_counts):
+            with open(out_path, 'wb') as out:
+                for p in range(REPARTITION_FANOUT):
+                    sub_out = _join_partition(
+                        [paths[p] for paths in sub_paths],
+                        [counts[p] for counts in sub_counts],
+                        templates,
+                        row_bytes,
+                        key,
+                        on,
+                        how,
+                        labels,
+                        budget_bytes,
+                        level + 1,
+                        os.path.join(sub_dir, f"out_p{p}.pkl")
+                    )
+                    for block in _read_spill(sub_out):
+                        pickle.dump(block, out, protocol=pickle.HIGHEST_PROTOCOL)
+            return out_path
+
+    frames = [_load_partition(path, template) for path, template in zip(part_paths, templates)]
+    result = _join_frames(frames, on, how, labels)
+    _spill(iter([result]), out_path)
+    return out_path
+
+
+def hash_join(
+    sources: List[BatchSource],
+    key: JoinKey,
+    how: str = 'inner',
+    memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB,
+    spill_dir: Optional[str] = SPILL_DIRECTORY,
+    workers: Optional[int] = JOIN_WORKERS
+) -> Iterator[pd.DataFrame]:
+    """
+    Join several inputs with a Grace hash join
+
+    Every input is hash-partitioned on the key into spill files. Matching keys
+    always share a partition, so each partition is joined independently in
+    memory and partitions are processed in parallel. Partitions that exceed
+    their share of the memory budget are recursively repartitioned. Inner
+    joins first drop rows that cannot match (see bloom_prefilter).
+
+    Args:
+        sources: Input batch sources (at least 2), first is the left table
+        key: Join column name, or list of names for a composite key
+        how: Join type ('inner', 'outer', 'left', 'right')
+        memory_budget_mb: Memory budget in MB, shared across workers
+        spill_dir: Directory for temporary spill files (None = system temp)
+        workers: Number of worker processes (None = number of CPUs)
+
+    Yields:
+        Joined DataFrame blocks, one or more per partition
+    """
+    if len(sources) < 2:
+        raise ValueError("At least 2 inputs required for join")
+
+    if how == 'inner':
+        sources = bloom_prefilter(sources, key, memory_budget_mb)
+    sources, key, on = _resolve_key(sources, key)
+    workers = workers or os.cpu_count() or 1
+    budget_bytes = memory_budget_mb * 1024 * 1024
+    partition_budget = budget_bytes / workers
+
+    total_bytes = sum(source.estimated_bytes for source in sources) * SORT_OVERHEAD_FACTOR
+    n_partitions = min(max(math.ceil(total_bytes / partition_budget), 1), MAX_PARTITIONS)
+    labels = [source.label for source in sources]
+    row_bytes = [source.row_bytes for source in sources]
+
+    with tempfile.TemporaryDirectory(prefix="wizard_join_", dir=spill_dir) as workdir:
+        streams = [
+            source.open_batches(source.batch_rows(memory_budget_mb / len(sources)))
+            for source in sources
+        ]
+        paths, counts, templates = _partition_streams(streams, key, n_partitions, 0, workdir)
+
+        # Partitions that received rows from at least one input (empty joins add nothing)
+        tasks = []
+        for p in range(n_partitions):
+            if any(counts[i][p] for i in range(len(sources))):
+                tasks.append((
+                    [paths[i][p] for i in range(len(sources))],
+                    [counts[i][p] for i in range(len(sources))],
+                    templates,
+                    row_bytes,
+                    key,
+                    on,
+                    how,
+                    labels,
+                    partition_budget,
+                    0,
+                    os.path.join(workdir, f"out_p{p}.pkl")
+                ))
+
+        # The schema of the result, even when no partition produces rows
+        yield from _drop_key_hash(iter([_join_frames(templates, on, how, labels)]))
+
+        if workers == 1 or len(tasks) <= 1:
+            for task in tasks:
+                yield from _drop_key_hash(_read_spill(_join_partition(*task)))
+            return
+
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as pool:
+            futures = [pool.submit(_join_partition, *task) for task in tasks]
+            for future in futures:
+                out_path = future.result()
+                yield from _drop_key_hash(_read_spill(out_path))
+                os.remove(out_path)
+
+
+class _LookupTable:
+    """In-memory hash table over one small input of a broadcast join"""
+
+    def __init__(self, df: pd.DataFrame, key: str, suffix: str, on: Optional[JoinKey] = None):
+        """
+        Build the lookup table
+
+        Args:
+            df: Complete small input
+            key: Column the table is indexed on
+            suffix: Suffix for this input's overlapping columns
+            on: Columns to merge on (None for the key column)
+        """
+        self.key = key
+        self.on = key if on is None else on
+        # Composite key columns checked after a hash lookup
+        self.verify = [col for col in key_columns(self.on) if col != key]
+        self.suffix = suffix
+        self.df = df.reset_index(drop=True)
+        null_mask = self.df[key].isna().to_numpy()
+        self.null_positions = np.flatnonzero(null_mask)
+        self.key_positions = np.flatnonzero(~null_mask)
+        # Built once; Index keeps its hash table cached across probes
+        self.index = pd.Index(self.df[key].iloc[self.key_positions])
+        self.unique = self.index.is_unique
+        self.matched = np.zeros(len(self.df), dtype=bool)
+
+    def _merge(self, stream: pd.DataFrame, table: pd.DataFrame, how: str, table_is_left: bool) -> pd.DataFrame:
+        """Join with DataFrame.merge, keeping the column layout of the in-memory join"""
+        if table_is_left:
+            return table.merge(stream, on=self.on, how=how, suffixes=('', self.suffix))
+        return stream.merge(table, on=self.on, how=how, suffixes=('', self.suffix))
+
+    def _same_keys(self, table_positions: np.ndarray, batch: pd.DataFrame) -> np.ndarray:
+        """Whether each batch row has the same composite key as its table row"""
+        same = np.ones(len(batch), dtype=bool)
+        for col in self.verify:
+            table_values = self.df[col].iloc[table_positions].reset_index(drop=True)
+            batch_values = batch[col].reset_index(drop=True)
+            same &= ((table_values == batch_values) | (table_values.isna() & batch_values.isna())).to_numpy()
+        return same
+
+    def probe(self, batch: pd.DataFrame, keep_unmatched: bool, table_is_left: bool) -> pd.DataFrame:
+        """
+        Join one batch of the streamed input against the table
+
+        Args:
+            batch: Batch of the streamed input
+            keep_unmatched: Keep streamed rows without a match
+            table_is_left: Whether this table is the left side of the join
+
+        Returns:
+            Joined rows for the batch
+        """
+        key = self.key
+        batch = batch.reset_index(drop=True)
+        null_mask = batch[key].isna().to_numpy()
+        stream_how = 'right' if table_is_left else 'left'
+        how = stream_how if keep_unmatched else 'inner'
+
+        # Missing keys match each other, as in DataFrame.merge
+        parts = []
+        if null_mask.any():
+            null_table = self.df.iloc[self.null_positions]
+            if len(null_table):
+                self.matched[self.null_positions] = True
+            parts.append(self._merge(batch[null_mask], null_table, how, table_is_left))
+            batch = batch[~null_mask].reset_index(drop=True)
+
+        if not self.unique:
+            if self.verify:
+                table_keys = self.df[key_columns(self.on)].iloc[self.key_positions]
+                marks = table_keys.merge(
+                    batch[key_columns(self.on)].drop_duplicates(), how='left', indicator=True
+                )['_merge']
+                hits = (marks == 'both').to_numpy()
+            else:
+                hits = self.index.isin(batch[key])
+            self.matched[self.key_positions[hits]] = True
+            table = self.df.iloc[self.key_positions]
+            result = self._merge(batch, table, how, table_is_left)
+            return pd.concat([result] + parts, ignore_index=True) if parts else result
+
+        indexer = self.index.get_indexer(batch[key])
+        hit = indexer >= 0
+        if self.verify and hit.any():
+            # Equal hashes of different composite keys are not matches
+            hit_rows = np.flatnonzero(hit)
+            same = self._same_keys(self.key_positions[indexer[hit]], batch.iloc[hit_rows])
+            indexer[hit_rows[~same]] = -1
+            hit = indexer >= 0
+        self.matched[self.key_positions[indexer[hit]]] = True
+        if not keep_unmatched:
+            batch = batch[hit].reset_index(drop=True)
+            indexer = indexer[hit]
+        # Missing positions become NaN rows, matching merge's dtype promotion
+        positions = np.where(indexer >= 0, self.key_positions[indexer], -1)
+        table_rows = self.df.reindex(positions).reset_index(drop=True)
+
+        on_columns = key_columns(self.on)
+        if table_is_left:
+            left, right = table_rows, batch
+            for col in on_columns:
+                left[col] = batch[col].to_numpy()
+        else:
+            left, right = batch, table_rows
+        right = right.drop(columns=on_columns)
+        right = right.rename(columns={
+            col: f"{col}{self.suffix}" for col in right.columns if col in left.columns
+        })
+        result = pd.concat([left, right], axis=1)
+        return pd.concat([result] + parts, ignore_index=True) if parts else result
+
+    def unmatched(self, stream_template: pd.DataFrame, table_is_left: bool) -> pd.DataFrame:
+        """
+        Get table rows that never matched, joined against no streamed rows
+
+        Args:
+            stream_template: Empty DataFrame with the streamed input's columns
+            table_is_left: Whether this table is the left side of the join
+
+        Returns:
+            Unmatched table rows in the output column layout
+        """
+        rows = self.df[~self.matched]
+        how = 'left' if table_is_left else 'right'
+        return self._merge(stream_template, rows, how, table_is_left)
+
+
+def broadcast_join(
+    sources: List[BatchSource],
+    key: JoinKey,
+    how: str = 'inner',
+    memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB,
+    spill_dir: Optional[str] = SPILL_DIRECTORY
+) -> Iterator[pd.DataFrame]:
+    """
+    Join a large input against small inputs that fit in memory
+
+    The largest input (by estimated size) is streamed in batches; every other
+    input is loaded once into a lookup table. Peak memory is roughly the lookup
+    tables plus one batch. With more than two inputs this needs the first input
+    to be the large one and an inner or left join; when the small inputs do not
+    fit the budget, or the layout is unsupported, the Grace hash join is used.
+
+    Args:
+        sources: Input batch sources (at least 2), first is the left table
+        key: Join column name, or list of names for a composite key
+        how: Join type ('inner', 'outer', 'left', 'right')
+        memory_budget_mb: Memory budget in MB
+        spill_dir: Directory for temporary spill files (only used by the fallback)
+
+    Yields:
+        Joined DataFrame blocks in streamed-input order
+    """
+    if len(sources) < 2:
+        raise ValueError("At least 2 inputs required for join")
+
+    budget_bytes = memory_budget_mb * 1024 * 1024
+    stream_idx = max(range(len(sources)), key=lambda i: sources[i].estimated_bytes)
+    small_bytes = sum(
+        source.estimated_bytes for i, source in enumerate(sources) if i != stream_idx
+    ) * SORT_OVERHEAD_FACTOR
+
+    supported = len(sources) == 2 or (stream_idx == 0 and how in ('inner', 'left'))
+    if small_bytes > budget_bytes or not supported:
+        yield from hash_join(sources, key, how, memory_budget_mb, spill_dir)
+        return
+
+    yield from _drop_key_hash(_broadcast(sources, stream_idx, key, how, memory_budget_mb, small_bytes))
+
+
+def _broadcast(
+    sources: List[BatchSource],
+    stream_idx: int,
+    key: JoinKey,
+    how: str,
+    memory_budget_mb: float,
+    small_bytes: float
+) -> Iterator[pd.DataFrame]:
+    """Stream one input past lookup tables built from the others (see broadcast_join)"""
+    sources, key, on = _resolve_key(sources, key)
+
+    def load(source: BatchSource) -> pd.DataFrame:
+        rows = source.batch_rows(memory_budget_mb)
+        return pd.concat(list(source.open_batches(rows)), ignore_index=True)
+
+    stream_source = sources[stream_idx]
+    stream_budget = max(memory_budget_mb - small_bytes / (1024 * 1024), memory_budget_mb / 4)
+    batches = stream_source.open_batches(stream_source.batch_rows(stream_budget))
+
+    if stream_idx == 0:
+        tables = [_LookupTable(load(source), key, f'_{source.label}', on) for source in sources[1:]]
+        keep_unmatched = how in ('left', 'outer')
+        template = None
+        for batch in batches:
+            if template is None:
+                template = batch.iloc[0:0]
+            for table in tables:
+                batch = table.probe(batch, keep_unmatched, table_is_left=False)
+            yield batch
+        if how in ('right', 'outer'):
+            yield tables[0].unmatched(template, table_is_left=False)
+    else:
+        table = _LookupTable(load(sources[0]), key, f'_{stream_source.label}', on)
+        keep_unmatched = how in ('right', 'outer')
+        template = None
+        for batch in batches:
+            if template is None:
+                template = batch.iloc[0:0]
+            yield table.probe(batch, keep_unmatched, table_is_left=True)
+        if how in ('left', 'outer'):
+            yield table.unmatched(template, table_is_left=True)
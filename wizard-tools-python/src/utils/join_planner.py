@@ -0,0 +1,290 @@
+"""
+Cost-based planning for multi-way joins in Wizard Tools application
+Picks a join order from cheap statistics and runs independent joins in parallel
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Union
+import sys
+
+import pandas as pd
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.key_encoding import KeyEncoder, KEY_CODE_COLUMN
+
+
+class InputStats:
+    """Cheap statistics about one join input"""
+
+    def __init__(self, label: str, rows: int, key_ndv: int):
+        """
+        Initialize input statistics
+
+        Args:
+            label: Display name of the input
+            rows: Estimated number of rows
+            key_ndv: Estimated number of distinct join keys
+        """
+        self.label = label
+        self.rows = max(int(rows), 0)
+        self.key_ndv = min(max(int(key_ndv), 1), max(self.rows, 1))
+
+
+def estimate_distinct(sample_keys: Union[pd.Series, pd.DataFrame], total_rows: int) -> int:
+    """
+    Estimate the number of distinct keys in a file from a sample of it
+
+    Uses the Guaranteed-Error Estimator: values seen once in the sample are
+    scaled up by sqrt(N / n), values seen more often are counted once.
+
+    Args:
+        sample_keys: Key values from the sample (a DataFrame for composite keys)
+        total_rows: Estimated number of rows in the whole file
+
+    Returns:
+        Estimated distinct key count
+    """
+    n = len(sample_keys)
+    if n == 0:
+        return 0
+    frequencies = sample_keys.value_counts(dropna=False)
+    if n >= total_rows:
+        return len(frequencies)
+    singletons = int((frequencies == 1).sum())
+    repeated = len(frequencies) - singletons
+    estimate = (total_rows / n) ** 0.5 * singletons + repeated
+    return int(min(estimate, total_rows))
+
+
+class JoinPlan:
+    """A node of a join plan: either a scan of one input or a join of two plans"""
+
+    def __init__(
+        self,
+        rows: float,
+        key_ndv: float,
+        input_index: Optional[int] = None,
+        left: Optional['JoinPlan'] = None,
+        right: Optional['JoinPlan'] = None,
+        label: str = ""
+    ):
+        self.rows = rows
+        self.key_ndv = key_ndv
+        self.input_index = input_index
+        self.left = left
+        self.right = right
+        self.label = label
+        self.actual_rows: Optional[int] = None
+
+    @property
+    def is_scan(self) -> bool:
+        """Whether this node reads an input"""
+        return self.input_index is not None
+
+    def nodes(self) -> List['JoinPlan']:
+        """Get all nodes of the plan, children before parents"""
+        if self.is_scan:
+            return [self]
+        return self.left.nodes() + self.right.nodes() + [self]
+
+
+def _estimate_join(left: JoinPlan, right: JoinPlan, how: str) -> JoinPlan:
+    """Estimate the size of a join under the usual uniformity and containment assumptions"""
+    matched = left.rows * right.rows / max(left.key_ndv, right.key_ndv, 1)
+    common_keys = min(left.key_ndv, right.key_ndv)
+
+    if how == 'inner':
+        rows, ndv = matched, common_keys
+    elif how == 'left':
+        unmatched = left.rows * (1 - common_keys / max(left.key_ndv, 1))
+        rows, ndv = matched + unmatched, left.key_ndv
+    elif how == 'right':
+        unmatched = right.rows * (1 - common_keys / max(right.key_ndv, 1))
+        rows, ndv = matched + unmatched, right.key_ndv
+    else:
+        unmatched_left = left.rows * (1 - common_keys / max(left.key_ndv, 1))
+        unmatched_right = right.rows * (1 - common_keys / max(right.key_ndv, 1))
+        rows, ndv = matched + unmatched_left + unmatched_right, max(left.key_ndv, right.key_ndv)
+
+    return JoinPlan(rows, ndv, left=left, right=right, label=how.upper() + " JOIN")
+
+
+def plan_join(stats: List[InputStats], how: str = 'inner') -> JoinPlan:
+    """
+    Pick a join order for several inputs joined on the same key
+
+    Inner and outer joins on one key are associative and commutative, so the
+    cheapest pair is joined first (greedy operator ordering), giving a bushy
+    plan whose independent branches can run in parallel. Left joins keep the
+    first input as the left table and only reorder the tables joined to it.
+    Right joins keep the selection order.
+
+    Args:
+        stats: Statistics for each input, in selection order
+        how: Join type ('inner', 'outer', 'left', 'right')
+
+    Returns:
+        Root of the join plan
+    """
+    scans = [
+        JoinPlan(s.rows, s.key_ndv, input_index=i, label=f"SCAN {s.label}")
+        for i, s in enumerate(stats)
+    ]
+
+    if how in ('inner', 'outer'):
+        nodes = list(scans)
+        while len(nodes) > 1:
+            best = None
+            for i in range(len(nodes)):
+                for j in range(i + 1, len(nodes)):
+                    candidate = _estimate_join(nodes[i], nodes[j], how)
+                    if best is None or candidate.rows < best[0].rows:
+                        best = (candidate, i, j)
+            candidate, i, j = best
+            nodes = [n for k, n in enumerate(nodes) if k not in (i, j)] + [candidate]
+        return nodes[0]
+
+    plan = scans[0]
+    rest = scans[1:]
+    if how == 'left':
+        # Tables that multiply the left side least go first
+        rest = sorted(rest, key=lambda scan: _estimate_join(plan, scan, how).rows)
+    for scan in rest:
+        plan = _estimate_join(plan, scan, how)
+    return plan
+
+
+def _key_list(key: Union[str, List[str]]) -> List[str]:
+    """Normalize a join key to a list of column names"""
+    return [key] if isinstance(key, str) else list(key)
+
+
+def output_columns(column_lists: List[List[str]], key: Union[str, List[str]], labels: List[str]):
+    """
+    Work out the column names a join in selection order would produce
+
+    Mirrors DataFrame.merge with suffixes ('', '_<label>'): overlapping columns
+    keep their name in the left table and get the suffix in the right one.
+
+    Args:
+        column_lists: Columns of each input, in selection order
+        key: Join column name, or list of names for a composite key
+        labels: Display name of each input
+
+    Returns:
+        Tuple of (rename mapping per input, final column order)
+    """
+    keys = _key_list(key)
+    result_columns = list(column_lists[0])
+    renames = [{col: col for col in column_lists[0]}]
+    for columns, label in zip(column_lists[1:], labels[1:]):
+        existing = set(result_columns)
+        rename = {
+            col: (f"{col}_{label}" if col in existing and col not in keys else col)
+            for col in columns
+        }
+        renames.append(rename)
+        result_columns += [rename[col] for col in columns if col not in keys]
+    return renames, result_columns
+
+
+def execute_plan(
+    plan: JoinPlan,
+    load_input: Callable[[int], pd.DataFrame],
+    key: Union[str, List[str]],
+    how: str,
+    labels: List[str],
+    workers: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Execute a join plan in memory
+
+    Inputs are renamed up front to the names a selection-order join would give
+    them, so any join order yields the same columns. Text keys are encoded
+    once into integer codes shared by all inputs, merged on, and decoded in
+    the result. Nodes whose children are ready run concurrently in a thread
+    pool, wave by wave.
+
+    Args:
+        plan: Root of the join plan
+        load_input: Callable reading input i into a DataFrame
+        key: Join column name, or list of names for a composite key
+        how: Join type ('inner', 'outer', 'left', 'right')
+        labels: Display name of each input
+        workers: Number of worker threads (None = default)
+
+    Returns:
+        Joined DataFrame with the column layout of a selection-order join
+    """
+    results: Dict[int, pd.DataFrame] = {}
+    nodes = plan.nodes()
+    scans = sorted((n for n in nodes if n.is_scan), key=lambda n: n.input_index)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        frames = list(pool.map(lambda n: load_input(n.input_index), scans))
+        renames, final_columns = output_columns(
+            [list(frame.columns) for frame in frames], key, labels
+        )
+        frames = [frame.rename(columns=renames[scan.input_index]) for scan, frame in zip(scans, frames)]
+
+        encoder = None
+        on = key
+        if KeyEncoder.applies(frames, key):
+            encoder = KeyEncoder(frames, key, sort=how == 'outer')
+            frames = [encoder.encode(frame, i) for i, frame in enumerate(frames)]
+            on = KEY_CODE_COLUMN
+
+        for scan, frame in zip(scans, frames):
+            results[id(scan)] = frame
+            scan.actual_rows = len(frame)
+        del frames
+
+        pending = [n for n in nodes if not n.is_scan]
+        while pending:
+            ready = [n for n in pending if id(n.left) in results and id(n.right) in results]
+
+            def run(node: JoinPlan) -> pd.DataFrame:
+                return results[id(node.left)].merge(results[id(node.right)], on=on, how=how)
+
+            for node, frame in zip(ready, pool.map(run, ready)):
+                results[id(node)] = frame
+                node.actual_rows = len(frame)
+                # Children are no longer needed
+                results.pop(id(node.left), None)
+                results.pop(id(node.right), None)
+            pending = [n for n in pending if n not in ready]
+
+    if encoder is not None:
+        return encoder.decode(results[id(plan)], final_columns)
+    return results[id(plan)][final_columns]
+
+
+def explain(plan: JoinPlan, key: Union[str, List[str]]) -> str:
+    """
+    Format a join plan as an indented tree with estimated and actual row counts
+
+    Args:
+        plan: Root of the join plan
+        key: Join column name, or list of names for a composite key
+
+    Returns:
+        Plan description
+    """
+    lines = [f"Join plan on {', '.join(repr(col) for col in _key_list(key))}:"]
+
+    def describe(node: JoinPlan, depth: int) -> None:
+        actual = f"{node.actual_rows:,}" if node.actual_rows is not None else "?"
+        lines.append(
+            f"{'   ' * depth}-> {node.label}  "
+            f"(est. rows={int(node.rows):,}, key ndv={int(node.key_ndv):,}, actual rows={actual})"
+        )
+        if not node.is_scan:
+            describe(node.left, depth + 1)
+            describe(node.right, depth + 1)
+
+    describe(plan, 0)
+    return "\n".join(lines)
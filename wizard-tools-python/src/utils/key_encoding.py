@@ -0,0 +1,158 @@
+"""
+Dictionary encoding of join keys for Wizard Tools application
+Replaces string join keys with integer codes shared by all inputs of a join
+"""
+from pathlib import Path
+from typing import List
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.join_engine import JoinKey, key_columns
+
+# Column holding the encoded key while inputs are merged
+KEY_CODE_COLUMN = '__wizard_key_code__'
+# Keep intermediate composite codes well inside int64
+MAX_CODE = 2 ** 62
+
+
+def _is_text(series: pd.Series) -> bool:
+    """Whether a column holds text (object, string or categorical values)"""
+    return (
+        pd.api.types.is_object_dtype(series)
+        or pd.api.types.is_string_dtype(series)
+        or isinstance(series.dtype, pd.CategoricalDtype)
+    )
+
+
+def _factorize(values: pd.Series, sort: bool):
+    """Factorize values, with codes in sorted key order if asked and the values are comparable"""
+    if sort:
+        try:
+            return pd.factorize(values, sort=True)
+        except TypeError:
+            pass
+    return pd.factorize(values)
+
+
+class KeyEncoder:
+    """Shared integer code space for the join keys of several inputs"""
+
+    @staticmethod
+    def applies(frames: List[pd.DataFrame], key: JoinKey) -> bool:
+        """
+        Check whether encoding the keys of these inputs pays off and is safe
+
+        DataFrame.merge already factorizes a single key column of two inputs
+        into shared codes, so encoding only pays off when the codes are reused
+        by several merges (more than two inputs) or replace several columns
+        (composite keys). Keys are then encoded when at least one key column
+        holds text and every key column has the same kind (text or not) in all
+        inputs; mismatched kinds are left to DataFrame.merge, which reports them.
+
+        Args:
+            frames: Input DataFrames
+            key: Join column name, or list of names for a composite key
+
+        Returns:
+            True if the keys should be encoded
+        """
+        columns = key_columns(key)
+        if len(frames) < 3 and len(columns) < 2:
+            return False
+
+        any_text = False
+        for column in columns:
+            kinds = {_is_text(frame[column]) for frame in frames}
+            if len(kinds) > 1:
+                return False
+            any_text = any_text or kinds.pop()
+        return any_text
+
+    def __init__(self, frames: List[pd.DataFrame], key: JoinKey, sort: bool = False):
+        """
+        Factorize the key columns of all inputs into one code space
+
+        Equal keys get equal codes in every input, and missing keys get a code
+        of their own, so merging on codes matches exactly the rows a merge on
+        the original columns would.
+
+        Args:
+            frames: Input DataFrames
+            key: Join column name, or list of names for a composite key
+            sort: Give codes in key order, so joins that sort their keys (outer
+                joins) produce rows in the same order as on the original columns
+        """
+        self.columns = key_columns(key)
+        self.offsets = np.cumsum([0] + [len(frame) for frame in frames])
+
+        values = {}
+        combined = None
+        cardinality = 1
+        for column in self.columns:
+            values[column] = pd.concat([frame[column] for frame in frames], ignore_index=True)
+            codes, uniques = _factorize(values[column], sort)
+            # Missing values (-1) sort after every key, as in DataFrame.merge
+            codes[codes < 0] = len(uniques)
+            radix = len(uniques) + 1
+            if combined is None:
+                combined = codes.astype(np.int64)
+            else:
+                if cardinality * radix > MAX_CODE:
+                    combined, combined_uniques = pd.factorize(combined, sort=sort)
+                    cardinality = len(combined_uniques)
+                combined = combined * radix + codes
+            cardinality *= radix
+
+        # Compact codes (a single column's codes already are)
+        if len(self.columns) > 1:
+            combined, _ = pd.factorize(combined, sort=sort)
+        self.codes = combined
+
+        # Key values of each code, taken from the first row that has it
+        first_rows = np.zeros(int(combined.max()) + 1 if len(combined) else 0, dtype=np.int64)
+        first_rows[combined[::-1]] = np.arange(len(combined) - 1, -1, -1)
+        self.dictionary = pd.DataFrame({
+            column: values[column].take(first_rows).reset_index(drop=True)
+            for column in self.columns
+        })
+
+    def encode(self, frame: pd.DataFrame, i: int) -> pd.DataFrame:
+        """
+        Replace the key columns of an input with the code column
+
+        Args:
+            frame: Input DataFrame, as passed to the constructor
+            i: Position of the input
+
+        Returns:
+            DataFrame with KEY_CODE_COLUMN instead of the key columns
+        """
+        frame = frame.drop(columns=self.columns)
+        frame[KEY_CODE_COLUMN] = self.codes[self.offsets[i]:self.offsets[i + 1]]
+        return frame
+
+    def decode(self, df: pd.DataFrame, columns: List[str]) -> pd.DataFrame:
+        """
+        Restore the original key columns of a merged result
+
+        Args:
+            df: Merged DataFrame holding KEY_CODE_COLUMN
+            columns: Final column order, including the key columns
+
+        Returns:
+            DataFrame with the original key values and the given column order
+        """
+        codes = df[KEY_CODE_COLUMN].to_numpy()
+        restored = df.drop(columns=[KEY_CODE_COLUMN])
+        for column in self.columns:
+            keys = self.dictionary[column].take(codes)
+            keys.index = restored.index
+            restored[column] = keys
+        return restored[columns]
@@ -0,0 +1,292 @@
+"""
+Persistent join-key indexes for Wizard Tools application
+Maps key values of a CSV file to its rows so matching rows can be fetched without reparsing
+"""
+import hashlib
+import io
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Union
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import INDEX_DIRECTORY, NA_VALUES
+from utils.join_engine import hash_keys, key_columns, normalize_key
+
+INDEX_FORMAT_VERSION = 1
+# Bytes scanned at a time when locating record boundaries
+SCAN_BLOCK_BYTES = 64 * 1024 * 1024
+
+
+def _index_stem(file_path: str, column: Union[str, List[str]], index_dir: Optional[str]) -> str:
+    """Base path of the index files for a file and key column(s)"""
+    index_dir = index_dir or INDEX_DIRECTORY
+    identity = "\0".join([os.path.abspath(file_path)] + key_columns(column)).encode('utf-8')
+    return os.path.join(index_dir, hashlib.sha1(identity).hexdigest())
+
+
+def _file_signature(file_path: str) -> Dict[str, int]:
+    """Size and modification time used to detect changed files"""
+    stat = os.stat(file_path)
+    return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+
+def _record_starts(file_path: str, raw_path: str) -> int:
+    """
+    Write the byte offset of every line start to raw_path as int64
+
+    Returns:
+        Number of lines (including the header)
+    """
+    size = os.path.getsize(file_path)
+    count = 0
+    with open(file_path, 'rb') as f, open(raw_path, 'wb') as out:
+        if size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            np.array([0], dtype=np.int64).tofile(out)
+            count = 1
+            for start in range(0, size, SCAN_BLOCK_BYTES):
+                block = np.frombuffer(mm, dtype=np.uint8, count=min(SCAN_BLOCK_BYTES, size - start), offset=start)
+                starts = np.flatnonzero(block == 10).astype(np.int64) + start + 1
+                del block
+                starts = starts[starts < size]
+                starts.tofile(out)
+                count += len(starts)
+    return count
+
+
+class KeyIndex:
+    """On-disk index from join-key hashes to row numbers and byte offsets of a CSV file"""
+
+    def __init__(self, file_path: str, column: Union[str, List[str]], stem: str, meta: Dict):
+        """
+        Open an index from its files (use KeyIndex.open or KeyIndex.build)
+
+        Args:
+            file_path: Path to the indexed CSV file
+            column: Indexed column name, or list of names for a composite key
+            stem: Base path of the index files
+            meta: Index metadata
+        """
+        self.file_path = file_path
+        self.column = normalize_key(column)
+        self.meta = meta
+        self.rows = meta['rows']
+        self.dtypes = meta['dtypes']
+        self.hashes = np.memmap(stem + '.hashes', dtype=np.uint64, mode='r') if self.rows else np.empty(0, np.uint64)
+        self.row_ids = np.memmap(stem + '.rows', dtype=np.int64, mode='r') if self.rows else np.empty(0, np.int64)
+        # Line starts: header, each record, and the file size as a sentinel
+        self.starts = np.memmap(stem + '.starts', dtype=np.int64, mode='r')
+
+    @staticmethod
+    def build(
+        file_path: str,
+        column: Union[str, List[str]],
+        key_batches: Iterable[pd.DataFrame],
+        index_dir: Optional[str] = None
+    ) -> 'KeyIndex':
+        """
+        Build and persist an index for the key column(s) of a CSV file
+
+        Args:
+            file_path: Path to the CSV file
+            column: Column to index, or list of columns for a composite key
+            key_batches: Batches of the file in order; only the indexed columns are used,
+                but column dtypes are recorded from every column present
+            index_dir: Directory holding index files (None for INDEX_DIRECTORY)
+
+        Returns:
+            The new KeyIndex
+
+        Raises:
+            ValueError: If records span several lines, so rows cannot be fetched by offset
+        """
+        column = normalize_key(column)
+        stem = _index_stem(file_path, column, index_dir)
+        os.makedirs(os.path.dirname(stem), exist_ok=True)
+        signature = _file_signature(file_path)
+
+        hash_parts = []
+        dtypes: Dict[str, str] = {}
+        rows = 0
+        for batch in key_batches:
+            hash_parts.append(hash_keys(batch[column]))
+            rows += len(batch)
+            for name, dtype in batch.dtypes.items():
+                kind = dtype.kind if isinstance(dtype, np.dtype) else 'O'
+                current = 'float64' if kind == 'f' else 'int64' if kind in 'iu' else 'bool' if kind == 'b' else 'str'
+                previous = dtypes.get(name, current)
+                if previous != current:
+                    # int and float mix to float, anything else to text
+                    current = 'float64' if {previous, current} == {'int64', 'float64'} else 'str'
+                dtypes[name] = current
+
+        line_count = _record_starts(file_path, stem + '.starts')
+        if line_count - 1 != rows:
+            for suffix in ('.starts',):
+                os.remove(stem + suffix)
+            raise ValueError(
+                "Cannot index this file: some records span several lines or blank lines are present"
+            )
+        with open(stem + '.starts', 'ab') as out:
+            np.array([signature['size']], dtype=np.int64).tofile(out)
+
+        hashes = np.concatenate(hash_parts) if hash_parts else np.empty(0, dtype=np.uint64)
+        order = np.argsort(hashes, kind='stable')
+        hashes[order].tofile(stem + '.hashes')
+        order.astype(np.int64).tofile(stem + '.rows')
+
+        meta = {
+            'version': INDEX_FORMAT_VERSION,
+            'file': os.path.abspath(file_path),
+            'column': key_columns(column),
+            'rows': rows,
+            'dtypes': dtypes,
+            **signature
+        }
+        with open(stem + '.json', 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+
+        return KeyIndex(file_path, column, stem, meta)
+
+    @staticmethod
+    def open(file_path: str, column: Union[str, List[str]], index_dir: Optional[str] = None) -> Optional['KeyIndex']:
+        """
+        Open a persisted index if it exists and the file has not changed
+
+        Args:
+            file_path: Path to the CSV file
+            column: Indexed column name, or list of names for a composite key
+            index_dir: Directory holding index files (None for INDEX_DIRECTORY)
+
+        Returns:
+            KeyIndex, or None if there is no valid index
+        """
+        stem = _index_stem(file_path, column, index_dir)
+        try:
+            with open(stem + '.json', encoding='utf-8') as f:
+                meta = json.load(f)
+            signature = _file_signature(file_path)
+        except (OSError, ValueError):
+            return None
+
+        if meta.get('version') != INDEX_FORMAT_VERSION or any(meta.get(k) != v for k, v in signature.items()):
+            KeyIndex.remove(file_path, column, index_dir)
+            return None
+        return KeyIndex(file_path, column, stem, meta)
+
+    @staticmethod
+    def remove(file_path: str, column: Union[str, List[str]], index_dir: Optional[str] = None) -> None:
+        """
+        Delete the persisted index for a file and column, if any
+
+        Args:
+            file_path: Path to the CSV file
+            column: Indexed column name, or list of names for a composite key
+            index_dir: Directory holding index files (None for INDEX_DIRECTORY)
+        """
+        stem = _index_stem(file_path, column, index_dir)
+        for suffix in ('.json', '.hashes', '.rows', '.starts'):
+            try:
+                os.remove(stem + suffix)
+            except OSError:
+                pass
+
+    def lookup(self, keys: Union[pd.Series, pd.DataFrame]) -> np.ndarray:
+        """
+        Find the rows whose key may equal one of the given keys
+
+        Args:
+            keys: Key values to look up (a DataFrame for composite keys)
+
+        Returns:
+            Sorted array of row numbers (0-based, excluding the header)
+        """
+        if self.rows == 0 or len(keys) == 0:
+            return np.empty(0, dtype=np.int64)
+        probe = np.unique(hash_keys(keys.drop_duplicates()))
+        lo = np.searchsorted(self.hashes, probe, side='left')
+        hi = np.searchsorted(self.hashes, probe, side='right')
+        hit = hi > lo
+        if not hit.any():
+            return np.empty(0, dtype=np.int64)
+        lo, hi = lo[hit], hi[hit]
+        # Expand each [lo, hi) range of the sorted hashes into positions
+        lengths = hi - lo
+        positions = np.repeat(lo - np.cumsum(np.r_[0, lengths[:-1]]), lengths) + np.arange(lengths.sum())
+        return np.sort(self.row_ids[positions])
+
+    def fetch(self, rows: np.ndarray, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Read only the given rows of the file
+
+        Args:
+            rows: Sorted row numbers
+            columns: Only read these columns (None for all)
+
+        Returns:
+            DataFrame with those rows, in file order, typed like the whole file
+        """
+        dtypes = {
+            name: (str if dtype == 'str' else dtype)
+            for name, dtype in self.dtypes.items()
+            if columns is None or name in columns
+        }
+        with open(self.file_path, 'rb') as f:
+            header = f.read(int(self.starts[1]) if len(self.starts) > 2 else int(self.starts[-1]))
+            if not header.endswith(b'\n'):
+                header += b'\n'
+            parts = [header]
+            if len(rows):
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    # Copy runs of consecutive rows as single slices
+                    breaks = np.flatnonzero(np.diff(rows) != 1) + 1
+                    for run in np.split(rows, breaks):
+                        chunk = mm[int(self.starts[run[0] + 1]):int(self.starts[run[-1] + 2])]
+                        if not chunk.endswith(b'\n'):
+                            chunk += b'\n'
+                        parts.append(chunk)
+
+        return pd.read_csv(
+            io.BytesIO(b''.join(parts)),
+            na_values=NA_VALUES,
+            keep_default_na=False,
+            dtype=dtypes,
+            usecols=columns
+        )
+
+    def fetch_matching(
+        self,
+        keys: Union[pd.Series, pd.DataFrame],
+        columns: Optional[List[str]] = None
+    ) -> pd.DataFrame:
+        """
+        Read the rows whose key equals one of the given keys
+
+        Composite keys are matched on their hash, so a rare collision can let
+        an extra row through; joins on the real columns drop it.
+
+        Args:
+            keys: Key values to look up (a DataFrame for composite keys)
+            columns: Only read these columns, which must include the key (None for all)
+
+        Returns:
+            Matching rows in file order
+        """
+        df = self.fetch(self.lookup(keys), columns)
+        if isinstance(keys, pd.DataFrame):
+            match = np.isin(hash_keys(df[self.column]), hash_keys(keys))
+        else:
+            # Guard against 64-bit hash collisions
+            match = df[self.column].isin(keys)
+        return df[match].reset_index(drop=True)
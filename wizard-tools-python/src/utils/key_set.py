@@ -0,0 +1,220 @@
+"""
+Join key sets for Wizard Tools application
+Membership tests against the keys of a filter input, kept in memory or spilled to disk
+"""
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import JOIN_MEMORY_BUDGET_MB, SPILL_DIRECTORY
+from utils.join_engine import JoinKey, hash_keys, key_columns
+
+# Hashes merged per run while combining spilled runs
+MERGE_BLOCK_HASHES = 1 << 20
+HASH_BYTES = 8
+# Column marking matched rows while probing composite keys
+_HIT_COLUMN = '__wizard_key_hit__'
+
+
+def _merge_runs(run_paths: List[str], out_path: str) -> int:
+    """
+    Merge sorted runs of unique hashes into one sorted file without duplicates
+
+    Returns:
+        Number of hashes written
+    """
+    runs = [np.memmap(path, dtype=np.uint64, mode='r') for path in run_paths]
+    positions = [0] * len(runs)
+    written = 0
+    last = None
+    with open(out_path, 'wb') as out:
+        while True:
+            blocks = [
+                run[pos:pos + MERGE_BLOCK_HASHES]
+                for run, pos in zip(runs, positions)
+                if pos < len(run)
+            ]
+            if not blocks:
+                break
+            # Everything up to the smallest block end is complete in every run
+            bound = min(block[-1] for block in blocks)
+            parts = []
+            for i, run in enumerate(runs):
+                if positions[i] >= len(run):
+                    continue
+                block = run[positions[i]:positions[i] + MERGE_BLOCK_HASHES]
+                cut = int(np.searchsorted(block, bound, side='right'))
+                parts.append(np.asarray(block[:cut]))
+                positions[i] += cut
+            merged = np.unique(np.concatenate(parts))
+            if last is not None and len(merged) and merged[0] == last:
+                merged = merged[1:]
+            if len(merged):
+                merged.tofile(out)
+                written += len(merged)
+                last = merged[-1]
+    del runs
+    return written
+
+
+class KeySet:
+    """Set of join keys from one input, for semi and anti joins"""
+
+    def __init__(
+        self,
+        key: JoinKey,
+        memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB,
+        spill_dir: Optional[str] = SPILL_DIRECTORY
+    ):
+        """
+        Initialize an empty key set
+
+        Distinct key values are kept in memory and probed exactly. When they
+        outgrow the memory budget the set switches to 64-bit key hashes, and
+        sorted runs of hashes are spilled to disk when even those do not fit;
+        the finished set is then memory-mapped. Hash membership can report a
+        false match only for two different keys with the same 64-bit hash.
+
+        Args:
+            key: Join column name, or list of names for a composite key
+            memory_budget_mb: Memory budget in MB
+            spill_dir: Directory for spilled hash runs (None = system temp)
+        """
+        self.columns = key_columns(key)
+        self.budget_bytes = memory_budget_mb * 1024 * 1024
+        self.spill_dir = spill_dir
+        self.workdir = None
+
+        self.parts: List[pd.DataFrame] = []  # distinct keys per batch (exact mode)
+        self.part_bytes = 0
+        self.hash_parts: List[np.ndarray] = []  # distinct hashes per batch (hash mode)
+        self.hash_count = 0
+        self.run_paths: List[str] = []
+
+        self.keys: Optional[pd.DataFrame] = None
+        self.index: Optional[pd.Index] = None
+        self.hashes: Optional[np.ndarray] = None
+
+    @property
+    def exact(self) -> bool:
+        """Whether keys are compared by value rather than by hash"""
+        return self.hashes is None and not self.hash_parts and not self.run_paths
+
+    def _key_values(self, df: pd.DataFrame):
+        """Key column, or key columns for composite keys"""
+        return df[self.columns[0]] if len(self.columns) == 1 else df[self.columns]
+
+    def _add_hashes(self, keys: pd.DataFrame) -> None:
+        """Add keys in hash mode, spilling a sorted run when over budget"""
+        if len(keys) == 0:
+            return
+        hashes = np.unique(hash_keys(self._key_values(keys)))
+        self.hash_parts.append(hashes)
+        self.hash_count += len(hashes)
+        if self.hash_count * HASH_BYTES > self.budget_bytes:
+            self._spill_run()
+
+    def _spill_run(self) -> None:
+        """Write the in-memory hashes as one sorted run"""
+        if self.workdir is None:
+            self.workdir = tempfile.mkdtemp(prefix="wizard_keys_", dir=self.spill_dir)
+        run_path = os.path.join(self.workdir, f"run_{len(self.run_paths)}.bin")
+        np.unique(np.concatenate(self.hash_parts)).tofile(run_path)
+        self.run_paths.append(run_path)
+        self.hash_parts = []
+        self.hash_count = 0
+
+    def add(self, batch: pd.DataFrame) -> None:
+        """
+        Add the keys of a batch of the filter input
+
+        Args:
+            batch: DataFrame holding the key columns
+        """
+        keys = batch[self.columns].drop_duplicates()
+        if not self.exact:
+            self._add_hashes(keys)
+            return
+
+        self.parts.append(keys)
+        self.part_bytes += int(keys.memory_usage(index=False, deep=True).sum())
+        if self.part_bytes > self.budget_bytes:
+            # Too many distinct keys to keep by value
+            parts, self.parts = self.parts, []
+            for part in parts:
+                self._add_hashes(part)
+
+    def finish(self) -> 'KeySet':
+        """
+        Prepare the set for probing once every key has been added
+
+        Returns:
+            The key set itself
+        """
+        if self.exact:
+            keys = pd.concat(self.parts, ignore_index=True) if self.parts else pd.DataFrame(columns=self.columns)
+            self.keys = keys.drop_duplicates(ignore_index=True)
+            if len(self.columns) == 1:
+                self.index = pd.Index(self.keys[self.columns[0]])
+            self.parts = []
+        elif self.run_paths:
+            if self.hash_parts:
+                self._spill_run()
+            out_path = os.path.join(self.workdir, "keys.bin")
+            count = _merge_runs(self.run_paths, out_path)
+            for path in self.run_paths:
+                os.remove(path)
+            self.run_paths = []
+            self.hashes = np.memmap(out_path, dtype=np.uint64, mode='r') if count else np.empty(0, np.uint64)
+        else:
+            self.hashes = np.unique(np.concatenate(self.hash_parts))
+            self.hash_parts = []
+        return self
+
+    def contains(self, batch: pd.DataFrame) -> np.ndarray:
+        """
+        Check which rows of a batch have a key in the set
+
+        Missing keys match missing keys, as in DataFrame.merge.
+
+        Args:
+            batch: DataFrame holding the key columns
+
+        Returns:
+            Boolean array, True where the row's key is in the set
+        """
+        if self.hashes is not None:
+            if len(self.hashes) == 0:
+                return np.zeros(len(batch), dtype=bool)
+            hashes = hash_keys(self._key_values(batch))
+            positions = np.minimum(np.searchsorted(self.hashes, hashes), len(self.hashes) - 1)
+            return np.asarray(self.hashes[positions]) == hashes
+
+        if self.index is not None:
+            return self.index.get_indexer(batch[self.columns[0]]) >= 0
+
+        # Composite keys: a left merge against distinct keys keeps one row per batch row
+        probe = batch[self.columns].merge(
+            self.keys.assign(**{_HIT_COLUMN: True}), on=self.columns, how='left'
+        )
+        return probe[_HIT_COLUMN].notna().to_numpy()
+
+    def close(self) -> None:
+        """Release the set and delete any spilled files"""
+        self.hashes = None
+        self.keys = None
+        self.index = None
+        if self.workdir is not None:
+            shutil.rmtree(self.workdir, ignore_errors=True)
+            self.workdir = None
@@ -0,0 +1,255 @@
+"""
+Join key sketches for Wizard Tools application
+Streaming summaries of a key column used to estimate join output sizes
+"""
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.join_engine import hash_keys
+
+# Number of smallest key hashes kept, with exact counts (KMV sample)
+KMV_SIZE = 4096
+# Count-min table for the frequency of any key
+CMS_WIDTH = 1 << 16
+CMS_DEPTH = 4
+# Most frequent keys of each batch become heavy-hitter candidates
+HEAVY_PER_BATCH = 16
+MAX_HEAVY_CANDIDATES = 256
+
+HASH_SPACE = 2 ** 64
+# Odd multipliers for multiply-shift hashing of the count-min rows
+_CMS_MULTIPLIERS = np.array(
+    [0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xD6E8FEB86659FD93],
+    dtype=np.uint64
+)
+_CMS_SHIFT = np.uint64(64 - (CMS_WIDTH.bit_length() - 1))
+
+
+class KeySketch:
+    """Bounded-memory summary of one input's join key column"""
+
+    def __init__(self, label: str, watch: Iterable[int] = (), k: int = KMV_SIZE):
+        """
+        Initialize an empty sketch
+
+        Args:
+            label: Display name of the input
+            watch: Key hashes to count exactly (e.g. heavy hitters of other inputs)
+            k: Number of key hashes kept in the KMV sample
+        """
+        self.label = label
+        self.k = k
+        self.rows = 0
+        # hash -> exact count for the k smallest hashes seen
+        self.sample = pd.Series(dtype='int64', index=pd.Index([], dtype='uint64'))
+        self.cms = np.zeros((CMS_DEPTH, CMS_WIDTH), dtype=np.int64)
+        self.tracked: Dict[int, int] = {int(h): 0 for h in watch}
+        self.candidates: Dict[int, object] = {}  # hash -> original key value
+
+    @staticmethod
+    def _cms_columns(hashes: np.ndarray, row: int) -> np.ndarray:
+        """Column of each hash in one count-min row"""
+        return ((hashes * _CMS_MULTIPLIERS[row]) >> _CMS_SHIFT).astype(np.int64)
+
+    def update(self, keys: Union[pd.Series, pd.DataFrame]) -> None:
+        """
+        Add a batch of key values to the sketch
+
+        Args:
+            keys: Key values of one batch (a DataFrame for composite keys)
+        """
+        if len(keys) == 0:
+            return
+        self.rows += len(keys)
+
+        hashes, first_index, counts = np.unique(hash_keys(keys), return_index=True, return_counts=True)
+
+        for row in range(CMS_DEPTH):
+            self.cms[row] += np.bincount(
+                self._cms_columns(hashes, row), weights=counts, minlength=CMS_WIDTH
+            ).astype(np.int64)
+
+        # A key whose hash stays below the final threshold was kept since first seen,
+        # so counts in the sample are exact
+        batch = pd.Series(counts, index=pd.Index(hashes, dtype='uint64'))
+        merged = pd.concat([self.sample, batch]).groupby(level=0).sum()
+        self.sample = merged.iloc[:self.k]
+
+        if self.tracked:
+            watched = np.isin(hashes, np.fromiter(self.tracked, dtype=np.uint64))
+            for h, c in zip(hashes[watched], counts[watched]):
+                self.tracked[int(h)] += int(c)
+
+        top = np.argsort(counts)[-HEAVY_PER_BATCH:]
+        for i in top[counts[top] > 1]:
+            h = int(hashes[i])
+            value = keys.iloc[first_index[i]]
+            if isinstance(keys, pd.DataFrame):
+                value = tuple(value)
+            self.candidates.setdefault(h, value)
+            if h not in self.tracked:
+                # Earlier batches are only known through the count-min table
+                self.tracked[h] = self._count_min(h)
+
+        if len(self.candidates) > MAX_HEAVY_CANDIDATES:
+            ranked = sorted(self.candidates, key=self.count, reverse=True)
+            self.candidates = {h: self.candidates[h] for h in ranked[:MAX_HEAVY_CANDIDATES]}
+
+    def _count_min(self, key_hash: int) -> int:
+        """Count-mean-min frequency estimate, corrected for collision noise"""
+        hashes = np.array([key_hash], dtype=np.uint64)
+        values = np.array([self.cms[row][self._cms_columns(hashes, row)[0]] for row in range(CMS_DEPTH)])
+        noise = (self.rows - values) / (CMS_WIDTH - 1)
+        estimate = float(np.median(values - noise))
+        return int(max(0, min(values.min(), round(estimate))))
+
+    @property
+    def is_full(self) -> bool:
+        """Whether the KMV sample has been truncated"""
+        return len(self.sample) >= self.k
+
+    @property
+    def max_hash(self) -> int:
+        """Largest hash covered exactly by the sample"""
+        return int(self.sample.index[-1]) if self.is_full else HASH_SPACE - 1
+
+    def count(self, key_hash: int) -> int:
+        """
+        Get how many rows have a key
+
+        Exact for sampled and tracked keys, estimated otherwise.
+
+        Args:
+            key_hash: Hash of the key
+
+        Returns:
+            Row count for the key
+        """
+        if key_hash <= self.max_hash:
+            return int(self.sample.get(np.uint64(key_hash), 0))
+        if key_hash in self.tracked:
+            return self.tracked[key_hash]
+        return self._count_min(key_hash)
+
+    def distinct(self) -> int:
+        """
+        Estimate the number of distinct keys
+
+        Returns:
+            Estimated distinct key count
+        """
+        if not self.is_full:
+            return len(self.sample)
+        return int((self.k - 1) * HASH_SPACE / (self.max_hash + 1))
+
+    def top_keys(self, n: int = 5) -> List[Tuple[object, int]]:
+        """
+        Get the most repeated keys seen
+
+        Args:
+            n: Maximum number of keys
+
+        Returns:
+            List of (key value, row count) for keys on more than one row
+        """
+        counted = [(value, self.count(h)) for h, value in self.candidates.items()]
+        counted = [item for item in counted if item[1] > 1]
+        return sorted(counted, key=lambda item: item[1], reverse=True)[:n]
+
+
+def _chain_counts(counts: np.ndarray, how: str) -> np.ndarray:
+    """
+    Rows produced per key by a selection-order join, from per-input key counts
+
+    Args:
+        counts: Matrix of key counts, one row per key and one column per input
+        how: Join type ('inner', 'outer', 'left', 'right')
+
+    Returns:
+        Output row count per key
+    """
+    result = counts[:, 0].astype(float)
+    for j in range(1, counts.shape[1]):
+        c = counts[:, j].astype(float)
+        if how == 'inner':
+            result = result * c
+        elif how == 'left':
+            result = np.where(result > 0, result * np.maximum(c, 1), 0)
+        elif how == 'right':
+            result = np.where(c > 0, c * np.maximum(result, 1), 0)
+        else:
+            result = np.where((result > 0) | (c > 0), np.maximum(result, 1) * np.maximum(c, 1), 0)
+    return result
+
+
+def _sampled_hashes(sketch: KeySketch, max_hash: int) -> np.ndarray:
+    """Sampled hashes of a sketch up to and including max_hash"""
+    index = sketch.sample.index.to_numpy()
+    return index[index <= np.uint64(max_hash)]
+
+
+def estimate_join_rows(sketches: List[KeySketch], how: str = 'inner') -> float:
+    """
+    Estimate the output row count of joining inputs on their sketched keys
+
+    Heavy-hitter keys are counted individually in every input, so a single
+    hugely duplicated key is never missed. All other keys are estimated from
+    the keys whose hash falls below a shared threshold: because every input
+    samples the same hash range, matching keys are sampled together.
+
+    Args:
+        sketches: Key sketches in selection order
+        how: Join type ('inner', 'outer', 'left', 'right')
+
+    Returns:
+        Estimated number of output rows
+    """
+    heavy = set()
+    for sketch in sketches:
+        heavy.update(sketch.candidates)
+
+    heavy_rows = 0.0
+    if heavy:
+        counts = np.array([[sketch.count(h) for sketch in sketches] for h in heavy])
+        heavy_rows = float(_chain_counts(counts, how).sum())
+
+    max_hash = min(sketch.max_hash for sketch in sketches)
+    sampled = np.unique(np.concatenate([_sampled_hashes(sketch, max_hash) for sketch in sketches]))
+    if heavy:
+        sampled = sampled[~np.isin(sampled, np.fromiter(heavy, dtype=np.uint64))]
+    if len(sampled) == 0:
+        return heavy_rows
+
+    index = pd.Index(sampled, dtype='uint64')
+    counts = np.column_stack([
+        sketch.sample.reindex(index, fill_value=0).to_numpy() for sketch in sketches
+    ])
+    scale = HASH_SPACE / (max_hash + 1)
+    return heavy_rows + float(_chain_counts(counts, how).sum()) * scale
+
+
+def estimate_overlap(base: KeySketch, other: KeySketch) -> Optional[float]:
+    """
+    Estimate the fraction of another input's distinct keys found in a base input
+
+    Args:
+        base: Sketch of the base input
+        other: Sketch of the other input
+
+    Returns:
+        Fraction between 0 and 1, or None if the other input has no keys
+    """
+    max_hash = min(base.max_hash, other.max_hash)
+    other_keys = _sampled_hashes(other, max_hash)
+    if len(other_keys) == 0:
+        return None
+    return float(np.isin(other_keys, base.sample.index.to_numpy()).mean())
@@ -0,0 +1,85 @@
+"""
+Memory governor for Wizard Tools application
+Decides whether an operation can run in memory or should stream, from its estimated footprint and the free memory
+"""
+import ctypes
+import os
+from pathlib import Path
+from typing import Optional
+import sys
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import MEMORY_HEADROOM, JOIN_MEMORY_BUDGET_MB
+
+
+def available_memory() -> Optional[int]:
+    """
+    Physical memory currently available to the process
+
+    Returns:
+        Available memory in bytes, or None if it cannot be determined
+    """
+    if sys.platform == 'win32':
+        class MemoryStatus(ctypes.Structure):
+            _fields_ = [
+                ('dwLength', ctypes.c_ulong),
+                ('dwMemoryLoad', ctypes.c_ulong),
+                ('ullTotalPhys', ctypes.c_ulonglong),
+                ('ullAvailPhys', ctypes.c_ulonglong),
+                ('ullTotalPageFile', ctypes.c_ulonglong),
+                ('ullAvailPageFile', ctypes.c_ulonglong),
+                ('ullTotalVirtual', ctypes.c_ulonglong),
+                ('ullAvailVirtual', ctypes.c_ulonglong),
+                ('ullAvailExtendedVirtual', ctypes.c_ulonglong),
+            ]
+
+        status = MemoryStatus()
+        status.dwLength = ctypes.sizeof(MemoryStatus)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return int(status.ullAvailPhys)
+        return None
+
+    # Linux counts reclaimable page cache as available
+    try:
+        with open('/proc/meminfo', encoding='ascii') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        return os.sysconf('SC_AVPHYS_PAGES') * os.sysconf('SC_PAGE_SIZE')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def memory_budget_mb() -> float:
+    """
+    Memory an operation may use, in MB
+
+    Returns:
+        MEMORY_HEADROOM of the available memory, or JOIN_MEMORY_BUDGET_MB when
+        the available memory is unknown
+    """
+    available = available_memory()
+    if available is None:
+        return float(JOIN_MEMORY_BUDGET_MB)
+    return available * MEMORY_HEADROOM / (1024 * 1024)
+
+
+def fits_in_memory(estimated_bytes: float) -> bool:
+    """
+    Whether an operation needing about estimated_bytes can run in memory
+
+    Args:
+        estimated_bytes: Estimated peak memory of the in-memory path
+
+    Returns:
+        True to run in memory, False to stream
+    """
+    return estimated_bytes <= memory_budget_mb() * 1024 * 1024
@@ -0,0 +1,610 @@
+"""
+Lazy query plans for Wizard Tools application
+Composes scans, projections, filters, unions and joins into one streaming pipeline
+"""
+import os
+from pathlib import Path
+from typing import Callable, Iterator, List, Optional, Sequence, Union
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import CSV_COMPRESSION, EXCEL_WRITER_ENGINE, JOIN_MEMORY_BUDGET_MB
+from utils.file_processor import FileProcessor, STREAMING_JOINS, ROW_SAMPLE_SIZE
+from utils.helpers import create_output_filename, ensure_directory_exists
+from utils.join_engine import BatchSource, JoinKey, estimate_row_bytes, key_columns, normalize_key
+from utils.join_planner import output_columns
+from utils.row_filter import RowFilter
+from utils import csv_sink
+
+# A predicate maps a batch to a boolean mask of the rows to keep
+Predicate = Callable[[pd.DataFrame], Union[pd.Series, np.ndarray]]
+
+
+def _keep(batch: pd.DataFrame, predicates: List[tuple]) -> pd.DataFrame:
+    """Apply filter predicates to a batch; missing results count as False"""
+    for predicate, _ in predicates:
+        mask = predicate(batch)
+        if isinstance(mask, pd.Series):
+            mask = mask.fillna(False).to_numpy(dtype=bool)
+        batch = batch[np.asarray(mask, dtype=bool)]
+    return batch
+
+
+def _in_order(schema: List[str], columns: Optional[Sequence[str]]) -> List[str]:
+    """Restrict a schema to the given columns, keeping schema order"""
+    if columns is None:
+        return list(schema)
+    wanted = set(columns)
+    return [column for column in schema if column in wanted]
+
+
+class PlanNode:
+    """A node of a lazy query plan producing a stream of DataFrame batches"""
+
+    label = ""
+
+    def schema(self) -> List[str]:
+        """Get the output columns of the node"""
+        raise NotImplementedError
+
+    def children(self) -> List['PlanNode']:
+        """Get the input nodes"""
+        return []
+
+    def batches(self, batch_rows: int, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        """
+        Stream the node's rows
+
+        Args:
+            batch_rows: Approximate maximum number of rows per batch
+            columns: Output columns needed by the consumer (None for all);
+                other columns are not read where they can be skipped
+
+        Yields:
+            DataFrame batches with the needed columns in schema order; at
+            least one (possibly empty) batch is always produced
+        """
+        raise NotImplementedError
+
+    def row_bytes(self) -> float:
+        """Estimated in-memory size of one output row in bytes"""
+        raise NotImplementedError
+
+    def estimated_rows(self) -> Optional[int]:
+        """Estimated (upper bound of the) number of output rows, None if unknown"""
+        return None
+
+    def describe(self) -> str:
+        """One-line description used by explain"""
+        return self.label
+
+    def push_filter(self, predicate: Predicate, columns: List[str]) -> Optional['PlanNode']:
+        """
+        Try to move a filter below this node
+
+        Args:
+            predicate: Row predicate
+            columns: Columns the predicate reads
+
+        Returns:
+            Equivalent node applying the filter closer to the readers, or None
+            if the filter has to stay above this node
+        """
+        return None
+
+    def with_filter(self, predicate: Predicate, columns: List[str]) -> 'PlanNode':
+        """Apply a filter to this node, as deep in the plan as it can go"""
+        pushed = self.push_filter(predicate, columns)
+        return pushed if pushed is not None else Filter(self, predicate, columns)
+
+    def optimize(self) -> 'PlanNode':
+        """Get an equivalent plan with filters pushed down towards the readers"""
+        return self
+
+    def source(self, columns: Optional[Sequence[str]] = None) -> BatchSource:
+        """
+        Wrap the node as a re-readable batch source for the join engines
+
+        Args:
+            columns: Output columns to produce (None for all)
+        """
+        default_columns = columns
+
+        def open_batches(batch_rows: int, columns: Optional[List[str]] = None):
+            return self.batches(batch_rows, columns if columns is not None else default_columns)
+
+        return BatchSource(self.label, open_batches, self.row_bytes(), self.estimated_rows())
+
+    # Plan building
+
+    def select(self, columns: List[str]) -> 'Select':
+        """Keep only the given columns, in the given order"""
+        return Select(self, columns)
+
+    def filter(self, predicate: Union[str, Predicate], columns: Optional[List[str]] = None) -> 'Filter':
+        """
+        Keep only the rows matching a predicate
+
+        Args:
+            predicate: Filter expression (see RowFilter), or callable mapping a
+                batch to a boolean mask
+            columns: Columns a callable predicate reads (None = any column, which
+                prevents projection and most pushdown below the filter);
+                expressions know their own columns
+        """
+        if isinstance(predicate, str):
+            predicate = RowFilter(predicate)
+            columns = predicate.columns
+        return Filter(self, predicate, columns)
+
+    def union(self, *others: 'PlanNode') -> 'UnionAll':
+        """Concatenate the rows of this node and others, aligning columns by name"""
+        return UnionAll([self] + list(others))
+
+    def join(
+        self,
+        others: Union['PlanNode', List['PlanNode']],
+        key: JoinKey,
+        how: str = 'inner',
+        engine: str = 'hash',
+        memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB
+    ) -> 'Join':
+        """Join this node with others on a key using an out-of-core join engine"""
+        others = [others] if isinstance(others, PlanNode) else list(others)
+        return Join([self] + others, key, how, engine, memory_budget_mb)
+
+    def sink(self, output_path: str) -> 'Sink':
+        """Write all rows to one CSV or Excel file"""
+        return Sink(self, output_path)
+
+    def partition(
+        self,
+        output_dir: str,
+        chunk_size: int,
+        output_format: str = 'csv',
+        base_name: str = 'output'
+    ) -> 'Partition':
+        """Write the rows as numbered chunk files of chunk_size rows each"""
+        return Partition(self, output_dir, chunk_size, output_format, base_name)
+
+    def collect(self, memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB) -> pd.DataFrame:
+        """Execute the plan and return all rows as one DataFrame"""
+        plan = self.optimize()
+        frames = list(plan.batches(plan.source().batch_rows(memory_budget_mb)))
+        return pd.concat(frames, ignore_index=True)
+
+    def explain(self) -> str:
+        """Format the optimized plan as an indented tree"""
+        lines = []
+
+        def describe(node: 'PlanNode', depth: int) -> None:
+            lines.append(f"{'   ' * depth}-> {node.describe()}")
+            for child in node.children():
+                describe(child, depth + 1)
+
+        describe(self.optimize(), 0)
+        return "\n".join(lines)
+
+
+class Scan(PlanNode):
+    """Read one CSV file or Excel sheet, with pushed-down filters applied as it is read"""
+
+    def __init__(self, file_path: str, sheet_name: Optional[str] = None, predicates: Optional[List[tuple]] = None):
+        """
+        Initialize a scan
+
+        Args:
+            file_path: Path to the file
+            sheet_name: Sheet name for Excel files (None for first sheet or CSV)
+            predicates: Pushed-down (predicate, columns) pairs
+        """
+        self.file_path = file_path
+        self.sheet_name = sheet_name
+        self.predicates = predicates or []
+        self.label = os.path.basename(file_path)
+        self._sample = None
+
+    def sample(self) -> pd.DataFrame:
+        """First rows of the input, read once"""
+        if self._sample is None:
+            self._sample = FileProcessor.read_file(self.file_path, sheet_name=self.sheet_name, nrows=ROW_SAMPLE_SIZE)
+        return self._sample
+
+    def schema(self) -> List[str]:
+        return list(self.sample().columns)
+
+    def batches(self, batch_rows: int, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        output = _in_order(self.schema(), columns)
+        # Columns only read by the filters are dropped once they have run
+        read = set(output)
+        for _, predicate_columns in self.predicates:
+            read.update(predicate_columns)
+        usecols = None if columns is None and not self.predicates else _in_order(self.schema(), read)
+        schema = FileProcessor._csv_schema(self.file_path)
+        for batch in FileProcessor.read_batches(
+            self.file_path, batch_rows, sheet_name=self.sheet_name, columns=usecols, schema=schema
+        ):
+            yield _keep(batch, self.predicates)[output]
+
+    def row_bytes(self) -> float:
+        return estimate_row_bytes(self.sample())
+
+    def estimated_rows(self) -> Optional[int]:
+        return FileProcessor._estimate_row_count(self.file_path, self.sample())
+
+    def describe(self) -> str:
+        sheet = f" [{self.sheet_name}]" if self.sheet_name else ""
+        filters = f" ({len(self.predicates)} filter(s) pushed down)" if self.predicates else ""
+        return f"SCAN {self.label}{sheet}{filters}"
+
+    def push_filter(self, predicate: Predicate, columns: List[str]) -> Optional[PlanNode]:
+        scan = Scan(self.file_path, self.sheet_name, self.predicates + [(predicate, columns)])
+        scan._sample = self._sample
+        return scan
+
+
+class Select(PlanNode):
+    """Keep and reorder columns"""
+
+    def __init__(self, child: PlanNode, columns: List[str]):
+        """
+        Initialize a projection
+
+        Args:
+            child: Input node
+            columns: Output columns, in output order
+
+        Raises:
+            ValueError: If a column is not produced by the input
+        """
+        missing = [column for column in columns if column not in child.schema()]
+        if missing:
+            raise ValueError(f"Column '{missing[0]}' not found in {child.label or 'input'}")
+        self.child = child
+        self.columns = list(columns)
+        self.label = child.label
+
+    def schema(self) -> List[str]:
+        return list(self.columns)
+
+    def children(self) -> List[PlanNode]:
+        return [self.child]
+
+    def batches(self, batch_rows: int, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        output = _in_order(self.columns, columns)
+        for batch in self.child.batches(batch_rows, output):
+            yield batch[output]
+
+    def row_bytes(self) -> float:
+        return self.child.row_bytes()
+
+    def estimated_rows(self) -> Optional[int]:
+        return self.child.estimated_rows()
+
+    def describe(self) -> str:
+        return f"SELECT {', '.join(repr(column) for column in self.columns)}"
+
+    def push_filter(self, predicate: Predicate, columns: List[str]) -> Optional[PlanNode]:
+        return Select(self.child.with_filter(predicate, columns), self.columns)
+
+    def optimize(self) -> PlanNode:
+        return Select(self.child.optimize(), self.columns)
+
+
+class Filter(PlanNode):
+    """Keep the rows matching a predicate"""
+
+    def __init__(self, child: PlanNode, predicate: Predicate, columns: Optional[List[str]] = None):
+        """
+        Initialize a filter
+
+        Args:
+            child: Input node
+            predicate: Callable mapping a batch to a boolean mask
+            columns: Columns the predicate reads (None for every input column)
+
+        Raises:
+            ValueError: If a column is not produced by the input
+        """
+        columns = child.schema() if columns is None else list(columns)
+        missing = [column for column in columns if column not in child.schema()]
+        if missing:
+            raise ValueError(f"Column '{missing[0]}' not found in {child.label or 'input'}")
+        self.child = child
+        self.predicate = predicate
+        self.columns = columns
+        self.label = child.label
+
+    def schema(self) -> List[str]:
+        return self.child.schema()
+
+    def children(self) -> List[PlanNode]:
+        return [self.child]
+
+    def batches(self, batch_rows: int, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        output = _in_order(self.schema(), columns)
+        read = _in_order(self.schema(), set(output) | set(self.columns))
+        for batch in self.child.batches(batch_rows, read):
+            yield _keep(batch, [(self.predicate, self.columns)])[output]
+
+    def row_bytes(self) -> float:
+        return self.child.row_bytes()
+
+    def estimated_rows(self) -> Optional[int]:
+        return self.child.estimated_rows()
+
+    def describe(self) -> str:
+        return f"FILTER on {', '.join(repr(column) for column in self.columns)}"
+
+    def push_filter(self, predicate: Predicate, columns: List[str]) -> Optional[PlanNode]:
+        return self.child.with_filter(predicate, columns).with_filter(self.predicate, self.columns)
+
+    def optimize(self) -> PlanNode:
+        return self.child.optimize().with_filter(self.predicate, self.columns)
+
+
+class UnionAll(PlanNode):
+    """Concatenate the rows of several inputs, aligning columns by name"""
+
+    label = "union"
+
+    def __init__(self, inputs: List[PlanNode]):
+        """
+        Initialize a union
+
+        Args:
+            inputs: Input nodes; columns missing from an input are left empty
+        """
+        self.inputs = list(inputs)
+
+    def schema(self) -> List[str]:
+        columns = []
+        for node in self.inputs:
+            columns += [column for column in node.schema() if column not in columns]
+        return columns
+
+    def children(self) -> List[PlanNode]:
+        return list(self.inputs)
+
+    def batches(self, batch_rows: int, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        output = _in_order(self.schema(), columns)
+        produced = False
+        for node in self.inputs:
+            for batch in node.batches(batch_rows, _in_order(node.schema(), output)):
+                if produced and len(batch) == 0:
+                    continue
+                produced = True
+                yield batch.reindex(columns=output)
+
+    def row_bytes(self) -> float:
+        return max(node.row_bytes() for node in self.inputs)
+
+    def estimated_rows(self) -> Optional[int]:
+        counts = [node.estimated_rows() for node in self.inputs]
+        return None if None in counts else sum(counts)
+
+    def describe(self) -> str:
+        return f"UNION of {len(self.inputs)} inputs"
+
+    def push_filter(self, predicate: Predicate, columns: List[str]) -> Optional[PlanNode]:
+        # An input lacking a column sees it as empty only after the union
+        if not all(set(columns) <= set(node.schema()) for node in self.inputs):
+            return None
+        return UnionAll([node.with_filter(predicate, columns) for node in self.inputs])
+
+    def optimize(self) -> PlanNode:
+        return UnionAll([node.optimize() for node in self.inputs])
+
+
+class Join(PlanNode):
+    """Join several inputs on a key with one of the streaming join engines"""
+
+    label = "join"
+
+    def __init__(
+        self,
+        inputs: List[PlanNode],
+        key: JoinKey,
+        how: str = 'inner',
+        engine: str = 'hash',
+        memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB
+    ):
+        """
+        Initialize a join
+
+        Args:
+            inputs: Input nodes (at least 2), first is the left table
+            key: Join column name, or list of names for a composite key
+            how: Join type ('inner', 'outer', 'left', 'right')
+            engine: Streaming join engine ('sort_merge', 'hash', 'broadcast', 'sqlite')
+            memory_budget_mb: Memory budget of the join engine in MB
+
+        Raises:
+            ValueError: If the engine is unknown or an input lacks a join column
+        """
+        if len(inputs) < 2:
+            raise ValueError("At least 2 inputs required for join")
+        if engine not in STREAMING_JOINS:
+            raise ValueError(f"Unknown join engine: {engine}")
+        self.key = normalize_key(key)
+        for node in inputs:
+            for column in key_columns(self.key):
+                if column not in node.schema():
+                    raise ValueError(f"Join column '{column}' not found in {node.label or 'input'}")
+        self.inputs = list(inputs)
+        self.how = how
+        self.engine = engine
+        self.memory_budget_mb = memory_budget_mb
+
+    def _labels(self) -> List[str]:
+        return [node.label for node in self.inputs]
+
+    def _renames(self):
+        return output_columns([node.schema() for node in self.inputs], self.key, self._labels())
+
+    def schema(self) -> List[str]:
+        return self._renames()[1]
+
+    def children(self) -> List[PlanNode]:
+        return list(self.inputs)
+
+    def batches(self, batch_rows: int, columns: Optional[Sequence[str]] = None) -> Iterator[pd.DataFrame]:
+        renames, final_columns = self._renames()
+        output = _in_order(final_columns, columns)
+        wanted = set(output)
+        keys = key_columns(self.key)
+
+        # Only the key and the wanted columns of each input are read
+        projected = [
+            [column for column in node.schema() if column in keys or rename[column] in wanted]
+            for node, rename in zip(self.inputs, renames)
+        ]
+        # Dropping a column can remove a name clash, so map the suffixes back
+        projected_renames, _ = output_columns(projected, self.key, self._labels())
+        restore = {}
+        for rename, projected_rename in zip(renames, projected_renames):
+            restore.update({projected_rename[column]: rename[column] for column in projected_rename})
+
+        sources = [node.source(node_columns) for node, node_columns in zip(self.inputs, projected)]
+        blocks = STREAMING_JOINS[self.engine](sources, self.key, how=self.how, memory_budget_mb=self.memory_budget_mb)
+        for block in blocks:
+            yield block.rename(columns=restore)[output]
+
+    def row_bytes(self) -> float:
+        return sum(node.row_bytes() for node in self.inputs)
+
+    def describe(self) -> str:
+        on = ', '.join(repr(column) for column in key_columns(self.key))
+        return f"{self.how.upper()} JOIN on {on} ({self.engine})"
+
+    def push_filter(self, predicate: Predicate, columns: List[str]) -> Optional[PlanNode]:
+        renames, _ = self._renames()
+        if self.how == 'inner':
+            candidates = range(len(self.inputs))
+        elif self.how == 'left':
+            candidates = [0]
+        elif self.how == 'right':
+            candidates = [len(self.inputs) - 1]
+        else:
+            # Outer joins keep unmatched rows of every input
+            return None
+
+        # Inputs where the predicate sees the same columns under the same names
+        targets = [i for i in candidates if all(renames[i].get(column) == column for column in columns)]
+        if not targets:
+            return None
+        inputs = [
+            node.with_filter(predicate, columns) if i in targets else node
+            for i, node in enumerate(self.inputs)
+        ]
+        return Join(inputs, self.key, self.how, self.engine, self.memory_budget_mb)
+
+    def optimize(self) -> PlanNode:
+        return Join([node.optimize() for node in self.inputs], self.key, self.how, self.engine, self.memory_budget_mb)
+
+
+class Sink:
+    """Write the rows of a plan to one CSV or Excel file"""
+
+    def __init__(self, child: PlanNode, output_path: str):
+        self.child = child
+        self.output_path = output_path
+
+    def explain(self) -> str:
+        """Format the optimized plan as an indented tree"""
+        return f"SINK {os.path.basename(self.output_path)}\n" + self.child.explain()
+
+    def execute(self, memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB) -> int:
+        """
+        Run the whole pipeline
+
+        Args:
+            memory_budget_mb: Memory budget used to size the batches
+
+        Returns:
+            Number of data rows written
+        """
+        plan = self.child.optimize()
+        batch_rows = plan.source().batch_rows(memory_budget_mb)
+        return FileProcessor._write_batches(plan.batches(batch_rows), self.output_path)
+
+
+class Partition:
+    """Write the rows of a plan as numbered chunk files"""
+
+    def __init__(self, child: PlanNode, output_dir: str, chunk_size: int, output_format: str = 'csv', base_name: str = 'output'):
+        if chunk_size < 1:
+            raise ValueError("Chunk size must be at least 1")
+        self.child = child
+        self.output_dir = output_dir
+        self.chunk_size = chunk_size
+        self.output_format = output_format
+        self.base_name = base_name
+
+    def explain(self) -> str:
+        """Format the optimized plan as an indented tree"""
+        return f"PARTITION into chunks of {self.chunk_size:,} rows\n" + self.child.explain()
+
+    def _write(self, chunk_df: pd.DataFrame, chunk_num: int) -> str:
+        """Write one chunk file"""
+        ext = csv_sink.csv_extension(CSV_COMPRESSION) if self.output_format == 'csv' else '.xlsx'
+        output_file = os.path.join(self.output_dir, create_output_filename(self.base_name, '_chunk', ext, chunk_num))
+        if self.output_format == 'csv':
+            csv_sink.write_csv(chunk_df, output_file)
+        else:
+            chunk_df.to_excel(output_file, index=False, engine=EXCEL_WRITER_ENGINE)
+        return output_file
+
+    def execute(self, memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB) -> List[str]:
+        """
+        Run the whole pipeline
+
+        Chunks hold exactly chunk_size rows (the last one may hold fewer)
+        however the batches of the pipeline are sized.
+
+        Args:
+            memory_budget_mb: Memory budget used to size the batches
+
+        Returns:
+            List of output files
+        """
+        ensure_directory_exists(self.output_dir)
+        plan = self.child.optimize()
+        batch_rows = min(plan.source().batch_rows(memory_budget_mb), self.chunk_size)
+
+        output_files = []
+        for chunk_df in FileProcessor._rechunk(plan.batches(batch_rows), self.chunk_size):
+            output_files.append(self._write(chunk_df, len(output_files) + 1))
+        return output_files
+
+
+def scan(file_path: str, sheet_name: Optional[str] = None) -> Scan:
+    """
+    Start a lazy plan by reading a file
+
+    Nothing is read until a sink, partition or collect runs the plan, e.g.
+
+        scan('a.csv').union(scan('b.xlsx', 'Q1'))
+            .filter("qty > 0")
+            .select(['sku', 'qty'])
+            .partition('out', 50000)
+            .execute()
+
+    streams both files once, with the filter and column selection applied
+    by the readers, and writes the chunks without any intermediate file.
+
+    Args:
+        file_path: Path to a CSV or Excel file
+        sheet_name: Sheet name for Excel files (None for first sheet or CSV)
+
+    Returns:
+        Scan node
+    """
+    return Scan(file_path, sheet_name)
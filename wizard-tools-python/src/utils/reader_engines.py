@@ -0,0 +1,316 @@
+"""
+Reader engine registry for Wizard Tools application
+Lists the engines installed for each file format and ranks them with a one-time benchmark cached per user
+"""
+from importlib import import_module, metadata
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Set, Tuple
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import ENGINE_BENCHMARK_PATH, NA_VALUES
+from utils import arrow_csv, xls_reader, xlsx_reader
+from utils.workbook_pool import PandasWorkbook
+
+BENCHMARK_FORMAT_VERSION = 1
+# Size of the sample files engines are timed on
+BENCHMARK_ROWS = {'.csv': 50000, '.xlsx': 5000}
+# Timed reads per engine; the fastest counts
+BENCHMARK_REPEATS = 2
+
+
+class ReaderEngine:
+    """
+    One way of reading a file format
+
+    CSV engines read whole files; Excel engines open workbooks, which
+    FileProcessor keeps in its workbook pool.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        read: Optional[Callable[..., pd.DataFrame]] = None,
+        open_workbook: Optional[Callable[[str], object]] = None,
+        handles: Optional[Callable[[dict], bool]] = None,
+        package: Optional[str] = None
+    ):
+        """
+        Describe an engine
+
+        Args:
+            name: Engine name, as set in config.py
+            read: Reads a file from (file_path, **pandas arguments) (CSV engines)
+            open_workbook: Opens a workbook with sheet_names, read_sheet() and
+                close() from a file path (Excel engines)
+            handles: Whether the engine supports a read with these extra
+                pandas arguments (None for any)
+            package: Optional package the engine needs, checked by importing it
+        """
+        self.name = name
+        self.read = read
+        self.open_workbook = open_workbook
+        self.handles = handles or (lambda kwargs: True)
+        self.package = package
+
+    @property
+    def available(self) -> bool:
+        """Whether the engine's package is installed"""
+        if self.package is None:
+            return True
+        try:
+            import_module(self.package.replace('-', '_'))
+            return True
+        except ImportError:
+            return False
+
+    @property
+    def version(self) -> str:
+        """Version of the engine's package, for telling benchmarks of different installs apart"""
+        if self.package is None:
+            return ''
+        try:
+            return metadata.version(self.package)
+        except metadata.PackageNotFoundError:
+            return ''
+
+    def read_file(self, file_path: str, sheet_name=0, **kwargs) -> pd.DataFrame:
+        """Read a whole file, or one sheet of a workbook"""
+        if self.open_workbook is None:
+            return self.read(file_path, **kwargs)
+        with self.open_workbook(file_path) as workbook:
+            return workbook.read_sheet(sheet_name, **kwargs)
+
+
+# Engines by file format; the first of each is pandas' own parser, which
+# handles every read and is used when the others fail
+_engines: Dict[str, List[ReaderEngine]] = {}
+# (format, engine, path, mtime) of reads an engine failed and another engine did
+_failures: Set[Tuple[str, str, str, int]] = set()
+# Benchmark results loaded in this session, by format
+_rankings: Dict[str, List[str]] = {}
+_lock = threading.Lock()
+
+
+def register_engine(file_format: str, engine: ReaderEngine) -> None:
+    """
+    Install an engine for a file format, replacing one of the same name
+
+    Args:
+        file_format: File extension, e.g. '.csv'
+        engine: The engine; the first registered for a format is its baseline
+    """
+    engines = _engines.setdefault(file_format, [])
+    names = [registered.name for registered in engines]
+    if engine.name in names:
+        engines[names.index(engine.name)] = engine
+    else:
+        engines.append(engine)
+    _rankings.pop(file_format, None)
+
+
+def get_engine(file_format: str, name: str) -> ReaderEngine:
+    """
+    Look up an installed engine
+
+    Raises:
+        ValueError: If no engine of that name is registered for the format
+    """
+    for engine in _engines.get(file_format, []):
+        if engine.name == name:
+            return engine
+    raise ValueError(f"Unknown {file_format.lstrip('.').upper()} engine: {name}")
+
+
+def available_engines(file_format: str) -> List[str]:
+    """Names of the engines whose packages are installed, baseline first"""
+    return [engine.name for engine in _engines.get(file_format, []) if engine.available]
+
+
+def _failure_key(file_format: str, name: str, file_path: str) -> Tuple[str, str, str, int]:
+    try:
+        mtime = os.stat(file_path).st_mtime_ns
+    except OSError:
+        mtime = 0
+    return (file_format, name, os.path.abspath(file_path), mtime)
+
+
+def record_failure(file_format: str, name: str, file_path: str) -> None:
+    """Skip an engine for this file (until it changes) after it failed where another engine succeeded"""
+    _failures.add(_failure_key(file_format, name, file_path))
+
+
+def engine_order(file_format: str, setting: str, kwargs: dict, file_path: Optional[str] = None) -> List[str]:
+    """
+    Engines to try for a read, in order; each is tried when the one before fails
+
+    Args:
+        file_format: File extension, e.g. '.xlsx'
+        setting: 'auto' for the fastest installed engines by benchmark, or an
+            engine name (tried first, with the baseline behind it)
+        kwargs: Extra pandas arguments of the read
+        file_path: File being read, to skip engines that failed on it before
+
+    Returns:
+        Engine names, always ending with the format's baseline
+
+    Raises:
+        ValueError: If the engine is unknown, or its package is not installed
+    """
+    baseline = _engines[file_format][0].name
+    if setting == 'auto':
+        candidates = ranking(file_format)
+    else:
+        engine = get_engine(file_format, setting)
+        if not engine.available:
+            raise ValueError(
+                f"The {setting} {file_format.lstrip('.').upper()} engine needs the {engine.package} package"
+            )
+        candidates = [setting]
+    order = []
+    for name in candidates:
+        if name == baseline:
+            break
+        if not get_engine(file_format, name).handles(kwargs):
+            continue
+        if file_path is not None and _failure_key(file_format, name, file_path) in _failures:
+            continue
+        order.append(name)
+    return order + [baseline]
+
+
+def ranking(file_format: str) -> List[str]:
+    """
+    Installed engines of a format, fastest first
+
+    The engines are timed once on a generated sample file and the result
+    kept in ENGINE_BENCHMARK_PATH; installing or upgrading an engine runs
+    the benchmark again. Formats without a sample writer keep registration
+    order, newer engines ahead of the baseline.
+    """
+    with _lock:
+        if file_format not in _rankings:
+            _rankings[file_format] = _rank(file_format)
+        return list(_rankings[file_format])
+
+
+def _rank(file_format: str) -> List[str]:
+    engines = [engine for engine in _engines.get(file_format, []) if engine.available]
+    names = [engine.name for engine in engines]
+    if len(engines) < 2 or file_format not in BENCHMARK_ROWS:
+        return names[1:] + names[:1]
+
+    installed = ';'.join(f"{engine.name}={engine.version}" for engine in engines) + f";pandas={pd.__version__}"
+    cache = {}
+    try:
+        with open(ENGINE_BENCHMARK_PATH, encoding='utf-8') as f:
+            cache = json.load(f)
+        if cache.get('version') != BENCHMARK_FORMAT_VERSION:
+            cache = {}
+        entry = cache.get('formats', {}).get(file_format, {})
+        if entry.get('installed') == installed:
+            return sorted(names, key=lambda name: entry['seconds'].get(name, float('inf')))
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        cache = {}
+
+    seconds = benchmark(file_format, engines)
+    cache = {'version': BENCHMARK_FORMAT_VERSION, 'formats': cache.get('formats', {})}
+    cache['formats'][file_format] = {'installed': installed, 'seconds': seconds}
+    try:
+        os.makedirs(os.path.dirname(ENGINE_BENCHMARK_PATH), exist_ok=True)
+        with open(ENGINE_BENCHMARK_PATH, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, indent=2)
+    except OSError:
+        # The cache only saves time; the ranking holds for this session
+        pass
+    return sorted(names, key=lambda name: seconds.get(name, float('inf')))
+
+
+def _sample(rows: int) -> pd.DataFrame:
+    """Typical table contents: ids, measures, short text, dates and gaps"""
+    generator = np.random.default_rng(0)
+    text = np.array(['NE', 'SW', 'NA', 'store', 'web', 'Widget, large'], dtype=object)[generator.integers(0, 6, rows)]
+    price = generator.random(rows) * 100
+    price[::17] = np.nan
+    return pd.DataFrame({
+        'id': np.arange(rows),
+        'qty': generator.integers(0, 1000, rows),
+        'price': price.round(2),
+        'region': text,
+        'note': np.where(np.arange(rows) % 5 == 0, '', 'ok'),
+        'when': pd.Timestamp('2024-01-01') + pd.to_timedelta(np.arange(rows) % 365, unit='D'),
+    })
+
+
+def benchmark(file_format: str, engines: List[ReaderEngine]) -> Dict[str, float]:
+    """
+    Time each engine reading the same generated file
+
+    Returns:
+        Seconds per read by engine name; engines that fail are left out
+    """
+    sample = _sample(BENCHMARK_ROWS[file_format])
+    seconds = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'sample' + file_format)
+        if file_format == '.csv':
+            sample.to_csv(path, index=False)
+        else:
+            sample.to_excel(path, index=False)
+        for engine in engines:
+            try:
+                timings = []
+                for _ in range(BENCHMARK_REPEATS):
+                    start = time.perf_counter()
+                    engine.read_file(path)
+                    timings.append(time.perf_counter() - start)
+                seconds[engine.name] = min(timings)
+            except Exception:
+                continue
+    return seconds
+
+
+def _read_csv(file_path: str, **kwargs) -> pd.DataFrame:
+    return pd.read_csv(file_path, na_values=NA_VALUES, keep_default_na=False, **kwargs)
+
+
+def _usecols_only(kwargs: dict, allowed=('usecols',)) -> bool:
+    """Whether a read passes only the arguments in allowed, with usecols (if any) as column names"""
+    usecols = kwargs.get('usecols')
+    return set(kwargs) <= set(allowed) and (usecols is None or isinstance(usecols, (list, tuple)))
+
+
+register_engine('.csv', ReaderEngine('c', read=_read_csv))
+register_engine('.csv', ReaderEngine(
+    'pyarrow',
+    read=lambda file_path, **kwargs: arrow_csv.read_csv(file_path, kwargs.get('usecols')),
+    handles=_usecols_only,
+    package='pyarrow'
+))
+register_engine('.xlsx', ReaderEngine(
+    'openpyxl', open_workbook=lambda file_path: PandasWorkbook(file_path, 'openpyxl'), package='openpyxl'
+))
+register_engine('.xlsx', ReaderEngine(
+    'native',
+    open_workbook=xlsx_reader.XlsxWorkbook,
+    handles=lambda kwargs: _usecols_only(kwargs, ('usecols', 'nrows'))
+))
+register_engine('.xlsx', ReaderEngine(
+    'calamine', open_workbook=lambda file_path: PandasWorkbook(file_path, 'calamine'), package='python-calamine'
+))
+register_engine('.xls', ReaderEngine('xlrd', open_workbook=xls_reader.XlsWorkbook, package='xlrd'))
+register_engine('.xls', ReaderEngine(
+    'calamine', open_workbook=lambda file_path: PandasWorkbook(file_path, 'calamine'), package='python-calamine'
+))
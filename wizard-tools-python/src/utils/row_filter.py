@@ -0,0 +1,237 @@
+"""
+Row filter expressions for Wizard Tools application
+Parses a small, safe expression language over column names and evaluates it on whole batches
+"""
+import ast
+import re
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Column names that are not plain identifiers are written in backticks: `Unit Price` > 10
+_QUOTED_NAME = re.compile(r"`([^`]*)`")
+
+_COMPARISONS = {
+    ast.Eq: lambda a, b: a == b,
+    ast.NotEq: lambda a, b: a != b,
+    ast.Lt: lambda a, b: a < b,
+    ast.LtE: lambda a, b: a <= b,
+    ast.Gt: lambda a, b: a > b,
+    ast.GtE: lambda a, b: a >= b,
+}
+
+_ARITHMETIC = {
+    ast.Add: lambda a, b: a + b,
+    ast.Sub: lambda a, b: a - b,
+    ast.Mult: lambda a, b: a * b,
+    ast.Div: lambda a, b: a / b,
+    ast.Mod: lambda a, b: a % b,
+}
+
+
+def _text(value):
+    """View a column as text for the string functions"""
+    if isinstance(value, pd.Series):
+        return value.astype('string').str
+    raise ValueError("String functions take a column as their first argument")
+
+
+_FUNCTIONS = {
+    'isna': (1, lambda a: a.isna() if isinstance(a, pd.Series) else pd.isna(a)),
+    'notna': (1, lambda a: a.notna() if isinstance(a, pd.Series) else not pd.isna(a)),
+    'abs': (1, abs),
+    'lower': (1, lambda a: _text(a).lower()),
+    'upper': (1, lambda a: _text(a).upper()),
+    'contains': (2, lambda a, b: _text(a).contains(str(b), regex=False)),
+    'startswith': (2, lambda a, b: _text(a).startswith(str(b))),
+    'endswith': (2, lambda a, b: _text(a).endswith(str(b))),
+}
+
+
+class RowFilter:
+    """
+    A row predicate written as an expression over column names
+
+    The language is the subset of Python expressions needed for row
+    conditions, for example::
+
+        region == 'NE' and qty > 0
+        status in ('open', 'pending') or isna(closed_at)
+        0 < `Unit Price` * qty <= 1000 and not contains(notes, 'test')
+
+    It supports comparisons (chained too), ``in`` / ``not in`` with a list of
+    literals, ``and`` / ``or`` / ``not``, arithmetic and the functions isna,
+    notna, abs, lower, upper, contains, startswith and endswith. Nothing
+    else is allowed: there are no attribute lookups, subscripts or arbitrary
+    calls, so an expression cannot run code. A comparison or string test on
+    a missing value is False (use isna / notna to select missing values).
+    """
+
+    def __init__(self, expression: str):
+        """
+        Parse a filter expression
+
+        Args:
+            expression: Filter expression
+
+        Raises:
+            ValueError: If the expression is empty, malformed or uses anything
+                outside the filter language
+        """
+        self.expression = expression.strip()
+        if not self.expression:
+            raise ValueError("Filter expression is empty")
+
+        self._quoted: Dict[str, str] = {}
+
+        def placeholder(match: re.Match) -> str:
+            name = f"__column_{len(self._quoted)}__"
+            self._quoted[name] = match.group(1)
+            return name
+
+        source = _QUOTED_NAME.sub(placeholder, self.expression)
+        try:
+            self._tree = ast.parse(source, mode='eval').body
+        except SyntaxError as e:
+            raise ValueError(f"Invalid filter expression: {e.msg}")
+
+        self.columns: List[str] = []
+        self._check(self._tree)
+
+    def __str__(self) -> str:
+        return self.expression
+
+    def _column(self, name: str) -> str:
+        return self._quoted.get(name, name)
+
+    def _check(self, node: ast.AST) -> None:
+        """Reject anything outside the language and collect the column names"""
+        if isinstance(node, ast.BoolOp):
+            for value in node.values:
+                self._check(value)
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.Not, ast.USub, ast.UAdd)):
+            self._check(node.operand)
+        elif isinstance(node, ast.BinOp) and type(node.op) in _ARITHMETIC:
+            self._check(node.left)
+            self._check(node.right)
+        elif isinstance(node, ast.Compare):
+            self._check(node.left)
+            for op, comparator in zip(node.ops, node.comparators):
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    if not isinstance(comparator, (ast.List, ast.Tuple, ast.Set)):
+                        raise ValueError("'in' needs a list of values, e.g. region in ('NE', 'SW')")
+                elif type(op) not in _COMPARISONS:
+                    raise ValueError("Unsupported comparison in filter expression")
+                self._check(comparator)
+        elif isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            for element in node.elts:
+                if not isinstance(element, ast.Constant):
+                    raise ValueError("Lists in filter expressions may only hold literal values")
+        elif isinstance(node, ast.Call):
+            name = node.func.id if isinstance(node.func, ast.Name) else None
+            if name not in _FUNCTIONS or node.keywords:
+                raise ValueError(f"Unknown function in filter expression: {ast.unparse(node.func)}")
+            if len(node.args) != _FUNCTIONS[name][0]:
+                raise ValueError(f"{name}() takes {_FUNCTIONS[name][0]} argument(s)")
+            for arg in node.args:
+                self._check(arg)
+        elif isinstance(node, ast.Name):
+            column = self._column(node.id)
+            if column not in self.columns:
+                self.columns.append(column)
+        elif isinstance(node, ast.Constant):
+            if not isinstance(node.value, (str, int, float, bool, type(None))):
+                raise ValueError("Unsupported literal in filter expression")
+        else:
+            raise ValueError(f"Unsupported syntax in filter expression: {ast.unparse(node)}")
+
+    def _evaluate(self, node: ast.AST, batch: pd.DataFrame):
+        """Evaluate a checked expression node on a batch"""
+        if isinstance(node, ast.BoolOp):
+            masks = [self._mask(self._evaluate(value, batch), batch) for value in node.values]
+            combine = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return combine.reduce(masks)
+        if isinstance(node, ast.UnaryOp):
+            operand = self._evaluate(node.operand, batch)
+            if isinstance(node.op, ast.Not):
+                return ~self._mask(operand, batch)
+            return -operand if isinstance(node.op, ast.USub) else operand
+        if isinstance(node, ast.BinOp):
+            return _ARITHMETIC[type(node.op)](self._evaluate(node.left, batch), self._evaluate(node.right, batch))
+        if isinstance(node, ast.Compare):
+            masks = []
+            left = self._evaluate(node.left, batch)
+            for op, comparator in zip(node.ops, node.comparators):
+                right = self._evaluate(comparator, batch)
+                if isinstance(op, (ast.In, ast.NotIn)):
+                    values = pd.Series(left, index=batch.index) if not isinstance(left, pd.Series) else left
+                    result = values.isin(right)
+                    result = ~result if isinstance(op, ast.NotIn) else result
+                elif right is None or left is None:
+                    # 'x == None' reads naturally as a missing-value test
+                    value = left if right is None else right
+                    missing = value.isna() if isinstance(value, pd.Series) else pd.isna(value)
+                    result = missing if isinstance(op, ast.Eq) else np.logical_not(missing)
+                else:
+                    result = _COMPARISONS[type(op)](left, right)
+                    # Missing is False for every dtype: '!=' on NaN would be True,
+                    # and on nullable columns every comparison gives NA
+                    for value in (left, right):
+                        if isinstance(value, pd.Series):
+                            result = result & value.notna()
+                masks.append(self._mask(result, batch))
+                left = right
+            return np.logical_and.reduce(masks)
+        if isinstance(node, (ast.List, ast.Tuple, ast.Set)):
+            return [element.value for element in node.elts]
+        if isinstance(node, ast.Call):
+            return _FUNCTIONS[node.func.id][1](*(self._evaluate(arg, batch) for arg in node.args))
+        if isinstance(node, ast.Name):
+            column = self._column(node.id)
+            if column not in batch.columns:
+                raise ValueError(f"Filter column '{column}' not found")
+            return batch[column]
+        return node.value
+
+    @staticmethod
+    def _mask(value, batch: pd.DataFrame) -> np.ndarray:
+        """Turn a condition into a boolean array; missing counts as False"""
+        if isinstance(value, pd.Series):
+            return value.fillna(False).to_numpy(dtype=bool)
+        if isinstance(value, np.ndarray):
+            return value.astype(bool)
+        return np.full(len(batch), bool(value))
+
+    def __call__(self, batch: pd.DataFrame) -> np.ndarray:
+        """
+        Evaluate the filter on a batch
+
+        Args:
+            batch: DataFrame holding (at least) the filter's columns
+
+        Returns:
+            Boolean array marking the rows to keep
+
+        Raises:
+            ValueError: If a column is missing or the values cannot be compared
+        """
+        try:
+            return self._mask(self._evaluate(self._tree, batch), batch)
+        except TypeError as e:
+            raise ValueError(f"Filter '{self.expression}' could not be evaluated: {e}")
+
+    def validate_columns(self, columns: List[str], source: str) -> None:
+        """
+        Check that every column of the filter exists
+
+        Args:
+            columns: Available column names
+            source: Name of the input, used in the error message
+
+        Raises:
+            ValueError: If a filter column is missing
+        """
+        for column in self.columns:
+            if column not in columns:
+                raise ValueError(f"Filter column '{column}' not found in {source}")
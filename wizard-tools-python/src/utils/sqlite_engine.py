@@ -0,0 +1,248 @@
+"""
+SQLite staging engine for Wizard Tools application
+Bulk-loads inputs into a temporary on-disk SQLite database and combines them with SQL
+"""
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Iterator, List, Optional
+import sys
+
+import pandas as pd
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import JOIN_MEMORY_BUDGET_MB, SPILL_DIRECTORY
+from utils.join_engine import BatchSource, JoinKey, key_columns, hash_join
+from utils.join_planner import output_columns
+
+# Large pages suit bulk loads and long sequential scans
+PAGE_SIZE = 65536
+# Share of the memory budget given to SQLite's page cache
+CACHE_SHARE = 0.5
+# Rows sampled by ANALYZE per index, enough for the query planner
+ANALYSIS_LIMIT = 1000
+# RIGHT and FULL OUTER JOIN need SQLite 3.39
+OUTER_JOIN_VERSION = (3, 39, 0)
+
+
+def _quote(name: str) -> str:
+    """Quote an identifier for SQL"""
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def _column_type(dtype) -> str:
+    """SQLite column type for a pandas dtype"""
+    if pd.api.types.is_bool_dtype(dtype) or pd.api.types.is_integer_dtype(dtype):
+        return 'INTEGER'
+    if pd.api.types.is_float_dtype(dtype):
+        return 'REAL'
+    return 'TEXT'
+
+
+def _sql_rows(batch: pd.DataFrame) -> List[tuple]:
+    """Convert a batch to row tuples of Python values, with None for missing values"""
+    columns = {}
+    for name in batch.columns:
+        column = batch[name]
+        if pd.api.types.is_datetime64_any_dtype(column.dtype):
+            column = column.astype(str)
+        columns[name] = column.astype(object).where(batch[name].notna(), None)
+    return list(pd.DataFrame(columns).itertuples(index=False, name=None))
+
+
+def _restore_types(df: pd.DataFrame, dtypes: dict) -> pd.DataFrame:
+    """Give result columns back the pandas types SQLite does not keep"""
+    for name, dtype in dtypes.items():
+        column = df[name]
+        if isinstance(dtype, pd.api.extensions.ExtensionDtype) and not pd.api.types.is_datetime64_any_dtype(dtype):
+            # Nullable types from a CSV schema come back as floats or objects
+            df[name] = column.astype(dtype)
+        elif pd.api.types.is_datetime64_any_dtype(dtype):
+            df[name] = pd.to_datetime(column)
+        elif pd.api.types.is_bool_dtype(dtype) and column.notna().all():
+            df[name] = column.astype(bool)
+        elif pd.api.types.is_float_dtype(dtype) and column.dtype == object:
+            df[name] = column.astype(float)
+    return df
+
+
+def _load(conn: sqlite3.Connection, table: str, source: BatchSource, batch_rows: int, columns=None) -> pd.DataFrame:
+    """
+    Bulk-load a source into a new table, one transaction for the whole input
+
+    Returns:
+        Empty DataFrame with the source's columns and types
+    """
+    template = None
+    insert = None
+    conn.execute("BEGIN")
+    for batch in source.open_batches(batch_rows, columns=columns):
+        if template is None:
+            template = batch.iloc[0:0]
+            definitions = ", ".join(f"{_quote(name)} {_column_type(dtype)}" for name, dtype in batch.dtypes.items())
+            conn.execute(f"CREATE TABLE {table} ({definitions})")
+            insert = f"INSERT INTO {table} VALUES ({', '.join('?' * len(batch.columns))})"
+        if len(batch):
+            conn.executemany(insert, _sql_rows(batch))
+    conn.execute("COMMIT")
+    if template is None:
+        raise ValueError("Join input produced no data")
+    return template
+
+
+def _connect(path: str, memory_budget_mb: float) -> sqlite3.Connection:
+    """Open the staging database with pragmas for a single-use bulk workload"""
+    conn = sqlite3.connect(path, isolation_level=None)
+    cache_kib = int(memory_budget_mb * 1024 * CACHE_SHARE)
+    for pragma in (
+        f"page_size = {PAGE_SIZE}",
+        "journal_mode = OFF",
+        "synchronous = OFF",
+        "locking_mode = EXCLUSIVE",
+        "temp_store = FILE",
+        f"cache_size = -{max(cache_kib, 2048)}",
+        f"analysis_limit = {ANALYSIS_LIMIT}",
+    ):
+        conn.execute(f"PRAGMA {pragma}")
+    return conn
+
+
+def _join_sql(templates: List[pd.DataFrame], keys: List[str], how: str, labels: List[str]):
+    """
+    Build the SELECT statement for a join chained like DataFrame.merge
+
+    Returns:
+        Tuple of (SQL, output column names)
+    """
+    tables = [f"t{i}" for i in range(len(templates))]
+    renames, final_columns = output_columns([list(t.columns) for t in templates], keys, labels)
+
+    def key_expr(key: str, upto: int) -> str:
+        """Key value of the joined rows of tables[0..upto]"""
+        if how == 'right':
+            return f"{tables[upto]}.{_quote(key)}"
+        if how == 'outer':
+            parts = ", ".join(f"{table}.{_quote(key)}" for table in tables[:upto + 1])
+            return f"COALESCE({parts})" if upto else parts
+        return f"{tables[0]}.{_quote(key)}"
+
+    last = len(tables) - 1
+    select = []
+    for i, (template, table) in enumerate(zip(templates, tables)):
+        for name in template.columns:
+            if name in keys:
+                if i == 0:
+                    select.append(key_expr(name, last))
+                continue
+            select.append(f"{table}.{_quote(name)}")
+
+    join_word = {'inner': 'JOIN', 'left': 'LEFT JOIN', 'right': 'RIGHT JOIN', 'outer': 'FULL OUTER JOIN'}[how]
+    sql = f"SELECT {', '.join(select)} FROM {tables[0]}"
+    for i, table in enumerate(tables[1:], start=1):
+        # IS matches missing keys to missing keys, as DataFrame.merge does
+        condition = " AND ".join(f"{key_expr(key, i - 1)} IS {table}.{_quote(key)}" for key in keys)
+        sql += f" {join_word} {table} ON {condition}"
+
+    if how in ('inner', 'left'):
+        sql += " ORDER BY " + ", ".join(f"{table}.rowid" for table in tables)
+    elif how == 'right':
+        sql += " ORDER BY " + ", ".join(f"{table}.rowid" for table in reversed(tables))
+    return sql, final_columns
+
+
+def _filter_sql(templates: List[pd.DataFrame], keys: List[str], anti: bool):
+    """
+    Build the SELECT statement keeping rows of the first table by key presence
+
+    Returns:
+        Tuple of (SQL, output column names)
+    """
+    tests = []
+    for i in range(1, len(templates)):
+        condition = " AND ".join(f"t{i}.{_quote(key)} IS t0.{_quote(key)}" for key in keys)
+        tests.append(f"EXISTS (SELECT 1 FROM t{i} WHERE {condition})")
+    where = f"NOT ({' OR '.join(tests)})" if anti else " AND ".join(tests)
+    columns = list(templates[0].columns)
+    select = ", ".join(f"t0.{_quote(name)}" for name in columns)
+    return f"SELECT {select} FROM t0 WHERE {where} ORDER BY t0.rowid", columns
+
+
+def sqlite_join(
+    sources: List[BatchSource],
+    key: JoinKey,
+    how: str = 'inner',
+    memory_budget_mb: float = JOIN_MEMORY_BUDGET_MB,
+    spill_dir: Optional[str] = SPILL_DIRECTORY
+) -> Iterator[pd.DataFrame]:
+    """
+    Join or filter inputs in a temporary on-disk SQLite database
+
+    Every input is bulk-loaded in batches (one transaction per input) into a
+    database tuned for a single-use workload, the key columns are indexed once
+    loaded, and the combine runs as one SQL query planned by SQLite. Results
+    are streamed back in batches. Semi and anti joins load only the key
+    columns of the filter inputs. Right and outer joins need SQLite 3.39 or
+    later; with older versions the Grace hash join is used.
+
+    Args:
+        sources: Input batch sources (at least 2), first is the left table
+        key: Join column name, or list of names for a composite key
+        how: Join type ('inner', 'outer', 'left', 'right'), or 'semi' / 'anti'
+            to keep the first input's rows whose key is / is not in the others
+        memory_budget_mb: Memory budget in MB
+        spill_dir: Directory for the staging database (None = system temp)
+
+    Yields:
+        Result DataFrame blocks; inner and left joins in left-table order, right
+        joins in right-table order, semi and anti joins in first-input order
+    """
+    if len(sources) < 2:
+        raise ValueError("At least 2 inputs required for join")
+
+    if how in ('right', 'outer') and sqlite3.sqlite_version_info < OUTER_JOIN_VERSION:
+        yield from hash_join(sources, key, how, memory_budget_mb, spill_dir)
+        return
+
+    keys = key_columns(key)
+    labels = [source.label for source in sources]
+    batch_budget = memory_budget_mb * (1 - CACHE_SHARE)
+
+    with tempfile.TemporaryDirectory(prefix="wizard_sqlite_", dir=spill_dir) as workdir:
+        conn = _connect(os.path.join(workdir, "staging.db"), memory_budget_mb)
+        try:
+            templates = []
+            for i, source in enumerate(sources):
+                # Filters only need the keys of the inputs they test against
+                columns = keys if how in ('semi', 'anti') and i > 0 else None
+                templates.append(_load(conn, f"t{i}", source, source.batch_rows(batch_budget), columns))
+            for i in range(len(sources)):
+                conn.execute(f"CREATE INDEX ix{i} ON t{i} ({', '.join(_quote(k) for k in keys)})")
+            conn.execute("ANALYZE")
+
+            if how in ('semi', 'anti'):
+                sql, names = _filter_sql(templates, keys, how == 'anti')
+                dtypes = dict(templates[0].dtypes)
+            else:
+                sql, names = _join_sql(templates, keys, how, labels)
+                renames, _ = output_columns([list(t.columns) for t in templates], keys, labels)
+                dtypes = {}
+                for template, rename in zip(reversed(templates), reversed(renames)):
+                    dtypes.update({rename[col]: dtype for col, dtype in template.dtypes.items()})
+
+            # The schema of the result, even when the query returns no rows
+            yield pd.DataFrame({name: pd.Series(dtype=dtypes[name]) for name in names})
+
+            fetch_rows = sources[0].batch_rows(batch_budget)
+            cursor = conn.execute(sql)
+            while True:
+                rows = cursor.fetchmany(fetch_rows)
+                if not rows:
+                    break
+                yield _restore_types(pd.DataFrame.from_records(rows, columns=names), dtypes)
+        finally:
+            conn.close()
@@ -11,8 +11,6 @@ parent_dir = Path(__file__).parent.parent
 if str(parent_dir) not in sys.path:
     sys.path.insert(0, str(parent_dir))
 
-from config import MAX_FILE_SIZE_MB
-
 
 def validate_file_exists(file_path: str) -> Tuple[bool, str]:
     """
@@ -36,20 +34,23 @@ def validate_file_exists(file_path: str) -> Tuple[bool, str]:
     return True, ""
 
 
-def validate_file_size(file_path: str, max_size_mb: int = MAX_FILE_SIZE_MB) -> Tuple[bool, str]:
+def validate_file_size(file_path: str, max_size_mb: Optional[float] = None) -> Tuple[bool, str]:
     """
     Validate that a file is not too large
     
+    Data files are not size-limited: operations that would not fit in
+    memory stream instead (see utils.memory_governor).
+    
     Args:
         file_path: Path to the file
-        max_size_mb: Maximum file size in MB
+        max_size_mb: Maximum file size in MB (None for no limit)
         
     Returns:
         Tuple of (is_valid, error_message)
     """
     try:
         size_mb = os.path.getsize(file_path) / (1024 * 1024)
-        if size_mb > max_size_mb:
+        if max_size_mb is not None and size_mb > max_size_mb:
             return False, f"File is too large ({size_mb:.1f}MB). Maximum size is {max_size_mb}MB"
         return True, ""
     except Exception as e:
@@ -88,11 +89,6 @@ def validate_csv_file(file_path: str) -> Tuple[bool, str]:
     if not valid:
         return valid, msg
     
-    # Check file size
-    valid, msg = validate_file_size(file_path)
-    if not valid:
-        return valid, msg
-    
     # Check extension
     valid, msg = validate_file_extension(file_path, ['.csv'])
     if not valid:
@@ -116,11 +112,6 @@ def validate_excel_file(file_path: str) -> Tuple[bool, str]:
     if not valid:
         return valid, msg
     
-    # Check file size
-    valid, msg = validate_file_size(file_path)
-    if not valid:
-        return valid, msg
-    
     # Check extension
     valid, msg = validate_file_extension(file_path, ['.xlsx', '.xls'])
     if not valid:
@@ -144,11 +135,6 @@ def validate_data_file(file_path: str) -> Tuple[bool, str]:
     if not valid:
         return valid, msg
     
-    # Check file size
-    valid, msg = validate_file_size(file_path)
-    if not valid:
-        return valid, msg
-    
     # Check extension
     valid, msg = validate_file_extension(file_path, ['.csv', '.xlsx', '.xls'])
     if not valid:
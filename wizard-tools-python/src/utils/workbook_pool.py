@@ -0,0 +1,196 @@
+"""
+Workbook handle pool for Wizard Tools application
+Keeps recently used workbooks open, so listing sheets, detecting columns and reading sheets share one parsed workbook
+"""
+from collections import OrderedDict
+from contextlib import contextmanager
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Iterator, List, Tuple
+import sys
+
+import pandas as pd
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import NA_VALUES
+
+# Memory an open workbook holds (shared strings, styles, sheet index, the
+# mapped or buffered file) per byte of the file on disk
+HANDLE_MEMORY_FACTOR = 2
+
+
+class PandasWorkbook:
+    """A workbook opened by one of pandas' Excel engines"""
+
+    def __init__(self, file_path: str, engine: str):
+        """
+        Open a workbook
+
+        Args:
+            file_path: Path to the Excel file
+            engine: pandas Excel engine, e.g. 'openpyxl'
+        """
+        self._excel_file = pd.ExcelFile(file_path, engine=engine)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """Close the workbook file"""
+        self._excel_file.close()
+
+    @property
+    def sheet_names(self) -> List[str]:
+        """Sheet names in workbook order"""
+        return self._excel_file.sheet_names
+
+    def read_sheet(self, sheet_name=0, **kwargs) -> pd.DataFrame:
+        """
+        Read one worksheet
+
+        Args:
+            sheet_name: Sheet name or zero-based position
+            **kwargs: Additional arguments for pandas.read_excel
+
+        Returns:
+            DataFrame with the NA handling of FileProcessor.read_file
+        """
+        return pd.read_excel(self._excel_file, sheet_name=sheet_name, na_values=NA_VALUES, keep_default_na=False, **kwargs)
+
+
+class _Entry:
+    """An open workbook in the pool"""
+
+    def __init__(self, stamp: Tuple[int, int], workbook, memory: int):
+        self.stamp = stamp
+        self.workbook = workbook
+        self.memory = memory
+        # Reads of one workbook take turns; engines keep per-workbook read state
+        self.lock = threading.Lock()
+        self.users = 0
+        self.removed = False
+
+
+class WorkbookPool:
+    """
+    Open workbooks, least recently used first out
+
+    Workbooks are keyed by path and engine, and each is stamped with the
+    file's modification time and size: a workbook that changed on disk is
+    reopened rather than served stale. When more than max_workbooks are
+    open, or their estimated memory exceeds max_memory_mb, the least
+    recently used are closed. A workbook evicted while a read is using it
+    is closed when that read finishes.
+
+    Workbooks inherited by a forked worker process are dropped in the child
+    without closing them, since the parent still uses the same files.
+    """
+
+    def __init__(self, opener: Callable[[str, str], object], max_workbooks: int, max_memory_mb: float):
+        """
+        Create an empty pool
+
+        Args:
+            opener: Opens a workbook from (file_path, engine); the result has
+                sheet_names, read_sheet() and close()
+            max_workbooks: Most workbooks kept open (0 to open one per read)
+            max_memory_mb: Approximate memory the open workbooks may hold
+        """
+        self._opener = opener
+        self.max_workbooks = max_workbooks
+        self.max_memory = max_memory_mb * 1024 * 1024
+        self._forget()
+        if hasattr(os, 'register_at_fork'):
+            os.register_at_fork(after_in_child=self._forget)
+
+    def _forget(self) -> None:
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def memory(self) -> int:
+        """Estimated memory held by the open workbooks, in bytes"""
+        return sum(entry.memory for entry in self._entries.values())
+
+    @contextmanager
+    def open(self, file_path: str, engine: str) -> Iterator[object]:
+        """
+        Use a workbook, opening it only if no current handle is pooled
+
+        Args:
+            file_path: Path to the workbook
+            engine: Engine name passed to the opener
+
+        Yields:
+            The open workbook; other threads' reads of it wait until the
+            block exits
+        """
+        entry = self._acquire(file_path, engine)
+        try:
+            with entry.lock:
+                yield entry.workbook
+        finally:
+            with self._lock:
+                entry.users -= 1
+                if entry.removed and not entry.users:
+                    entry.workbook.close()
+
+    def discard(self, file_path: str) -> None:
+        """Close every pooled workbook of a file, e.g. before overwriting it"""
+        path = os.path.abspath(file_path)
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == path]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        """Close every pooled workbook"""
+        with self._lock:
+            for key in list(self._entries):
+                self._remove(key)
+
+    def _acquire(self, file_path: str, engine: str) -> _Entry:
+        key = (os.path.abspath(file_path), engine)
+        stat = os.stat(file_path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.stamp == stamp:
+                    self._entries.move_to_end(key)
+                    entry.users += 1
+                    return entry
+                self._remove(key)
+
+        # Parse outside the pool lock so other workbooks stay usable meanwhile
+        entry = _Entry(stamp, self._opener(file_path, engine), stat.st_size * HANDLE_MEMORY_FACTOR)
+        entry.users = 1
+        with self._lock:
+            if self.max_workbooks < 1 or entry.memory > self.max_memory:
+                entry.removed = True
+                return entry
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            while len(self._entries) > 1 and (
+                len(self._entries) > self.max_workbooks or self.memory > self.max_memory
+            ):
+                self._remove(next(iter(self._entries)))
+        return entry
+
+    def _remove(self, key: Tuple[str, str]) -> None:
+        """Take a workbook out of the pool, closing it unless a read is using it (pool lock held)"""
+        entry = self._entries.pop(key)
+        entry.removed = True
+        if not entry.users:
+            entry.workbook.close()
@@ -0,0 +1,105 @@
+"""
+Legacy xls reader for Wizard Tools application
+Opens .xls workbooks in xlrd's on-demand mode, so listing sheets or reading one sheet parses only what it needs
+"""
+from pathlib import Path
+from typing import List, Union
+import sys
+
+import pandas as pd
+import xlrd
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import NA_VALUES
+
+
+class XlsWorkbook:
+    """
+    An open .xls workbook
+
+    xlrd normally parses every sheet when a workbook is opened. Here only the
+    workbook globals (sheet list, shared strings, formats) are parsed up
+    front; each sheet is parsed when it is read and unloaded again right
+    after, so one open workbook can serve sheet listing and any number of
+    reads while holding at most one parsed sheet.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Open a workbook
+
+        Args:
+            file_path: Path to the .xls file
+        """
+        self._book = xlrd.open_workbook(file_path, on_demand=True)
+        # pandas closes workbooks it opened itself; wrapping the book once
+        # keeps it open across reads
+        self._excel_file = pd.ExcelFile(self._book, engine='xlrd')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """Release the file and the workbook globals"""
+        self._excel_file.close()
+
+    @property
+    def sheet_names(self) -> List[str]:
+        """Sheet names in workbook order"""
+        return self._book.sheet_names()
+
+    def sheet_loaded(self, sheet_name: Union[str, int]) -> bool:
+        """Whether a sheet is currently parsed and held in memory"""
+        return self._book.sheet_loaded(sheet_name)
+
+    def read_sheet(self, sheet_name: Union[str, int] = 0, **kwargs) -> pd.DataFrame:
+        """
+        Read one worksheet, then release it
+
+        Args:
+            sheet_name: Sheet name or zero-based position
+            **kwargs: Additional arguments for pandas.read_excel
+
+        Returns:
+            DataFrame equal to pandas.read_excel with the xlrd engine
+
+        Raises:
+            ValueError: If the sheet does not exist
+        """
+        try:
+            return pd.read_excel(
+                self._excel_file, sheet_name=sheet_name, na_values=NA_VALUES, keep_default_na=False, **kwargs
+            )
+        finally:
+            for index in range(self._book.nsheets):
+                if self._book.sheet_loaded(index):
+                    self._book.unload_sheet(index)
+
+
+def sheet_names(file_path: str) -> List[str]:
+    """Sheet names of an xls workbook, in workbook order, without parsing any sheet"""
+    with XlsWorkbook(file_path) as workbook:
+        return workbook.sheet_names
+
+
+def read_excel(file_path: str, sheet_name: Union[str, int] = 0, **kwargs) -> pd.DataFrame:
+    """
+    Read one worksheet of an xls file, parsing no other sheet
+
+    Args:
+        file_path: Path to the .xls file
+        sheet_name: Sheet name or zero-based position
+        **kwargs: Additional arguments for pandas.read_excel
+
+    Returns:
+        DataFrame equal to pandas.read_excel with the xlrd engine
+    """
+    with XlsWorkbook(file_path) as workbook:
+        return workbook.read_sheet(sheet_name, **kwargs)
@@ -0,0 +1,557 @@
+"""
+Native xlsx reader for Wizard Tools application
+Parses worksheet XML straight from the zip package into column arrays, without building a cell object per value
+"""
+from contextlib import contextmanager
+import gc
+import html
+import posixpath
+import re
+import zipfile
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Union
+import sys
+
+import numpy as np
+import pandas as pd
+from pandas.io.parsers import TextParser
+from openpyxl.styles.numbers import builtin_format_code, is_date_format, is_timedelta_format
+from openpyxl.utils.datetime import MAC_EPOCH, WINDOWS_EPOCH, from_excel, from_ISO8601
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import NA_VALUES
+
+# Decompressed sheet XML parsed per block
+BLOCK_BYTES = 4 * 1024 * 1024
+
+# Cell kinds, from the cell's type and style attributes
+EMPTY, NUMBER, DATE, TIMEDELTA, SHARED, INLINE, TEXT, BOOL, ERROR, ISO_DATE = range(10)
+_TYPES = {b'n': NUMBER, b's': SHARED, b'inlineStr': INLINE, b'str': TEXT, b'b': BOOL, b'e': ERROR, b'd': ISO_DATE}
+
+# A cell with its column letters, row number, other attributes and content;
+# plain values and simple inline strings get their own groups so most cells
+# need no further parsing
+_CELL = re.compile(
+    rb'<c r="([A-Z]{1,3})(\d+)"([^>]*)>(?:(?<=/>)|<v>([^<]*)</v></c>|<is><t>([^<]*)</t></is></c>|(.*?)</c>)',
+    re.S
+)
+_ATTRIBUTE = re.compile(rb'([\w:]+)="([^"]*)"')
+_VALUE = re.compile(rb'<v>([^<]*)</v>')
+_TEXT_RUN = re.compile(rb'<t\b[^>]*?(?:/>|>([^<]*)</t>)')
+_PHONETIC = re.compile(rb'<rPh\b.*?</rPh>', re.S)
+_SHARED_STRING = re.compile(rb'<si>(?:<t>([^<]*)</t>|(.*?))</si>|<si/>', re.S)
+_SHEET = re.compile(rb'<sheet\b([^>]*?)/?>')
+_RELATIONSHIP = re.compile(rb'<Relationship\b([^>]*?)/?>')
+_NUMBER_FORMAT = re.compile(rb'<numFmt\b([^>]*?)/?>')
+_CELL_FORMATS = re.compile(rb'<cellXfs\b[^>]*>(.*?)</cellXfs>', re.S)
+_CELL_FORMAT = re.compile(rb'<xf\b([^>]*?)/?>')
+# Sheets written with namespace prefixes (<x:c>) are left to openpyxl
+_PREFIXED = re.compile(rb'<\w+:(?:sheetData|row|c)\b')
+
+# Integral numbers from here on are not kept as floats by pandas
+_EXACT_INTEGERS = 2 ** 53
+_MS_PER_DAY = 86400 * 1000
+
+
+class NativeXlsxError(ValueError):
+    """The workbook uses features the native reader does not parse; read it with openpyxl instead"""
+
+
+def _attributes(xml: bytes) -> Dict[bytes, bytes]:
+    """Attributes of an element's start tag, without namespace prefixes"""
+    return {name.rsplit(b':', 1)[-1]: value for name, value in _ATTRIBUTE.findall(xml)}
+
+
+def _decode(text: bytes) -> str:
+    """Decode XML character data, resolving entities and line breaks as an XML parser does"""
+    value = text.decode('utf-8')
+    if '\r' in value:
+        value = value.replace('\r\n', '\n').replace('\r', '\n')
+    if '&' in value:
+        value = html.unescape(value)
+    return value
+
+
+def _decode_all(texts: List[bytes]) -> List[str]:
+    """Decode many values at once (see _decode); NUL cannot occur in XML, so it separates them"""
+    if not texts:
+        return []
+    return _decode(b'\x00'.join(texts)).split('\x00')
+
+
+def _text_runs(xml: bytes) -> bytes:
+    """Undecoded text of a string item or inline string with formatting runs (phonetic hints dropped)"""
+    return b''.join(_TEXT_RUN.findall(_PHONETIC.sub(b'', xml)))
+
+
+def _column_number(letters: bytes) -> int:
+    """Zero-based index of a column from its letters ('A' is 0)"""
+    number = 0
+    for letter in letters:
+        number = number * 26 + letter - 64
+    return number - 1
+
+
+@contextmanager
+def _gc_paused():
+    """Pause the cyclic garbage collector, which the millions of short-lived match tuples would keep triggering"""
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _number(raw: bytes) -> Union[int, float]:
+    """A numeric cell value as pandas' openpyxl engine gives it: an int when integral"""
+    if b'.' in raw or b'e' in raw or b'E' in raw:
+        value = float(raw)
+        return int(value) if value.is_integer() else value
+    return int(raw)
+
+
+class XlsxWorkbook:
+    """
+    An open xlsx workbook read with the native reader
+
+    The shared strings and cell styles are decoded once, when the first sheet
+    is read, and reused for every sheet. Values come out as pandas' openpyxl
+    engine gives them, and read_sheet returns the same DataFrame as
+    pandas.read_excel with that engine.
+    """
+
+    def __init__(self, file_path: str):
+        """
+        Open a workbook
+
+        Args:
+            file_path: Path to the .xlsx file
+
+        Raises:
+            NativeXlsxError: If the file is not an xlsx package this reader handles
+        """
+        try:
+            self._archive = zipfile.ZipFile(file_path)
+            workbook_path = self._part_targets('_rels/.rels', '').get('officeDocument', 'xl/workbook.xml')
+            workbook = self._archive.read(workbook_path)
+        except (zipfile.BadZipFile, KeyError, OSError) as e:
+            self.close()
+            raise NativeXlsxError(f"Not a readable xlsx package: {e}")
+
+        directory = posixpath.dirname(workbook_path)
+        relationships = posixpath.join(directory, '_rels', posixpath.basename(workbook_path) + '.rels')
+        targets = self._relationship_targets(relationships, directory)
+        self._sheets: Dict[str, str] = {}
+        for element in _SHEET.findall(workbook):
+            attributes = _attributes(element)
+            self._sheets[_decode(attributes[b'name'])] = targets.get(attributes.get(b'id', b'').decode(), '')
+
+        properties = re.search(rb'<(?:\w+:)?workbookPr\b([^>]*?)/?>', workbook)
+        date1904 = properties is not None and _attributes(properties.group(1)).get(b'date1904') in (b'1', b'true')
+        self._epoch = MAC_EPOCH if date1904 else WINDOWS_EPOCH
+
+        types = self._part_targets(relationships, directory)
+        self._shared_strings_path = types.get('sharedStrings')
+        self._styles_path = types.get('styles')
+        self._shared_strings: Optional[np.ndarray] = None
+        self._blank_strings: Optional[np.ndarray] = None
+        self._styles: Optional[Dict[bytes, int]] = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self) -> None:
+        """Close the zip package"""
+        archive = getattr(self, '_archive', None)
+        if archive is not None:
+            archive.close()
+
+    @property
+    def sheet_names(self) -> List[str]:
+        """Sheet names in workbook order"""
+        return list(self._sheets)
+
+    def _relationships(self, path: str, directory: str) -> List[Tuple[str, str, str]]:
+        """(id, type, resolved target path) of each relationship in a .rels part"""
+        try:
+            xml = self._archive.read(path)
+        except KeyError:
+            return []
+        result = []
+        for element in _RELATIONSHIP.findall(xml):
+            attributes = _attributes(element)
+            target = _decode(attributes.get(b'Target', b''))
+            if target.startswith('/'):
+                target = target.lstrip('/')
+            else:
+                target = posixpath.normpath(posixpath.join(directory, target))
+            result.append((attributes.get(b'Id', b'').decode(), attributes.get(b'Type', b'').decode(), target))
+        return result
+
+    def _relationship_targets(self, path: str, directory: str) -> Dict[str, str]:
+        """Target part of each relationship id"""
+        return {rel_id: target for rel_id, _, target in self._relationships(path, directory)}
+
+    def _part_targets(self, path: str, directory: str) -> Dict[str, str]:
+        """Target part by the last segment of the relationship type ('styles', 'sharedStrings', ...)"""
+        return {rel_type.rsplit('/', 1)[-1]: target for _, rel_type, target in self._relationships(path, directory)}
+
+    def _load_shared_strings(self) -> np.ndarray:
+        """Decode the shared strings table once into an object array indexed by string number"""
+        if self._shared_strings is None:
+            texts = []
+            if self._shared_strings_path in self._archive.namelist():
+                xml = self._archive.read(self._shared_strings_path)
+                texts = [plain or _text_runs(rich) for plain, rich in _SHARED_STRING.findall(xml)]
+            # openpyxl drops the escape of literal '_xHHHH_' text the same way
+            strings = [text.replace('x005F_', '') for text in _decode_all(texts)]
+            self._shared_strings = np.array(strings, dtype=object)
+            self._blank_strings = np.array([not text for text in strings], dtype=bool)
+        return self._shared_strings
+
+    def _load_styles(self) -> Dict[bytes, int]:
+        """Map the style attribute of number cells in date or duration formats to DATE or TIMEDELTA"""
+        if self._styles is None:
+            self._styles = {}
+            if self._styles_path in self._archive.namelist():
+                xml = self._archive.read(self._styles_path)
+                custom = {}
+                for element in _NUMBER_FORMAT.findall(xml):
+                    attributes = _attributes(element)
+                    custom[int(attributes[b'numFmtId'])] = _decode(attributes.get(b'formatCode', b''))
+                cell_formats = _CELL_FORMATS.search(xml)
+                for index, element in enumerate(_CELL_FORMAT.findall(cell_formats.group(1) if cell_formats else b'')):
+                    format_id = int(_attributes(element).get(b'numFmtId', b'0'))
+                    code = custom[format_id] if format_id in custom else builtin_format_code(format_id)
+                    if is_date_format(code):
+                        self._styles[str(index).encode()] = TIMEDELTA if is_timedelta_format(code) else DATE
+        return self._styles
+
+    def _sheet_path(self, sheet_name: Union[str, int]) -> str:
+        """Package path of a worksheet, looked up like pandas does"""
+        if isinstance(sheet_name, int):
+            if not 0 <= sheet_name < len(self._sheets):
+                raise ValueError(f"Worksheet index {sheet_name} is invalid, {len(self._sheets)} worksheets found")
+            path = list(self._sheets.values())[sheet_name]
+        elif sheet_name in self._sheets:
+            path = self._sheets[sheet_name]
+        else:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        if '/worksheets/' not in '/' + path or path not in self._archive.namelist():
+            raise NativeXlsxError(f"Sheet {sheet_name!r} is not a worksheet")
+        return path
+
+    def _kind(self, attributes: bytes) -> int:
+        """Cell kind for the attributes of a cell after its reference"""
+        parsed = _attributes(attributes)
+        kind = _TYPES.get(parsed.get(b't', b'n'))
+        if kind is None:
+            raise NativeXlsxError(f"Unknown cell type {parsed[b't']!r}")
+        if kind == NUMBER:
+            return self._load_styles().get(parsed.get(b's', b'0'), NUMBER)
+        return kind
+
+    def _blocks(self, path: str, max_row: Optional[int]):
+        """
+        Parse a worksheet block by block into cell arrays
+
+        Yields:
+            Tuples of (zero-based rows, zero-based columns, kinds, values) of
+            the non-empty cells of each block, rows at most max_row. Numbers
+            and dates are their raw text; strings, booleans, errors (NaN) and
+            ISO dates are decoded.
+        """
+        kinds: Dict[bytes, int] = {}
+        columns: Dict[bytes, int] = {}
+        cells_seen = 0
+        with self._archive.open(path) as source:
+            pending = b''
+            while True:
+                data = source.read(BLOCK_BYTES)
+                pending += data
+                # Cut blocks after complete rows
+                end = pending.rfind(b'</row>') + len(b'</row>') if data else len(pending)
+                if data and end < len(b'</row>'):
+                    continue
+                block, pending = pending[:end], pending[end:]
+                if not cells_seen and block[:2] in (b'\xff\xfe', b'\xfe\xff'):
+                    raise NativeXlsxError("Worksheet XML is not UTF-8")
+                if _PREFIXED.search(block):
+                    raise NativeXlsxError("Worksheet XML uses namespace prefixes")
+
+                cells = _CELL.findall(block)
+                # Cells without a leading reference (allowed, but rarely written) are left to openpyxl
+                if len(cells) != block.count(b'<c ') + block.count(b'<c>'):
+                    raise NativeXlsxError("Worksheet has cells without references")
+                cells_seen += len(cells)
+                if cells:
+                    letters, row_numbers, attributes, plain, inline, other = zip(*cells)
+
+                    codes, uniques = pd.factorize(np.array(row_numbers, dtype=object))
+                    rows = np.array([int(number) - 1 for number in uniques], dtype=np.int64)[codes]
+                    codes, uniques = pd.factorize(np.array(letters, dtype=object))
+                    cols = np.array([
+                        columns.setdefault(letter, _column_number(letter)) for letter in uniques
+                    ], dtype=np.int64)[codes]
+                    codes, uniques = pd.factorize(np.array(attributes, dtype=object))
+                    kind = np.array([
+                        kinds[key] if key in kinds else kinds.setdefault(key, self._kind(key)) for key in uniques
+                    ], dtype=np.int8)[codes]
+
+                    values = np.array(plain, dtype=object)
+                    is_inline = kind == INLINE
+                    values[is_inline] = np.array(inline, dtype=object)[is_inline]
+                    # Formulas, rich inline text and other content need a closer look
+                    for i in [i for i, content in enumerate(other) if content]:
+                        if kind[i] == INLINE:
+                            values[i] = _text_runs(other[i])
+                        else:
+                            match = _VALUE.search(other[i])
+                            values[i] = match.group(1) if match else b''
+                    kind[np.fromiter(map(len, values), dtype=np.int64, count=len(values)) == 0] = EMPTY
+
+                    for cell_kind in (SHARED, INLINE, TEXT, BOOL, ERROR, ISO_DATE):
+                        where = np.flatnonzero(kind == cell_kind)
+                        if not len(where):
+                            continue
+                        raw = values[where].tolist()
+                        if cell_kind == SHARED:
+                            index = np.array(raw).astype(np.int64)
+                            values[where] = self._load_shared_strings()[index]
+                            # Empty strings are blank cells, as pandas' openpyxl engine sees them
+                            kind[where[self._blank_strings[index]]] = EMPTY
+                        elif cell_kind in (INLINE, TEXT):
+                            values[where] = _decode_all(raw)
+                        elif cell_kind == BOOL:
+                            values[where] = [value != b'0' for value in raw]
+                        elif cell_kind == ERROR:
+                            values[where] = np.nan
+                        else:
+                            values[where] = [from_ISO8601(value.decode()) for value in raw]
+
+                    keep = kind != EMPTY
+                    if max_row is not None:
+                        keep &= rows <= max_row
+                    yield rows[keep], cols[keep], kind[keep], values[keep]
+                    if max_row is not None and rows.min() > max_row:
+                        return
+                if not data:
+                    return
+
+    def _to_python(self, kinds: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Cell values as the Python objects pandas' openpyxl engine builds rows from"""
+        values = values.copy()
+        for i in np.flatnonzero(kinds == NUMBER):
+            values[i] = _number(values[i])
+        for i in np.flatnonzero((kinds == DATE) | (kinds == TIMEDELTA)):
+            try:
+                values[i] = from_excel(_number(values[i]), self._epoch, timedelta=kinds[i] == TIMEDELTA)
+            except (OverflowError, ValueError):
+                # openpyxl turns out of range dates into error cells
+                values[i] = np.nan
+        return values
+
+    def _dates(self, raw: np.ndarray) -> Optional[np.ndarray]:
+        """
+        Convert date serials to datetime64, as openpyxl's from_excel would
+
+        Returns:
+            Millisecond datetimes, or None if any value is a time of day
+            (serial below 1) or out of range
+        """
+        serials = np.array(raw.tolist()).astype(np.float64)
+        if not len(serials) or serials.min() < 1 or serials.max() > 2958466:
+            return None
+        days = np.floor(serials)
+        # from_excel rounds the time of day to milliseconds
+        ms = np.round((serials - days) * 86400 * 1000).astype(np.int64)
+        if self._epoch == WINDOWS_EPOCH:
+            # Serials before 1900-03-01 count the non-existent 1900-02-29
+            days[serials < 60] += 1
+        epoch = np.datetime64(self._epoch, 'ms')
+        return epoch + (days.astype(np.int64) * _MS_PER_DAY + ms).astype('timedelta64[ms]')
+
+    def _column(self, kinds: np.ndarray, values: np.ndarray, rows: np.ndarray, height: int) -> Optional[np.ndarray]:
+        """
+        Build a column directly when its pandas type is certain
+
+        Numbers become int64 (float64 with blanks or fractions), dates
+        datetime64 and booleans without blanks bool. Other columns, such as
+        text that may hold numbers, are left to pandas' type inference.
+
+        Returns:
+            The column, or None to infer its type with pandas
+        """
+        full = len(rows) == height
+        present = set(np.unique(kinds).tolist())
+        if not present:
+            return np.full(height, np.nan)
+        if present == {NUMBER}:
+            numbers = np.array(values.tolist()).astype(np.float64)
+            if np.any(np.abs(numbers) >= _EXACT_INTEGERS):
+                # pandas turns these into Python ints, giving uint64 or object columns
+                return None
+            if full and np.all(numbers == np.floor(numbers)):
+                return numbers.astype(np.int64)
+            column = np.full(height, np.nan)
+            column[rows] = numbers
+            return column
+        if present == {DATE}:
+            dates = self._dates(values)
+            if dates is None:
+                return None
+            column = np.full(height, np.datetime64('NaT'), dtype='datetime64[ms]')
+            column[rows] = dates
+            return column.astype(_datetime_dtype())
+        if present == {BOOL} and full:
+            return values.astype(bool)
+        return None
+
+    def read_sheet(
+        self,
+        sheet_name: Union[str, int] = 0,
+        usecols: Optional[List[str]] = None,
+        nrows: Optional[int] = None
+    ) -> pd.DataFrame:
+        """
+        Read a worksheet into a DataFrame
+
+        The first row holds the column names. Only NA_VALUES are missing
+        values, as in FileProcessor.read_file.
+
+        Args:
+            sheet_name: Sheet name or zero-based position
+            usecols: Only return the columns with these names (None for all)
+            nrows: Only read this many data rows (None for all)
+
+        Returns:
+            DataFrame equal to pandas.read_excel with the openpyxl engine
+
+        Raises:
+            ValueError: If the sheet does not exist or usecols names a missing column
+            NativeXlsxError: If the sheet uses features this reader does not parse,
+                or usecols is not a list of names
+        """
+        if usecols is not None and not all(isinstance(name, str) for name in usecols):
+            raise NativeXlsxError("usecols holds column positions rather than names")
+        path = self._sheet_path(sheet_name)
+        with _gc_paused():
+            blocks = list(self._blocks(path, nrows))
+        rows = np.concatenate([block[0] for block in blocks]) if blocks else np.zeros(0, np.int64)
+        if not len(rows):
+            return pd.DataFrame()
+        cols = np.concatenate([block[1] for block in blocks])
+        kinds = np.concatenate([block[2] for block in blocks])
+        values = np.concatenate([block[3] for block in blocks])
+        del blocks
+
+        # Cells grouped by column, each column in row order
+        order = np.lexsort((rows, cols))
+        rows, cols, kinds, values = rows[order], cols[order], kinds[order], values[order]
+        width = int(cols.max()) + 1
+        height = int(rows.max())
+        bounds = np.searchsorted(cols, np.arange(width + 1))
+
+        header = [''] * width
+        for j in range(width):
+            start, stop = bounds[j], bounds[j + 1]
+            if start < stop and rows[start] == 0:
+                header[j] = self._to_python(kinds[start:start + 1], values[start:start + 1])[0]
+        names = list(_parse([header], header=0).columns)
+        if usecols is not None:
+            missing = [name for name in usecols if name not in names]
+            if missing:
+                raise ValueError(f"Usecols do not match columns, columns expected but not found: {missing}")
+            selected = [j for j, name in enumerate(names) if name in set(usecols)]
+        else:
+            selected = list(range(width))
+        if height == 0:
+            return _parse([header], header=0, usecols=usecols)
+
+        data = {}
+        inferred = []
+        for j in selected:
+            start, stop = bounds[j], bounds[j + 1]
+            if start < stop and rows[start] == 0:
+                start += 1
+            column_rows = rows[start:stop] - 1
+            column = self._column(kinds[start:stop], values[start:stop], column_rows, height)
+            if column is None:
+                column = np.full(height, '', dtype=object)
+                column[column_rows] = self._to_python(kinds[start:stop], values[start:stop])
+                inferred.append(j)
+            data[names[j]] = column
+
+        if inferred:
+            # pandas' own inference for mixed and text columns, so numbers
+            # stored as text and the like come out as with openpyxl
+            frame = _parse(
+                list(zip(*(data[names[j]] for j in inferred))),
+                header=None,
+                names=[names[j] for j in inferred]
+            )
+            for j in inferred:
+                data[names[j]] = frame[names[j]]
+        return pd.DataFrame(data, index=pd.RangeIndex(height))
+
+
+def _parse(rows: list, **kwargs) -> pd.DataFrame:
+    """Run pandas' Excel row parser with the NA handling of read_file"""
+    return TextParser(rows, na_values=NA_VALUES, keep_default_na=False, skip_blank_lines=False, **kwargs).read()
+
+
+_DATETIME_DTYPE = None
+
+
+def _datetime_dtype():
+    """dtype pandas infers for a column of datetimes (microseconds from pandas 3, nanoseconds before)"""
+    global _DATETIME_DTYPE
+    if _DATETIME_DTYPE is None:
+        _DATETIME_DTYPE = _parse([['date'], [WINDOWS_EPOCH]], header=0)['date'].dtype
+    return _DATETIME_DTYPE
+
+
+def sheet_names(file_path: str) -> List[str]:
+    """
+    Sheet names of an xlsx workbook, in workbook order
+
+    Raises:
+        NativeXlsxError: If the file is not an xlsx package this reader handles
+    """
+    with XlsxWorkbook(file_path) as workbook:
+        return workbook.sheet_names
+
+
+def read_excel(
+    file_path: str,
+    sheet_name: Union[str, int] = 0,
+    usecols: Optional[List[str]] = None,
+    nrows: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Read one worksheet of an xlsx file (see XlsxWorkbook.read_sheet)
+
+    Args:
+        file_path: Path to the .xlsx file
+        sheet_name: Sheet name or zero-based position
+        usecols: Only return these columns (None for all)
+        nrows: Only read this many data rows (None for all)
+
+    Returns:
+        DataFrame equal to pandas.read_excel with the openpyxl engine
+
+    Raises:
+        ValueError: If the sheet does not exist or usecols names a missing column
+        NativeXlsxError: If the workbook uses features this reader does not parse
+    """
+    with XlsxWorkbook(file_path) as workbook:
+        return workbook.read_sheet(sheet_name, usecols, nrows)
@@ -0,0 +1,101 @@
+"""
+Test the optional Arrow CSV engine against the C parser
+"""
+import os
+import tempfile
+import pandas as pd
+import pytest
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.file_processor import FileProcessor
+from utils import arrow_csv, reader_engines
+
+# Blank and whitespace cells are missing, 'NA' is a region; dates stay text
+SAMPLE = (
+    "id,name,region,shipped,amount,unused\n"
+    "1,Alice,NA,2024-01-01,1.5,\n"
+    "2, ,NE,2024-01-02, ,\n"
+    "3,\"\",SW,,3,\n"
+    "4,\"Smith, J\",NA,2024-01-04,4,\n"
+)
+
+
+def _write_sample(tmp_dir: str) -> str:
+    path = os.path.join(tmp_dir, "sample.csv")
+    with open(path, 'w', newline='') as f:
+        f.write(SAMPLE)
+    return path
+
+
+@pytest.mark.skipif(not arrow_csv.available(), reason="pyarrow not installed")
+def test_engines_read_the_same_values():
+    """Test that both engines give the same values and missing cells"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = _write_sample(tmp_dir)
+
+        expected = FileProcessor.read_file(path, csv_engine='c')
+        actual = FileProcessor.read_file(path, csv_engine='pyarrow')
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+        assert actual['region'].tolist() == ['NA', 'NE', 'SW', 'NA']
+
+        batches = list(FileProcessor.read_batches(path, 3, columns=['region', 'id'], csv_engine='pyarrow'))
+        assert [len(batch) for batch in batches] == [3, 1]
+        pd.testing.assert_frame_equal(pd.concat(batches), expected[['id', 'region']], check_dtype=False)
+        print("✓ Arrow and C parsers agree")
+
+
+def test_engine_choice():
+    """Test engine validation and that chunking keeps the read_file NA handling"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = _write_sample(tmp_dir)
+
+        try:
+            FileProcessor.read_file(path, csv_engine='fast')
+            raise AssertionError("accepted an unknown engine")
+        except ValueError as e:
+            assert "Unknown CSV engine" in str(e)
+
+        success, files, error = FileProcessor.chunk_file(path, os.path.join(tmp_dir, "chunks"), 10)
+        assert success, error
+        chunk = pd.read_csv(files[0], keep_default_na=False)
+        assert chunk['region'].tolist() == ['NA', 'NE', 'SW', 'NA']
+
+
+def test_without_pyarrow():
+    """Test that 'auto' reads with the C parser and 'pyarrow' asks for the package when pyarrow is missing"""
+    # A None entry makes importing pyarrow fail, as if it were not installed
+    saved = {name: sys.modules[name] for name in list(sys.modules) if name == 'pyarrow' or name.startswith('pyarrow.')}
+    sys.modules['pyarrow'] = None
+    reader_engines._rankings.clear()
+    try:
+        assert reader_engines.available_engines('.csv') == ['c']
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = _write_sample(tmp_dir)
+            df = FileProcessor.read_file(path, csv_engine='auto')
+            assert df['region'].tolist() == ['NA', 'NE', 'SW', 'NA'] and df['name'].isna().tolist() == [False, True, True, False]
+            assert not FileProcessor._use_arrow(path, 'auto', {})
+            assert len(pd.concat(FileProcessor.read_batches(path, 3, csv_engine='auto'))) == 4
+
+            try:
+                FileProcessor.read_file(path, csv_engine='pyarrow')
+                raise AssertionError("used pyarrow without it installed")
+            except ValueError as e:
+                assert "needs the pyarrow package" in str(e)
+    finally:
+        del sys.modules['pyarrow']
+        sys.modules.update(saved)
+        reader_engines._rankings.clear()
+
+
+if __name__ == "__main__":
+    if arrow_csv.available():
+        test_engines_read_the_same_values()
+    test_engine_choice()
+    test_without_pyarrow()
+    print("\n✓ All Arrow CSV tests passed!")
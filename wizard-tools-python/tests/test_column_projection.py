@@ -0,0 +1,127 @@
+"""
+Test choosing the columns kept from each input of joins and unions
+"""
+import os
+import tempfile
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.file_processor import FileProcessor
+
+
+def _write_inputs(tmp_dir: str):
+    """Write a CSV and an Excel input sharing the 'sku' and 'name' columns"""
+    sales = pd.DataFrame({
+        'sku': [1, 2, 3, 4],
+        'name': ['a', 'b', 'c', 'd'],
+        'qty': [5, 6, 7, 8],
+        'notes': ['x', 'y', 'z', 'w']
+    })
+    prices = pd.DataFrame({
+        'region': ['NA', 'EU', 'NA', 'EU'],
+        'sku': [2, 3, 4, 5],
+        'name': ['B', 'C', 'D', 'E'],
+        'price': [1.5, 2.5, 3.5, 4.5]
+    })
+    sales_path = os.path.join(tmp_dir, "sales.csv")
+    prices_path = os.path.join(tmp_dir, "prices.xlsx")
+    sales.to_csv(sales_path, index=False)
+    prices.to_excel(prices_path, index=False)
+    return sales_path, prices_path
+
+
+def test_join_keeps_selected_columns():
+    """Test that every engine outputs only the selected columns plus the key"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sales_path, prices_path = _write_inputs(tmp_dir)
+        columns = {sales_path: ['qty', 'name'], prices_path: ['price']}
+
+        for engine in ['memory', 'sort_merge', 'hash', 'broadcast']:
+            for join_type in ['inner', 'left', 'outer']:
+                output = os.path.join(tmp_dir, f"{engine}_{join_type}.csv")
+                success, error = FileProcessor.join_files(
+                    [sales_path, prices_path], output, 'sku', join_type, engine=engine, columns=columns
+                )
+                assert success, error
+                result = pd.read_csv(output)
+                # No suffixed duplicates: the second file's 'name' was never read
+                assert list(result.columns) == ['sku', 'name', 'qty', 'price'], (engine, list(result.columns))
+        print("✓ joins keep only the selected columns")
+
+        output = os.path.join(tmp_dir, "semi.csv")
+        success, error = FileProcessor.join_files(
+            [sales_path, prices_path], output, 'sku', 'semi', columns=columns
+        )
+        assert success, error
+        result = pd.read_csv(output)
+        assert list(result.columns) == ['sku', 'name', 'qty']
+        assert result['sku'].tolist() == [2, 3, 4]
+
+
+def test_union_keeps_selected_columns():
+    """Test unions of projected inputs"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sales_path, prices_path = _write_inputs(tmp_dir)
+        output = os.path.join(tmp_dir, "union.csv")
+
+        success, error = FileProcessor.union_files(
+            [sales_path, prices_path],
+            output,
+            align_columns=True,
+            columns={sales_path: ['sku', 'name'], prices_path: ['name', 'sku']}
+        )
+        assert success, error
+        result = pd.read_csv(output)
+        assert list(result.columns) == ['sku', 'name']
+        assert len(result) == 8
+
+
+def test_unknown_selected_column():
+    """Test that selecting a missing column is reported"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sales_path, prices_path = _write_inputs(tmp_dir)
+        output = os.path.join(tmp_dir, "out.csv")
+
+        success, error = FileProcessor.join_files(
+            [sales_path, prices_path], output, 'sku', columns={prices_path: ['cost']}
+        )
+        assert not success
+        assert error == "Column 'cost' not found in prices.xlsx"
+
+        success, error = FileProcessor.union_files([sales_path, prices_path], output, columns={sales_path: ['cost']})
+        assert not success
+        assert error == "Column 'cost' not found in sales.csv"
+
+
+def test_chunk_keeps_selected_columns_in_order():
+    """Test chunking CSV and Excel inputs to a subset of columns in a new order"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sales_path, prices_path = _write_inputs(tmp_dir)
+
+        for path, columns in [(sales_path, ['qty', 'sku']), (prices_path, ['price', 'name', 'sku'])]:
+            success, files, error = FileProcessor.chunk_file(
+                path, os.path.join(tmp_dir, "chunks"), 3, columns=columns, row_filter="sku > 2"
+            )
+            assert success, error
+            chunks = [pd.read_csv(file) for file in files]
+            # The filter column is read but only written when selected
+            assert all(list(chunk.columns) == columns for chunk in chunks)
+            assert [len(chunk) for chunk in chunks] == ([2] if path == sales_path else [3])
+
+        success, files, error = FileProcessor.chunk_file(sales_path, tmp_dir, 3, columns=['sku', 'cost'])
+        assert not success
+        assert error == "Column 'cost' not found in sales.csv"
+
+
+if __name__ == "__main__":
+    test_join_keeps_selected_columns()
+    test_union_keeps_selected_columns()
+    test_unknown_selected_column()
+    test_chunk_keeps_selected_columns_in_order()
+    print("\n✓ All column projection tests passed!")
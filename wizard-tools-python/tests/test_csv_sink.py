@@ -0,0 +1,106 @@
+"""
+Test the streaming CSV writer used for chunk, union and join output
+"""
+import gzip
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils import csv_sink, file_processor
+from utils.csv_sink import CsvSink
+from utils.file_processor import FileProcessor
+
+
+def _mixed_frame() -> pd.DataFrame:
+    return pd.DataFrame({
+        'id': np.arange(6),
+        'price': [1.5, np.nan, -0.0, 1e20, 0.1, 3.0],
+        'qty': pd.array([4, None, 0, 2, 2, 7], dtype='Int64'),
+        'region': ['NE', None, 'Widget, large', 'say "hi"', 'two\nlines', ''],
+        'paid': [True, False, True, True, False, False],
+        'when': pd.to_datetime(['2024-01-31 08:15', None, '1999-12-31 00:00', '2024-01-31 08:15', '2024-02-01 00:00', '2024-02-02 12:30']),
+        'size': pd.Categorical(['S', 'M', None, 'S', 'L', 'M']),
+        'mixed': [1, 1.0, True, 'x', None, 2],
+    })
+
+
+def test_format_matches_to_csv():
+    """Test that format_csv writes exactly what DataFrame.to_csv writes"""
+    df = _mixed_frame()
+    assert csv_sink.format_csv(df) == df.to_csv(index=False)
+    assert csv_sink.format_csv(df, header=False) == df.to_csv(index=False, header=False)
+    # Without the column pandas alone can format, the fast path is used
+    fast = df.drop(columns='mixed')
+    assert csv_sink.format_csv(fast) == fast.to_csv(index=False)
+    # A single column of gaps still writes one field per line
+    single = pd.DataFrame({'note': ['a', None, '']})
+    assert csv_sink.format_csv(single) == single.to_csv(index=False)
+    assert csv_sink.format_csv(df.iloc[:0]) == df.iloc[:0].to_csv(index=False)
+
+
+def test_sink_streams_batches():
+    """Test batched, compressed writes and their round trip"""
+    df = _mixed_frame().drop(columns='mixed')
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        plain = os.path.join(tmp_dir, "out.csv")
+        packed = os.path.join(tmp_dir, "out.csv.gz")
+        for path in (plain, packed):
+            with CsvSink(path) as sink:
+                sink.write(df.iloc[:0])
+                sink.write(df.iloc[:4])
+                sink.write(df.iloc[:0])
+                sink.write(df.iloc[4:])
+            assert sink.rows_written == len(df)
+
+        with open(plain, 'rb') as f:
+            text = f.read()
+        with gzip.open(packed, 'rb') as f:
+            assert f.read() == text
+        assert text.decode('utf-8') == df.to_csv(index=False)
+        assert csv_sink.compression_for(packed) == 'gzip' and csv_sink.compression_for(plain) is None
+
+        # Union and join output go through the same sink
+        union_path = os.path.join(tmp_dir, "union.csv.gz")
+        assert FileProcessor._write_batches([df.iloc[:3], df.iloc[3:]], union_path) == len(df)
+        assert FileProcessor.write_file(df, os.path.join(tmp_dir, "whole.csv.gz"))
+        for path in (union_path, os.path.join(tmp_dir, "whole.csv.gz")):
+            assert pd.read_csv(path)['region'].tolist()[2:5] == ['Widget, large', 'say "hi"', 'two\nlines']
+
+        if not csv_sink.zstd_available():
+            try:
+                CsvSink(os.path.join(tmp_dir, "out.csv.zst"))
+                assert False, "Expected ValueError"
+            except ValueError as e:
+                assert "zstandard" in str(e)
+
+
+def test_chunk_file_compression():
+    """Test that CSV_COMPRESSION compresses chunk files"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "sales.csv")
+        pd.DataFrame({'sku': range(5), 'region': ['NE', 'SW', 'NE', 'W', 'E']}).to_csv(path, index=False)
+
+        compression = file_processor.CSV_COMPRESSION
+        file_processor.CSV_COMPRESSION = 'gzip'
+        try:
+            success, files, error = FileProcessor.chunk_file(path, os.path.join(tmp_dir, "out"), 2)
+        finally:
+            file_processor.CSV_COMPRESSION = compression
+        assert success, error
+        assert [os.path.basename(f) for f in files] == [f"sales_chunk_{i}.csv.gz" for i in (1, 2, 3)]
+        assert pd.concat(pd.read_csv(f) for f in files)['sku'].tolist() == list(range(5))
+
+
+if __name__ == "__main__":
+    test_format_matches_to_csv()
+    test_sink_streams_batches()
+    test_chunk_file_compression()
+    print("\n✓ All CSV sink tests passed!")
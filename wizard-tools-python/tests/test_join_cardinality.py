@@ -0,0 +1,88 @@
+"""
+Test the join cardinality pre-check
+"""
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.file_processor import FileProcessor
+from utils.key_sketch import KeySketch, estimate_join_rows
+
+
+def _sketch(label, keys, batch_rows=5000, watch=()):
+    """Build a sketch from keys fed in batches"""
+    sketch = KeySketch(label, watch=watch, k=512)
+    keys = pd.Series(keys)
+    for start in range(0, len(keys), batch_rows):
+        sketch.update(keys.iloc[start:start + batch_rows])
+    return sketch
+
+
+def test_estimate_close_to_actual_join_size():
+    """Test that sketch estimates track the true join size for every join type"""
+    rng = np.random.default_rng(3)
+    left = rng.integers(0, 20000, 60000)
+    right = rng.integers(10000, 40000, 30000)
+
+    a = _sketch('a', left)
+    b = _sketch('b', right, watch=a.candidates)
+
+    for how in ['inner', 'left', 'right', 'outer']:
+        actual = len(pd.DataFrame({'k': left}).merge(pd.DataFrame({'k': right}), on='k', how=how))
+        estimate = estimate_join_rows([a, b], how)
+        assert abs(estimate - actual) / actual < 0.25, (how, estimate, actual)
+        print(f"✓ {how}: estimated {estimate:,.0f}, actual {actual:,}")
+
+
+def test_heavy_duplicate_key_is_flagged():
+    """Test that one hugely duplicated key is caught even when it is not sampled"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        orders = pd.DataFrame({'sku': ['BLANK'] * 3000 + [f"S{i}" for i in range(3000)], 'qty': 1})
+        catalog = pd.DataFrame({'sku': ['BLANK'] * 2000 + [f"S{i}" for i in range(3000)], 'name': 'x'})
+        paths = [os.path.join(tmp_dir, 'orders.csv'), os.path.join(tmp_dir, 'catalog.csv')]
+        orders.to_csv(paths[0], index=False)
+        catalog.to_csv(paths[1], index=False)
+
+        report = FileProcessor.check_join_cardinality(paths, 'sku', 'inner')
+        actual = len(orders.merge(catalog, on='sku'))
+
+        assert report['risky']
+        assert abs(report['estimated_rows'] - actual) / actual < 0.25
+        assert report['files'][0]['top_duplicate_keys'][0][0] == 'BLANK'
+        print(report['summary'])
+
+        # Declining the warning cancels the join without writing output
+        output = os.path.join(tmp_dir, 'out.csv')
+        success, error = FileProcessor.join_files(paths, output, 'sku', confirm=lambda report: False)
+        assert not success and "cancelled" in error
+        assert not os.path.exists(output)
+
+
+def test_unique_keys_are_not_flagged():
+    """Test that a one-to-one join passes the check"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = []
+        for name in ['a.csv', 'b.csv']:
+            path = os.path.join(tmp_dir, name)
+            pd.DataFrame({'id': range(1000), name[0]: 1}).to_csv(path, index=False)
+            paths.append(path)
+
+        report = FileProcessor.check_join_cardinality(paths, 'id', 'inner')
+        assert not report['risky']
+        assert report['estimated_rows'] == 1000
+        assert report['files'][1]['overlap_with_first'] == 1.0
+
+
+if __name__ == "__main__":
+    test_estimate_close_to_actual_join_size()
+    test_heavy_duplicate_key_is_flagged()
+    test_unique_keys_are_not_flagged()
+    print("\n✓ All join cardinality tests passed!")
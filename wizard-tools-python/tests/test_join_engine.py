@@ -0,0 +1,290 @@
+"""
+Test out-of-core join engines against the in-memory join
+"""
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils import csv_schema
+from utils.file_processor import FileProcessor
+from utils.join_engine import bloom_prefilter
+
+
+def _write_inputs(tmp_dir: str):
+    """Write three CSV inputs with duplicate, missing and unmatched keys"""
+    rng = np.random.default_rng(42)
+
+    left = pd.DataFrame({
+        'sku': rng.integers(0, 400, 1500),
+        'qty': rng.integers(1, 10, 1500),
+        'store': rng.choice(['NE', 'SW', 'NA'], 1500)
+    })
+    left.loc[::97, 'sku'] = np.nan
+
+    right = pd.DataFrame({
+        'sku': rng.permutation(np.arange(100, 600)),
+        'price': rng.random(500).round(2),
+        'store': rng.choice(['NE', 'SW'], 500)
+    })
+
+    # Already sorted on the key, exercising the no-resort path
+    third = pd.DataFrame({
+        'sku': np.arange(0, 300, 2),
+        'brand': [f"B{i % 7}" for i in range(150)]
+    })
+
+    paths = []
+    for name, df in [('left.csv', left), ('right.csv', right), ('third.csv', third)]:
+        path = os.path.join(tmp_dir, name)
+        df.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def _normalize(df: pd.DataFrame) -> pd.DataFrame:
+    """Sort rows and columns so join outputs can be compared"""
+    df = df[sorted(df.columns)]
+    return df.sort_values(list(df.columns), ignore_index=True, na_position='last')
+
+
+def _check_engine_matches_memory_join(engine: str, memory_budget_mb: float):
+    """Run every join type with an engine and compare with the in-memory join"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = _write_inputs(tmp_dir)
+
+        for join_type in ['inner', 'left', 'right', 'outer']:
+            memory_out = os.path.join(tmp_dir, f"memory_{join_type}.csv")
+            engine_out = os.path.join(tmp_dir, f"{engine}_{join_type}.csv")
+
+            success, error = FileProcessor.join_files(paths, memory_out, 'sku', join_type)
+            assert success, error
+
+            # A tiny budget forces many spill files per input
+            success, error = FileProcessor.join_files(
+                paths, engine_out, 'sku', join_type,
+                engine=engine, memory_budget_mb=memory_budget_mb
+            )
+            assert success, error
+
+            expected = _normalize(pd.read_csv(memory_out))
+            actual = _normalize(pd.read_csv(engine_out))
+
+            assert list(actual.columns) == list(expected.columns), join_type
+            pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+            print(f"✓ {engine} {join_type} join: {len(actual)} rows match")
+
+
+def test_sort_merge_join_matches_memory_join():
+    """Test that the sort-merge engine produces the same rows as the in-memory engine"""
+    _check_engine_matches_memory_join('sort_merge', 0.01)
+
+
+def test_hash_join_matches_memory_join():
+    """Test that the Grace hash join produces the same rows as the in-memory engine"""
+    _check_engine_matches_memory_join('hash', 0.1)
+
+
+def test_broadcast_join_matches_memory_join():
+    """Test that the broadcast engine produces the same rows as the in-memory engine"""
+    _check_engine_matches_memory_join('broadcast', 64)
+
+
+def test_sqlite_join_matches_memory_join():
+    """Test that the SQLite staging engine produces the same rows as the in-memory engine"""
+    _check_engine_matches_memory_join('sqlite', 0.05)
+
+
+def test_broadcast_join_small_left_table():
+    """Test broadcast joins where the small lookup file is the left table"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        left_path, right_path, _ = _write_inputs(tmp_dir)
+
+        # A small lookup with duplicate and missing keys
+        dups_path = os.path.join(tmp_dir, "dups.csv")
+        pd.read_csv(left_path).head(200).to_csv(dups_path, index=False)
+
+        # right.csv has unique keys, left.csv and dups.csv have duplicates and missing keys
+        layouts = [
+            [right_path, left_path],
+            [left_path, right_path],
+            [dups_path, right_path],
+            [right_path, dups_path]
+        ]
+        for paths in layouts:
+            for join_type in ['inner', 'left', 'right', 'outer']:
+                memory_out = os.path.join(tmp_dir, "memory.csv")
+                broadcast_out = os.path.join(tmp_dir, "broadcast.csv")
+
+                success, error = FileProcessor.join_files(paths, memory_out, 'sku', join_type)
+                assert success, error
+                success, error = FileProcessor.join_files(
+                    paths, broadcast_out, 'sku', join_type, engine='broadcast'
+                )
+                assert success, error
+
+                expected = _normalize(pd.read_csv(memory_out))
+                actual = _normalize(pd.read_csv(broadcast_out))
+                pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+def test_composite_key_join_matches_memory_join():
+    """Test every engine on a two-column key with missing parts and a shared non-key column"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rng = np.random.default_rng(11)
+        paths = []
+        for name, rows, extra in [('sales.csv', 900, 'qty'), ('targets.csv', 250, 'target'), ('promo.csv', 120, 'promo')]:
+            df = pd.DataFrame({
+                'store': rng.choice(['NE', 'SW', 'NA'], rows),
+                'day': rng.integers(0, 30, rows).astype(float),
+                extra: rng.integers(0, 100, rows),
+                'note': rng.choice(['a', 'b'], rows)
+            })
+            df.loc[::41, 'day'] = np.nan
+            path = os.path.join(tmp_dir, name)
+            df.to_csv(path, index=False)
+            paths.append(path)
+
+        key = ['store', 'day']
+        for inputs in [paths[:2], paths]:
+            for join_type in ['inner', 'left', 'right', 'outer']:
+                memory_out = os.path.join(tmp_dir, "memory.csv")
+                success, error = FileProcessor.join_files(inputs, memory_out, key, join_type)
+                assert success, error
+                expected = _normalize(pd.read_csv(memory_out, keep_default_na=False, na_values=['']))
+                
+                for engine, budget in [('sort_merge', 0.01), ('hash', 0.05), ('broadcast', 64), ('sqlite', 0.05)]:
+                    engine_out = os.path.join(tmp_dir, f"{engine}.csv")
+                    success, error = FileProcessor.join_files(
+                        inputs, engine_out, key, join_type,
+                        engine=engine, memory_budget_mb=budget
+                    )
+                    assert success, error
+                    actual = _normalize(pd.read_csv(engine_out, keep_default_na=False, na_values=['']))
+                    assert list(actual.columns) == list(expected.columns), (engine, join_type)
+                    pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+                print(f"✓ composite key {join_type} join of {len(inputs)} files: {len(expected)} rows match")
+
+
+def test_selective_inner_join_prefilter():
+    """Test that inner joins drop unmatched rows early without changing the result"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rng = np.random.default_rng(7)
+        big = pd.DataFrame({
+            'sku': rng.integers(0, 5000, 20000),
+            'store': rng.choice(['NE', 'SW', 'NA'], 20000),
+            'qty': rng.integers(1, 10, 20000)
+        })
+        big.loc[::211, 'sku'] = np.nan
+        small = pd.DataFrame({'sku': np.arange(0, 5000, 97), 'brand': 'B'})
+        big_path = os.path.join(tmp_dir, "big.csv")
+        small_path = os.path.join(tmp_dir, "small.csv")
+        big.to_csv(big_path, index=False)
+        small.to_csv(small_path, index=False)
+
+        sources = [FileProcessor._batch_source(path) for path in (big_path, small_path)]
+        filtered = pd.concat(list(bloom_prefilter(sources, 'sku', 1)[0].open_batches(1000)))
+        matching = big[big['sku'].isin(small['sku'])]
+        # No matching row is ever dropped, and most others are
+        assert set(matching['sku']) <= set(filtered['sku'])
+        assert len(filtered) < len(matching) * 1.5
+
+        expected = FileProcessor.read_file(big_path).merge(
+            FileProcessor.read_file(small_path), on='sku', how='inner', suffixes=('', '_small.csv')
+        )
+        memory_out = os.path.join(tmp_dir, "memory.csv")
+        success, error = FileProcessor.join_files([big_path, small_path], memory_out, 'sku')
+        assert success, error
+        pd.testing.assert_frame_equal(FileProcessor.read_file(memory_out), expected)
+
+        for engine in ['sort_merge', 'hash']:
+            engine_out = os.path.join(tmp_dir, f"{engine}.csv")
+            success, error = FileProcessor.join_files(
+                [big_path, small_path], engine_out, 'sku', engine=engine, memory_budget_mb=0.5
+            )
+            assert success, error
+            pd.testing.assert_frame_equal(_normalize(FileProcessor.read_file(engine_out)), _normalize(expected))
+        print(f"✓ prefiltered inner join: {len(expected)} rows match")
+
+
+def test_selective_inner_join_keeps_file_types():
+    """Test that rows read for an inner join get the column types of the whole file"""
+    sampling = (csv_schema.SAMPLE_ROWS, csv_schema.SAMPLE_BLOCKS, csv_schema.SCHEMA_CACHE_DIRECTORY)
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # The schema sample sees only the first rows
+        csv_schema.SAMPLE_ROWS, csv_schema.SAMPLE_BLOCKS = 100, 0
+        csv_schema.SCHEMA_CACHE_DIRECTORY = os.path.join(tmp_dir, "schemas")
+        try:
+            rows = 2000
+            big = pd.DataFrame({
+                'region': np.where(np.arange(rows) % 2, 'NE', 'SW'),
+                'store': np.arange(rows) % 50,
+                'sku': np.arange(rows),
+                'code': ['007'] * rows,
+                'qty': np.arange(rows) % 9,
+                'paid': np.arange(rows) % 3 == 0,
+            }).astype({'qty': object, 'paid': object})
+            # Only unmatched rows past the sample hold values that widen their column's type
+            big.loc[rows - 1, 'code'] = 'X9'
+            big.loc[rows - 1, 'qty'] = ''
+            big.loc[rows - 1, 'paid'] = ''
+            small = big.iloc[:rows // 10:3][['region', 'store', 'sku']].assign(brand='B')
+            big_path = os.path.join(tmp_dir, "big.csv")
+            small_path = os.path.join(tmp_dir, "small.csv")
+            big.to_csv(big_path, index=False)
+            small.to_csv(small_path, index=False)
+            keys = ['region', 'store', 'sku']
+            assert csv_schema.infer_schema(big_path)['code'] == 'Int64'
+
+            output = os.path.join(tmp_dir, "out.csv")
+            success, error = FileProcessor.join_files([big_path, small_path], output, keys)
+            assert success, error
+            # The scan widened the cached schema for the value it found
+            schema = csv_schema.infer_schema(big_path)
+            assert schema['code'] == 'str' and schema['qty'] == 'Int64' and schema['paid'] == 'boolean'
+
+            expected = FileProcessor.read_file(big_path, schema=schema).merge(
+                FileProcessor.read_file(small_path, schema=csv_schema.infer_schema(small_path)),
+                on=keys, how='inner', suffixes=('', '_small.csv')
+            )
+            assert expected['code'].tolist()[0] == '007'
+            with open(output, encoding='utf-8') as f:
+                assert f.read() == expected.to_csv(index=False)
+        finally:
+            csv_schema.SAMPLE_ROWS, csv_schema.SAMPLE_BLOCKS, csv_schema.SCHEMA_CACHE_DIRECTORY = sampling
+        print(f"✓ selective inner join keeps file types: {len(expected)} rows match")
+
+
+def test_sort_merge_join_missing_column():
+    """Test that a missing join column is reported before joining"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = _write_inputs(tmp_dir)
+        output = os.path.join(tmp_dir, "out.csv")
+
+        success, error = FileProcessor.join_files(paths, output, 'price', engine='sort_merge')
+        assert not success
+        assert "first file" in error
+
+        success, error = FileProcessor.join_files(paths, output, ['sku', 'price'], engine='sort_merge')
+        assert not success
+        assert "'price' not found in first file" in error
+
+
+if __name__ == "__main__":
+    test_sort_merge_join_matches_memory_join()
+    test_hash_join_matches_memory_join()
+    test_broadcast_join_matches_memory_join()
+    test_sqlite_join_matches_memory_join()
+    test_broadcast_join_small_left_table()
+    test_composite_key_join_matches_memory_join()
+    test_selective_inner_join_prefilter()
+    test_selective_inner_join_keeps_file_types()
+    test_sort_merge_join_missing_column()
+    print("\n✓ All join engine tests passed!")
@@ -0,0 +1,106 @@
+"""
+Test cost-based join ordering for multi-way joins
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.join_planner import InputStats, estimate_distinct, plan_join, execute_plan, explain
+
+
+def _inputs():
+    """Four inputs of very different sizes that share a 'region' column"""
+    rng = np.random.default_rng(7)
+    return [
+        pd.DataFrame({'k': rng.integers(0, 50, 400), 'region': 'A', 'a': rng.random(400)}),
+        pd.DataFrame({'k': rng.integers(0, 50, 300), 'region': 'B', 'b': rng.random(300)}),
+        pd.DataFrame({'k': np.arange(0, 40), 'region': 'C', 'c': np.arange(40)}),
+        pd.DataFrame({'k': np.arange(20, 30), 'd': np.arange(10)}),
+    ]
+
+
+def _chain(frames, labels, how):
+    """Join in selection order, as join_files did before planning"""
+    result = frames[0]
+    for frame, label in zip(frames[1:], labels[1:]):
+        result = result.merge(frame, on='k', how=how, suffixes=('', f'_{label}'))
+    return result
+
+
+def test_planned_join_matches_selection_order():
+    """Test that every join type gives the same rows and columns as a selection-order join"""
+    frames = _inputs()
+    labels = ['a.csv', 'b.csv', 'c.csv', 'd.csv']
+    stats = [
+        InputStats(label, len(df), df['k'].nunique())
+        for label, df in zip(labels, frames)
+    ]
+
+    for how in ['inner', 'left', 'right', 'outer']:
+        plan = plan_join(stats, how)
+        actual = execute_plan(plan, lambda i: frames[i], 'k', how, labels, workers=2)
+        expected = _chain(frames, labels, how)
+
+        assert list(actual.columns) == list(expected.columns), how
+        sort_cols = list(expected.columns)
+        pd.testing.assert_frame_equal(
+            actual.sort_values(sort_cols, ignore_index=True),
+            expected.sort_values(sort_cols, ignore_index=True),
+            check_dtype=False
+        )
+        print(explain(plan, 'k'))
+        assert "actual rows=?" not in explain(plan, 'k')
+
+
+def test_inner_join_starts_with_smallest_result():
+    """Test that the planner joins the selective small inputs first"""
+    stats = [
+        InputStats('big.csv', 1_000_000, 1_000),
+        InputStats('medium.csv', 100_000, 1_000),
+        InputStats('tiny.csv', 10, 10),
+    ]
+    plan = plan_join(stats, 'inner')
+
+    # The big file should be joined last, against the already reduced result
+    assert plan.left.is_scan or plan.right.is_scan
+    last_scan = plan.left if plan.left.is_scan else plan.right
+    assert last_scan.input_index == 0
+
+
+def test_left_join_keeps_first_file_left():
+    """Test that left joins keep the first file as the left table"""
+    stats = [
+        InputStats('left.csv', 100, 100),
+        InputStats('wide.csv', 10_000, 10),
+        InputStats('narrow.csv', 100, 100),
+    ]
+    plan = plan_join(stats, 'left')
+
+    node = plan
+    while not node.is_scan:
+        node = node.left
+    assert node.input_index == 0
+    # The table that multiplies rows least is joined first
+    assert plan.left.right.input_index == 2
+
+
+def test_estimate_distinct():
+    """Test distinct-key estimation from samples"""
+    keys = pd.Series(np.arange(1000) % 100)
+    assert estimate_distinct(keys, 1000) == 100
+    # All-unique sample scales up towards the full row count
+    assert estimate_distinct(pd.Series(np.arange(1000)), 100_000) > 1000
+
+
+if __name__ == "__main__":
+    test_planned_join_matches_selection_order()
+    test_inner_join_starts_with_smallest_result()
+    test_left_join_keeps_first_file_left()
+    test_estimate_distinct()
+    print("\n✓ All join planner tests passed!")
@@ -0,0 +1,97 @@
+"""
+Test dictionary-encoded join keys
+"""
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.join_planner import InputStats, plan_join, execute_plan
+from utils.key_encoding import KeyEncoder, KEY_CODE_COLUMN
+
+
+def _inputs():
+    """Three inputs with text SKUs, an 'NA' store code and missing key parts"""
+    rng = np.random.default_rng(5)
+    frames = []
+    for extra, rows in [('qty', 400), ('price', 150), ('brand', 90)]:
+        df = pd.DataFrame({
+            'sku': rng.choice([f"SKU-{i:06d}" for i in range(120)], rows),
+            'store': rng.choice(['NE', 'SW', 'NA'], rows),
+            extra: rng.integers(0, 100, rows)
+        })
+        df.loc[::37, 'sku'] = np.nan
+        df.loc[::23, 'store'] = np.nan
+        frames.append(df)
+    return frames
+
+
+def test_encoded_join_matches_merge():
+    """Test that merging on shared codes gives the rows, order and dtypes of a plain merge"""
+    frames = _inputs()
+    labels = ['sales.csv', 'prices.csv', 'brands.csv']
+
+    for key in [['sku', 'store'], ['store', 'sku']]:
+        for how in ['inner', 'left', 'right', 'outer']:
+            expected = frames[0].merge(frames[1], on=key, how=how, suffixes=('', '_prices.csv'))
+            plan = plan_join([InputStats(label, 0, 0) for label in labels[:2]], how)
+            actual = execute_plan(plan, lambda i: frames[i], key, how, labels[:2])
+            pd.testing.assert_frame_equal(actual, expected)
+
+    for how in ['inner', 'left', 'right', 'outer']:
+        expected = frames[0]
+        for frame, label in zip(frames[1:], labels[1:]):
+            expected = expected.merge(frame, on='sku', how=how, suffixes=('', f'_{label}'))
+        plan = plan_join([InputStats(label, 0, 0) for label in labels], how)
+        actual = execute_plan(plan, lambda i: frames[i], 'sku', how, labels)
+        columns = list(expected.columns)
+        assert list(actual.columns) == columns
+        pd.testing.assert_frame_equal(
+            actual.sort_values(columns, ignore_index=True),
+            expected.sort_values(columns, ignore_index=True)
+        )
+        print(f"✓ encoded {how} join: {len(actual)} rows match")
+
+
+def test_codes_shared_across_inputs():
+    """Test that equal keys get equal codes in every input and missing keys one code"""
+    left = pd.DataFrame({'sku': ['A', 'B', None, 'A'], 'x': [1, 2, 3, 4]})
+    right = pd.DataFrame({'sku': ['B', None, 'C'], 'y': [5, 6, 7]})
+    third = pd.DataFrame({'sku': ['C'], 'z': [8]})
+
+    frames = [left, right, third]
+    assert KeyEncoder.applies(frames, 'sku')
+    encoder = KeyEncoder(frames, 'sku')
+    codes = [encoder.encode(frame, i)[KEY_CODE_COLUMN].tolist() for i, frame in enumerate(frames)]
+
+    assert codes[0][0] == codes[0][3]
+    assert codes[0][1] == codes[1][0]
+    assert codes[0][2] == codes[1][1]
+    assert codes[1][2] == codes[2][0]
+    assert len(set(codes[0] + codes[1] + codes[2])) == 4
+
+
+def test_encoding_skipped_when_merge_does_it():
+    """Test when keys are left to DataFrame.merge"""
+    left = pd.DataFrame({'sku': ['A', 'B'], 'n': [1, 2]})
+    right = pd.DataFrame({'sku': ['B', 'C'], 'n': [2, 3]})
+    numeric = pd.DataFrame({'sku': [1, 2], 'n': [1, 2]})
+
+    # Two inputs on one column: merge already factorizes the key
+    assert not KeyEncoder.applies([left, right], 'sku')
+    assert KeyEncoder.applies([left, right], ['sku', 'n'])
+    # Numeric keys, and keys of different kinds, are merged as they are
+    assert not KeyEncoder.applies([numeric, numeric, numeric], 'sku')
+    assert not KeyEncoder.applies([left, right, numeric], 'sku')
+
+
+if __name__ == "__main__":
+    test_encoded_join_matches_merge()
+    test_codes_shared_across_inputs()
+    test_encoding_skipped_when_merge_does_it()
+    print("\n✓ All key encoding tests passed!")
@@ -0,0 +1,105 @@
+"""
+Test persistent join-key indexes
+"""
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.file_processor import FileProcessor
+from utils import key_index
+from utils.key_index import KeyIndex
+
+
+def _write_master(path: str):
+    """Write a master file with duplicate and missing keys and an 'NA' region"""
+    rng = np.random.default_rng(3)
+    master = pd.DataFrame({
+        'sku': rng.integers(0, 300, 2000).astype(float),
+        'region': rng.choice(['NA', 'EU', 'APAC'], 2000),
+        'price': rng.random(2000).round(2)
+    })
+    master.loc[::101, 'sku'] = np.nan
+    master.to_csv(path, index=False)
+
+
+def test_indexed_join_matches_full_join():
+    """Test that joins probing an index give the same rows as a full read"""
+    default_dir = key_index.INDEX_DIRECTORY
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        key_index.INDEX_DIRECTORY = os.path.join(tmp_dir, "indexes")
+        try:
+            _check_indexed_joins(tmp_dir)
+        finally:
+            key_index.INDEX_DIRECTORY = default_dir
+
+
+def _check_indexed_joins(tmp_dir: str):
+    """Join an extract against a master file before and after indexing it"""
+    master_path = os.path.join(tmp_dir, "master.csv")
+    extract_path = os.path.join(tmp_dir, "extract.csv")
+    _write_master(master_path)
+    pd.DataFrame({'sku': [5, 17, 250, 999, np.nan], 'qty': [1, 2, 3, 4, 5]}).to_csv(extract_path, index=False)
+
+    expected = {}
+    for join_type in ['inner', 'left']:
+        out = os.path.join(tmp_dir, f"full_{join_type}.csv")
+        success, error = FileProcessor.join_files([extract_path, master_path], out, 'sku', join_type)
+        assert success, error
+        expected[join_type] = pd.read_csv(out, keep_default_na=False, na_values=[''])
+
+    success, error = FileProcessor.build_key_index(master_path, 'sku')
+    assert success, error
+    assert KeyIndex.open(master_path, 'sku') is not None
+
+    for join_type in ['inner', 'left']:
+        out = os.path.join(tmp_dir, f"indexed_{join_type}.csv")
+        success, error = FileProcessor.join_files([extract_path, master_path], out, 'sku', join_type)
+        assert success, error
+        actual = pd.read_csv(out, keep_default_na=False, na_values=[''])
+        pd.testing.assert_frame_equal(actual, expected[join_type])
+        print(f"✓ indexed {join_type} join: {len(actual)} rows match")
+
+
+def test_fetch_matching_reads_only_matching_rows():
+    """Test key lookups against an index"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        master_path = os.path.join(tmp_dir, "master.csv")
+        _write_master(master_path)
+        full = FileProcessor.read_file(master_path)
+
+        index = KeyIndex.build(master_path, 'sku', FileProcessor.read_batches(master_path, 500), index_dir=tmp_dir)
+        keys = pd.Series([5.0, 17.0, 4242.0])
+        actual = index.fetch_matching(keys)
+        expected = full[full['sku'].isin(keys)].reset_index(drop=True)
+
+        pd.testing.assert_frame_equal(actual, expected)
+        # "NA" regions are data, not missing values
+        assert actual['region'].notna().all()
+
+
+def test_index_invalidated_when_file_changes():
+    """Test that a stale index is not used"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        master_path = os.path.join(tmp_dir, "master.csv")
+        _write_master(master_path)
+        KeyIndex.build(master_path, 'sku', FileProcessor.read_batches(master_path, 500), index_dir=tmp_dir)
+        assert KeyIndex.open(master_path, 'sku', index_dir=tmp_dir) is not None
+
+        with open(master_path, 'a') as f:
+            f.write("1.0,EU,9.99\n")
+        assert KeyIndex.open(master_path, 'sku', index_dir=tmp_dir) is None
+
+
+if __name__ == "__main__":
+    test_indexed_join_matches_full_join()
+    test_fetch_matching_reads_only_matching_rows()
+    test_index_invalidated_when_file_changes()
+    print("\n✓ All key index tests passed!")
@@ -0,0 +1,106 @@
+"""
+Test VLOOKUP-style enrichment from a reference file
+"""
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.file_processor import FileProcessor
+from utils import key_index
+
+
+def _write_inputs(tmp_dir: str):
+    """Write an unsorted main file and a reference with a duplicated key"""
+    rng = np.random.default_rng(9)
+    main = pd.DataFrame({
+        'sku': rng.integers(0, 400, 3000).astype(float),
+        'store': rng.choice(['NE', 'SW', 'NA'], 3000),
+        'qty': rng.integers(1, 10, 3000)
+    })
+    main.loc[::113, 'sku'] = np.nan
+
+    reference = pd.DataFrame({
+        'sku': np.arange(0, 300),
+        'name': [f"Item {i}" for i in range(300)],
+        'stock': rng.integers(0, 50, 300),
+        'store': 'HQ'
+    })
+    # Only the first row of a repeated key is used
+    reference = pd.concat([reference, reference.iloc[:5].assign(name='Duplicate')], ignore_index=True)
+
+    main_path = os.path.join(tmp_dir, "main.csv")
+    reference_path = os.path.join(tmp_dir, "reference.csv")
+    main.to_csv(main_path, index=False)
+    reference.to_csv(reference_path, index=False)
+    return main_path, reference_path, main, reference
+
+
+def test_enrich_keeps_row_order():
+    """Test that looked-up columns match a left join on the first reference rows"""
+    default_dir = key_index.INDEX_DIRECTORY
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        key_index.INDEX_DIRECTORY = os.path.join(tmp_dir, "indexes")
+        try:
+            main_path, reference_path, main, reference = _write_inputs(tmp_dir)
+            output = os.path.join(tmp_dir, "enriched.csv")
+
+            success, error = FileProcessor.enrich_file(
+                main_path, reference_path, output, 'sku', ['name', 'stock', 'store'], memory_budget_mb=0.05
+            )
+            assert success, error
+
+            expected = main.merge(
+                reference.drop_duplicates('sku'), on='sku', how='left', suffixes=('', '_reference.csv')
+            )
+            actual = pd.read_csv(output, keep_default_na=False, na_values=[''])
+            pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+            assert 'Duplicate' not in set(actual['name'])
+
+            # Whole numbers stay whole even in rows without a match
+            stock = pd.read_csv(output, dtype=str)['stock']
+            assert stock.isna().any() and not stock.str.endswith('.0').any()
+
+            # A second run reuses the persisted index
+            index_files = os.listdir(key_index.INDEX_DIRECTORY)
+            stamps = {name: os.path.getmtime(os.path.join(key_index.INDEX_DIRECTORY, name)) for name in index_files}
+            success, error = FileProcessor.enrich_file(main_path, reference_path, output, 'sku', ['name'])
+            assert success, error
+            for name, stamp in stamps.items():
+                assert os.path.getmtime(os.path.join(key_index.INDEX_DIRECTORY, name)) == stamp
+            print(f"✓ enriched {len(actual)} rows in original order")
+        finally:
+            key_index.INDEX_DIRECTORY = default_dir
+
+
+def test_enrich_from_excel_reference():
+    """Test lookups against an Excel reference, which is read into memory"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        main_path, _, main, reference = _write_inputs(tmp_dir)
+        reference_path = os.path.join(tmp_dir, "reference.xlsx")
+        reference.to_excel(reference_path, index=False)
+        output = os.path.join(tmp_dir, "enriched.csv")
+
+        success, error = FileProcessor.enrich_file(main_path, reference_path, output, 'sku', ['name'])
+        assert success, error
+        actual = pd.read_csv(output, keep_default_na=False, na_values=[''])
+        assert list(actual.columns) == ['sku', 'store', 'qty', 'name']
+        expected = main.merge(reference.drop_duplicates('sku')[['sku', 'name']], on='sku', how='left')
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+        success, error = FileProcessor.enrich_file(main_path, reference_path, output, 'code', ['name'])
+        assert not success
+        assert "'code' not found in first file" in error
+
+
+if __name__ == "__main__":
+    test_enrich_keeps_row_order()
+    test_enrich_from_excel_reference()
+    print("\n✓ All lookup enrichment tests passed!")
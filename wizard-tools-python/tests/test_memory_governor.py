@@ -0,0 +1,130 @@
+"""
+Test the memory governor's choice between in-memory and streaming execution
+"""
+import os
+import tempfile
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import MEMORY_HEADROOM
+from utils.file_processor import (
+    FileProcessor, STREAMING_JOINS, GOVERNED_BROADCAST_JOIN, GOVERNED_STREAMING_JOIN, JOIN_MEMORY_FACTOR
+)
+from utils.join_engine import SORT_OVERHEAD_FACTOR
+from utils import memory_governor
+from utils.validators import validate_data_file, validate_file_size
+
+
+def test_streaming_union_matches_memory_union():
+    """Test that a streamed union writes the same rows and columns"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        north_path = os.path.join(tmp_dir, "north.csv")
+        south_path = os.path.join(tmp_dir, "south.xlsx")
+        pd.DataFrame({'sku': range(5), 'qty': [0, 4, 5, 1, 2], 'channel': ['web', 'store'] * 2 + ['web']}).to_csv(north_path, index=False)
+        pd.DataFrame({'qty': [7, 0], 'sku': [8, 9], 'region': ['NE', 'SW']}).to_excel(south_path, index=False)
+
+        for row_filter in (None, "qty > 0"):
+            results = []
+            for streaming in (False, True):
+                output = os.path.join(tmp_dir, f"union_{streaming}.csv")
+                success, error = FileProcessor.union_files(
+                    [north_path, south_path], output, align_columns=True, row_filter=row_filter, streaming=streaming
+                )
+                assert success, error
+                results.append(pd.read_csv(output))
+            pd.testing.assert_frame_equal(results[1], results[0])
+            assert list(results[1].columns) == ['sku', 'qty', 'channel', 'region']
+
+
+def test_governor_picks_streaming_join():
+    """Test that 'auto' joins stream when the inputs would not fit in memory"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        left_path = os.path.join(tmp_dir, "left.csv")
+        right_path = os.path.join(tmp_dir, "right.csv")
+        pd.DataFrame({'id': range(100), 'a': range(100)}).to_csv(left_path, index=False)
+        pd.DataFrame({'id': range(0, 200, 2), 'b': range(100)}).to_csv(right_path, index=False)
+
+        assert memory_governor.available_memory() is None or memory_governor.available_memory() > 0
+        assert validate_data_file(left_path) == (True, "")
+        # File sizes are limited only when a caller asks for it
+        assert validate_file_size(left_path) == (True, "")
+        assert not validate_file_size(left_path, max_size_mb=0.0001)[0]
+
+        calls = []
+        streaming_join = STREAMING_JOINS[GOVERNED_STREAMING_JOIN]
+        available_memory = memory_governor.available_memory
+
+        def recording_join(*args, **kwargs):
+            calls.append(kwargs['memory_budget_mb'])
+            return streaming_join(*args, **kwargs)
+
+        STREAMING_JOINS[GOVERNED_STREAMING_JOIN] = recording_join
+        try:
+            outputs = []
+            for memory in (available_memory(), 1024):
+                memory_governor.available_memory = lambda: memory
+                output = os.path.join(tmp_dir, f"joined_{len(outputs)}.csv")
+                success, error = FileProcessor.join_files([left_path, right_path], output, 'id')
+                assert success, error
+                outputs.append(pd.read_csv(output).sort_values('id', ignore_index=True))
+        finally:
+            STREAMING_JOINS[GOVERNED_STREAMING_JOIN] = streaming_join
+            memory_governor.available_memory = available_memory
+
+        # Only the join with almost no memory streamed, within the governor's budget
+        assert len(calls) == 1 and calls[0] < 1
+        pd.testing.assert_frame_equal(outputs[1], outputs[0])
+        assert len(outputs[0]) == 50
+
+
+def test_governor_broadcasts_small_lookups():
+    """Test that 'auto' streams a large input past small ones rather than partitioning both"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        fact_path = os.path.join(tmp_dir, "fact.csv")
+        lookup_path = os.path.join(tmp_dir, "lookup.csv")
+        pd.DataFrame({'sku': [i % 40 for i in range(4000)], 'qty': range(4000)}).to_csv(fact_path, index=False)
+        pd.DataFrame({'sku': range(0, 40, 2), 'brand': 'B'}).to_csv(lookup_path, index=False)
+        fact, lookup = (FileProcessor._estimate_memory(path) for path in (fact_path, lookup_path))
+        # A budget the lookup fits in but the whole join does not
+        budget = (lookup * SORT_OVERHEAD_FACTOR + JOIN_MEMORY_FACTOR * (fact + lookup)) / 2
+
+        calls = []
+        joins = dict(STREAMING_JOINS)
+        available_memory = memory_governor.available_memory
+
+        def recording(name):
+            def join(*args, **kwargs):
+                calls.append(name)
+                return joins[name](*args, **kwargs)
+            return join
+
+        for name in (GOVERNED_BROADCAST_JOIN, GOVERNED_STREAMING_JOIN):
+            STREAMING_JOINS[name] = recording(name)
+        try:
+            outputs = []
+            for memory in (budget, lookup * SORT_OVERHEAD_FACTOR / 2):
+                memory_governor.available_memory = lambda: int(memory / MEMORY_HEADROOM)
+                output = os.path.join(tmp_dir, f"joined_{len(outputs)}.csv")
+                success, error = FileProcessor.join_files([fact_path, lookup_path], output, 'sku')
+                assert success, error
+                outputs.append(pd.read_csv(output).sort_values('qty', ignore_index=True))
+        finally:
+            STREAMING_JOINS.update(joins)
+            memory_governor.available_memory = available_memory
+
+        assert calls == [GOVERNED_BROADCAST_JOIN, GOVERNED_STREAMING_JOIN]
+        pd.testing.assert_frame_equal(outputs[0], outputs[1])
+        assert len(outputs[0]) == 2000
+
+
+if __name__ == "__main__":
+    test_streaming_union_matches_memory_union()
+    test_governor_picks_streaming_join()
+    test_governor_broadcasts_small_lookups()
+    print("\n✓ All memory governor tests passed!")
@@ -0,0 +1,121 @@
+"""
+Test lazy query plans against the equivalent eager pandas steps
+"""
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.query_plan import scan, Scan
+
+
+def _write_inputs(tmp_dir: str):
+    """Write two sales files with different columns and a price list"""
+    rng = np.random.default_rng(5)
+    north = pd.DataFrame({
+        'sku': rng.integers(0, 60, 400),
+        'qty': rng.integers(-3, 6, 400),
+        'region': rng.choice(['NE', 'NW'], 400)
+    })
+    south = pd.DataFrame({
+        'sku': rng.integers(0, 60, 250),
+        'qty': rng.integers(-3, 6, 250),
+        'channel': rng.choice(['web', 'store'], 250)
+    })
+    prices = pd.DataFrame({'sku': np.arange(50), 'price': rng.random(50).round(3), 'region': 'HQ'})
+
+    paths = [os.path.join(tmp_dir, name) for name in ['north.csv', 'south.xlsx', 'prices.csv']]
+    north.to_csv(paths[0], index=False)
+    south.to_excel(paths[1], index=False)
+    prices.to_csv(paths[2], index=False)
+    return paths, north, south, prices
+
+
+def _sorted(df: pd.DataFrame) -> pd.DataFrame:
+    """Sort rows so pipeline outputs can be compared"""
+    return df.sort_values(list(df.columns), ignore_index=True, na_position='last')
+
+
+def test_pipeline_matches_eager_steps():
+    """Test union, join, filter and select with pushdown against pandas"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        (north_path, south_path, prices_path), north, south, prices = _write_inputs(tmp_dir)
+
+        plan = (
+            scan(north_path).union(scan(south_path))
+            .join(scan(prices_path), 'sku')
+            .filter(lambda df: df['qty'] > 0, ['qty'])
+            .filter(lambda df: df['price'] < 0.5, ['price'])
+            .select(['price', 'sku', 'qty', 'region_prices.csv'])
+        )
+
+        # Both filters reach the readers of the inputs holding their columns
+        optimized = plan.optimize()
+        scans = []
+        stack = [optimized]
+        while stack:
+            node = stack.pop()
+            scans += [node] if isinstance(node, Scan) else []
+            stack += node.children()
+        assert all(len(node.predicates) == 1 for node in scans), plan.explain()
+        print(plan.explain())
+
+        expected = pd.concat([north, south], ignore_index=True).merge(
+            prices, on='sku', suffixes=('', '_prices.csv')
+        )
+        expected = expected[(expected['qty'] > 0) & (expected['price'] < 0.5)]
+        expected = expected[['price', 'sku', 'qty', 'region_prices.csv']]
+
+        output = os.path.join(tmp_dir, "result.csv")
+        rows = plan.sink(output).execute(memory_budget_mb=0.01)
+        assert rows == len(expected)
+        actual = pd.read_csv(output)
+        assert list(actual.columns) == list(expected.columns)
+        pd.testing.assert_frame_equal(_sorted(actual), _sorted(expected), check_dtype=False)
+        print(f"✓ pipeline wrote {rows} rows")
+
+
+def test_filters_stay_above_outer_joins():
+    """Test that filters are not pushed where they would change the result"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        (north_path, _, prices_path), north, _, prices = _write_inputs(tmp_dir)
+
+        plan = scan(north_path).join(scan(prices_path), 'sku', how='outer').filter(lambda df: df['price'].isna(), ['price'])
+        assert plan.explain().startswith("-> FILTER")
+
+        expected = north.merge(prices, on='sku', how='outer', suffixes=('', '_prices.csv'))
+        expected = expected[expected['price'].isna()]
+        actual = plan.collect()
+        pd.testing.assert_frame_equal(_sorted(actual), _sorted(expected), check_dtype=False)
+
+
+def test_partition_writes_exact_chunks():
+    """Test that chunks hold chunk_size rows whatever the batch size"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        (north_path, south_path, _), north, south, _ = _write_inputs(tmp_dir)
+
+        plan = scan(north_path).union(scan(south_path)).filter(lambda df: df['qty'] != 0, ['qty'])
+        files = plan.partition(os.path.join(tmp_dir, "parts"), 100, base_name='sales').execute(memory_budget_mb=0.001)
+
+        combined = pd.concat([north, south], ignore_index=True)
+        expected = combined[combined['qty'] != 0].reset_index(drop=True)
+        sizes = [len(pd.read_csv(path)) for path in files]
+        assert all(size == 100 for size in sizes[:-1]) and 0 < sizes[-1] <= 100
+        assert os.path.basename(files[0]) == "sales_chunk_1.csv"
+
+        actual = pd.concat([pd.read_csv(path) for path in files], ignore_index=True)
+        pd.testing.assert_frame_equal(actual, expected, check_dtype=False)
+
+
+if __name__ == "__main__":
+    test_pipeline_matches_eager_steps()
+    test_filters_stay_above_outer_joins()
+    test_partition_writes_exact_chunks()
+    print("\n✓ All query plan tests passed!")
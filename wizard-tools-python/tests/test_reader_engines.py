@@ -0,0 +1,118 @@
+"""
+Test the reader engine registry, its benchmark cache and fallback between engines
+"""
+import json
+import os
+import tempfile
+import time
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils import reader_engines
+from utils.file_processor import FileProcessor
+from utils.reader_engines import ReaderEngine
+
+
+def test_auto_picks_fastest_engine_and_caches_benchmark():
+    """Test that 'auto' ranks engines by a benchmark that is run once and kept on disk"""
+    calls = []
+
+    def fast_read(file_path, **kwargs):
+        calls.append('fast')
+        return pd.read_csv(file_path, keep_default_na=False, **kwargs)
+
+    def slow_read(file_path, **kwargs):
+        calls.append('slow')
+        time.sleep(0.05)
+        return pd.read_csv(file_path, **kwargs)
+
+    engines = list(reader_engines._engines['.csv'])
+    benchmark_path = reader_engines.ENGINE_BENCHMARK_PATH
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        reader_engines.ENGINE_BENCHMARK_PATH = os.path.join(tmp_dir, "cache", "engines.json")
+        try:
+            reader_engines.register_engine('.csv', ReaderEngine('slow', read=slow_read))
+            reader_engines.register_engine('.csv', ReaderEngine('fast', read=fast_read, handles=lambda kwargs: 'nrows' not in kwargs))
+            reader_engines.register_engine('.csv', ReaderEngine('missing', read=fast_read, package='no_such_package'))
+            assert 'missing' not in reader_engines.available_engines('.csv')
+
+            ranking = reader_engines.ranking('.csv')
+            assert ranking.index('fast') < ranking.index('slow') and 'missing' not in ranking
+            with open(reader_engines.ENGINE_BENCHMARK_PATH, encoding='utf-8') as f:
+                cached = json.load(f)['formats']['.csv']
+            assert set(cached['seconds']) >= {'c', 'slow', 'fast'}
+
+            # A new session reuses the stored timings instead of benchmarking again
+            cached['seconds']['fast'] = 0
+            with open(reader_engines.ENGINE_BENCHMARK_PATH, 'w', encoding='utf-8') as f:
+                json.dump({'version': reader_engines.BENCHMARK_FORMAT_VERSION, 'formats': {'.csv': cached}}, f)
+            reader_engines._rankings.clear()
+            calls.clear()
+            assert reader_engines.ranking('.csv')[0] == 'fast' and calls == []
+
+            path = os.path.join(tmp_dir, "orders.csv")
+            pd.DataFrame({'id': [1, 2], 'region': ['NA', 'NE']}).to_csv(path, index=False)
+            assert FileProcessor.read_file(path, csv_engine='auto')['region'].tolist() == ['NA', 'NE']
+            assert calls == ['fast']
+            # Reads an engine does not handle go to the next one
+            assert reader_engines.engine_order('.csv', 'auto', {'nrows': 1})[0] != 'fast'
+            assert reader_engines.engine_order('.csv', 'slow', {}) == ['slow', 'c']
+
+            for setting, message in (('turbo', "Unknown CSV engine: turbo"), ('missing', "needs the no_such_package package")):
+                try:
+                    FileProcessor.read_file(path, csv_engine=setting)
+                    assert False, "Expected ValueError"
+                except ValueError as e:
+                    assert message in str(e)
+        finally:
+            reader_engines._engines['.csv'] = engines
+            reader_engines._rankings.clear()
+            reader_engines.ENGINE_BENCHMARK_PATH = benchmark_path
+
+
+def test_engine_failure_falls_back():
+    """Test that a failing engine falls back to the baseline and is skipped for that file afterwards"""
+    calls = []
+
+    def broken_read(file_path, **kwargs):
+        calls.append(file_path)
+        raise RuntimeError("cannot parse")
+
+    engines = list(reader_engines._engines['.csv'])
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "orders.csv")
+        pd.DataFrame({'id': [1, 2]}).to_csv(path, index=False)
+        try:
+            reader_engines.register_engine('.csv', ReaderEngine('broken', read=broken_read))
+            for _ in range(2):
+                assert FileProcessor.read_file(path, csv_engine='broken')['id'].tolist() == [1, 2]
+            assert calls == [path]
+
+            # A changed file gets another try
+            pd.DataFrame({'id': [3]}).to_csv(path, index=False)
+            os.utime(path, ns=(0, 10 ** 9))
+            assert FileProcessor.read_file(path, csv_engine='broken')['id'].tolist() == [3]
+            assert calls == [path, path]
+
+            # When every engine fails, the baseline's error is raised
+            try:
+                FileProcessor.read_file(path, csv_engine='broken', usecols=['missing'])
+                assert False, "Expected ValueError"
+            except ValueError as e:
+                assert "missing" in str(e)
+        finally:
+            reader_engines._engines['.csv'] = engines
+            reader_engines._rankings.clear()
+            reader_engines._failures.clear()
+
+
+if __name__ == "__main__":
+    test_auto_picks_fastest_engine_and_caches_benchmark()
+    test_engine_failure_falls_back()
+    print("\n✓ All reader engine tests passed!")
@@ -0,0 +1,129 @@
+"""
+Test row filter expressions and filtered chunking and unions
+"""
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils.file_processor import FileProcessor
+from utils.row_filter import RowFilter
+
+
+def test_expressions():
+    """Test the filter language on a batch with missing values"""
+    df = pd.DataFrame({
+        'region': ['NE', 'SW', None, 'NE'],
+        'qty': [1, 0, 5, np.nan],
+        'Unit Price': [1.0, 2.0, 3.0, 4.0],
+        'notes': ['a test', 'x', None, 'y']
+    })
+    cases = {
+        "region == 'NE' and qty > 0": [True, False, False, False],
+        "region in ('NE', 'SW') or isna(qty)": [True, True, False, True],
+        "region not in ['NE']": [False, True, True, False],
+        "0 < `Unit Price` * 2 <= 6": [True, True, True, False],
+        "region == None": [False, False, True, False],
+        "contains(notes, 'test') or startswith(lower(region), 's')": [True, True, False, False],
+        "not qty >= 1": [False, True, False, True],
+    }
+    for expression, expected in cases.items():
+        assert RowFilter(expression)(df).tolist() == expected, expression
+    assert RowFilter("`Unit Price` > qty and region == 'NE'").columns == ['Unit Price', 'qty', 'region']
+    print(f"✓ {len(cases)} expressions evaluated")
+
+
+def test_missing_values_fail_comparisons():
+    """Test that comparisons on a missing value are False whatever the column type"""
+    columns = {
+        'float': pd.Series([1.0, np.nan, 3.0]),
+        'object': pd.Series([1, None, 3], dtype=object),
+        'str': pd.Series(['1', None, '3'], dtype='str'),
+        'Int64': pd.Series([1, None, 3], dtype='Int64'),
+    }
+    for dtype, values in columns.items():
+        one = '1' if dtype == 'str' else 1
+        df = pd.DataFrame({'qty': values, 'other': values})
+        assert RowFilter(f"qty != {one!r}")(df).tolist() == [False, False, True], dtype
+        assert RowFilter(f"{one!r} != qty")(df).tolist() == [False, False, True], dtype
+        assert RowFilter("qty == other")(df).tolist() == [True, False, True], dtype
+        assert RowFilter(f"qty != {one!r} or isna(qty)")(df).tolist() == [False, True, True], dtype
+
+
+def test_rejects_unsafe_expressions():
+    """Test that only the filter language is accepted"""
+    for expression in ["__import__('os').system('x')", "region.upper()", "qty[0]", "open('f')",
+                       "lambda: 1", "region in notes", "", "qty >"]:
+        try:
+            RowFilter(expression)
+        except ValueError:
+            continue
+        raise AssertionError(f"accepted {expression!r}")
+
+    try:
+        RowFilter("region > 5")(pd.DataFrame({'region': ['NE']}))
+        raise AssertionError("compared text with a number")
+    except ValueError as e:
+        assert "could not be evaluated" in str(e)
+
+
+def test_filtered_chunks_stay_full():
+    """Test that filtered chunks are regrouped to the chunk size"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        rng = np.random.default_rng(3)
+        df = pd.DataFrame({'region': rng.choice(['NE', 'SW'], 1000), 'qty': rng.integers(-2, 5, 1000)})
+        input_path = os.path.join(tmp_dir, "sales.csv")
+        df.to_csv(input_path, index=False)
+
+        success, files, error = FileProcessor.chunk_file(
+            input_path, os.path.join(tmp_dir, "chunks"), 150, row_filter="region == 'NE' and qty > 0"
+        )
+        assert success, error
+        sizes = [len(pd.read_csv(path)) for path in files]
+        assert all(size == 150 for size in sizes[:-1]) and sizes[-1] <= 150
+
+        expected = df[(df['region'] == 'NE') & (df['qty'] > 0)].reset_index(drop=True)
+        actual = pd.concat([pd.read_csv(path) for path in files], ignore_index=True)
+        pd.testing.assert_frame_equal(actual, expected)
+
+        success, files, error = FileProcessor.chunk_file(input_path, tmp_dir, 150, row_filter="price > 0")
+        assert not success
+        assert error == "Filter column 'price' not found in sales.csv"
+
+
+def test_filtered_union():
+    """Test unions where the filter column is missing from one file"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        north = pd.DataFrame({'sku': [1, 2, 3], 'qty': [0, 4, 5], 'channel': ['web', 'store', 'web']})
+        south = pd.DataFrame({'sku': [4, 5], 'qty': [7, 0]})
+        north_path = os.path.join(tmp_dir, "north.csv")
+        south_path = os.path.join(tmp_dir, "south.xlsx")
+        north.to_csv(north_path, index=False)
+        south.to_excel(south_path, index=False)
+
+        output = os.path.join(tmp_dir, "union.csv")
+        success, error = FileProcessor.union_files(
+            [north_path, south_path], output, align_columns=True,
+            columns={north_path: ['sku']}, row_filter="qty > 0 and (channel == 'web' or isna(channel))"
+        )
+        assert success, error
+        result = pd.read_csv(output)
+        # The filter reads qty and channel even though only sku is kept from north.csv
+        assert list(result.columns) == ['sku', 'qty']
+        assert result['sku'].tolist() == [3, 4]
+
+
+if __name__ == "__main__":
+    test_expressions()
+    test_missing_values_fail_comparisons()
+    test_rejects_unsafe_expressions()
+    test_filtered_chunks_stay_full()
+    test_filtered_union()
+    print("\n✓ All row filter tests passed!")
@@ -0,0 +1,99 @@
+"""
+Test reading and unioning several sheets of a workbook
+"""
+import os
+import tempfile
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils import file_processor
+from utils.file_processor import FileProcessor
+
+
+def _write_workbook(path: str) -> dict:
+    sheets = {
+        'March': pd.DataFrame({'sku': [5, 6], 'qty': [0, 3], 'note': ['NA', '']}),
+        'January': pd.DataFrame({'sku': [1, 2], 'qty': [4, 0]}),
+        'February': pd.DataFrame({'qty': [2, 8], 'sku': [3, 4]}),
+    }
+    with pd.ExcelWriter(path) as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+    return sheets
+
+
+def test_read_sheets_in_order():
+    """Test that parallel and single-process reads return the sheets in order"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "sales.xlsx")
+        _write_workbook(path)
+
+        serial = FileProcessor.read_sheets(path, workers=1)
+        assert list(serial) == ['March', 'January', 'February']
+        assert serial['March']['note'].tolist()[0] == 'NA'
+        assert pd.isna(serial['March']['note'].tolist()[1])
+
+        # Small workbooks normally stay in one process
+        min_bytes = file_processor.PARALLEL_SHEETS_MIN_BYTES
+        file_processor.PARALLEL_SHEETS_MIN_BYTES = 0
+        try:
+            parallel = FileProcessor.read_sheets(
+                path, ['February', 'March'], columns={'March': ['sku']}, workers=2
+            )
+        finally:
+            file_processor.PARALLEL_SHEETS_MIN_BYTES = min_bytes
+        assert list(parallel) == ['February', 'March']
+        pd.testing.assert_frame_equal(parallel['February'], serial['February'])
+        assert list(parallel['March'].columns) == ['sku']
+
+
+def test_union_all_sheets():
+    """Test a union of every sheet of a workbook with a CSV file"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        workbook = os.path.join(tmp_dir, "sales.xlsx")
+        _write_workbook(workbook)
+        extra = os.path.join(tmp_dir, "april.csv")
+        pd.DataFrame({'sku': [7], 'qty': [1]}).to_csv(extra, index=False)
+
+        sheets = FileProcessor.get_excel_sheet_names(workbook)
+        results = []
+        for streaming in (False, True):
+            output = os.path.join(tmp_dir, f"union_{streaming}.csv")
+            success, error = FileProcessor.union_files(
+                [workbook, extra], output, align_columns=True,
+                sheet_names={workbook: sheets}, columns={workbook: ['sku', 'qty']},
+                row_filter="qty > 0", streaming=streaming
+            )
+            assert success, error
+            results.append(pd.read_csv(output))
+        pd.testing.assert_frame_equal(results[1], results[0])
+        assert results[0]['sku'].tolist() == [6, 1, 3, 4, 7]
+        assert list(results[0].columns) == ['sku', 'qty']
+
+
+def test_union_repeated_csv():
+    """Test that a CSV file listed twice is unioned with itself rather than read as a workbook"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "april.csv")
+        pd.DataFrame({'sku': [7, 8], 'qty': [1, 0]}).to_csv(path, index=False)
+
+        for row_filter in (None, "qty > 0"):
+            for streaming in (False, True):
+                output = os.path.join(tmp_dir, "union.csv")
+                success, error = FileProcessor.union_files([path, path], output, row_filter=row_filter, streaming=streaming)
+                assert success, error
+                expected = [7, 8, 7, 8] if row_filter is None else [7, 7]
+                assert pd.read_csv(output)['sku'].tolist() == expected, (row_filter, streaming)
+
+
+if __name__ == "__main__":
+    test_read_sheets_in_order()
+    test_union_all_sheets()
+    test_union_repeated_csv()
+    print("\n✓ All sheet reading tests passed!")
@@ -0,0 +1,125 @@
+"""
+Test the workbook handle pool shared by sheet listing, column detection and reads
+"""
+import os
+import tempfile
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from utils import file_processor, workbook_pool
+from utils.file_processor import FileProcessor
+from utils.workbook_pool import WorkbookPool
+
+
+class _Handle:
+    def __init__(self, file_path: str, engine: str):
+        self.file_path = file_path
+        self.engine = engine
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+def _touch(path: str, size: int = 10) -> None:
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+
+
+def test_pool_reuses_and_evicts():
+    """Test reuse by path and engine, reopening changed files, and LRU eviction by count and memory"""
+    opened = []
+
+    def opener(file_path, engine):
+        opened.append(_Handle(file_path, engine))
+        return opened[-1]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        paths = [os.path.join(tmp_dir, f"{name}.xlsx") for name in 'abc']
+        for path in paths:
+            _touch(path)
+        pool = WorkbookPool(opener, max_workbooks=2, max_memory_mb=1)
+
+        with pool.open(paths[0], 'openpyxl') as first:
+            pass
+        with pool.open(paths[0], 'openpyxl') as again:
+            assert again is first
+        with pool.open(paths[0], 'native') as native:
+            assert native is not first
+        assert len(opened) == 2 and len(pool) == 2
+
+        # The least recently used workbook is closed first
+        with pool.open(paths[0], 'openpyxl'):
+            pass
+        with pool.open(paths[1], 'openpyxl'):
+            pass
+        assert native.closed and not first.closed and len(pool) == 2
+
+        # A changed file is reopened, and the stale handle closed
+        _touch(paths[0], 20)
+        with pool.open(paths[0], 'openpyxl') as changed:
+            assert changed is not first and first.closed
+
+        # A workbook evicted during a read closes when the read finishes
+        with pool.open(paths[1], 'openpyxl') as in_use:
+            pool.discard(paths[1])
+            assert not in_use.closed and len(pool) == 1
+        assert in_use.closed
+
+        # Workbooks estimated above the memory cap are not kept
+        _touch(paths[2], 1024 * 1024)
+        with pool.open(paths[2], 'openpyxl') as large:
+            pass
+        assert large.closed and len(pool) == 1
+        assert pool.memory == 20 * workbook_pool.HANDLE_MEMORY_FACTOR
+
+        pool.clear()
+        assert len(pool) == 0 and changed.closed
+
+
+def test_file_processor_shares_open_workbook():
+    """Test that sheet listing, column detection and reads open a workbook once"""
+    opened = []
+
+    def opener(file_path, engine):
+        opened.append(engine)
+        return file_processor._open_workbook(file_path, engine)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "sales.xlsx")
+        with pd.ExcelWriter(path) as writer:
+            pd.DataFrame({'sku': [1, 2], 'qty': [4, 0]}).to_excel(writer, sheet_name='January', index=False)
+            pd.DataFrame({'sku': [3], 'qty': [2]}).to_excel(writer, sheet_name='February', index=False)
+
+        workbooks = file_processor.WORKBOOKS
+        file_processor.WORKBOOKS = WorkbookPool(opener, 8, 256)
+        try:
+            assert FileProcessor.get_excel_sheet_names(path) == ['January', 'February']
+            assert FileProcessor.get_column_names(path, 'February') == ['sku', 'qty']
+            assert FileProcessor.read_file(path)['qty'].tolist() == [4, 0]
+            assert list(FileProcessor.read_sheets(path, workers=1)) == ['January', 'February']
+            assert len(opened) == 1
+
+            # Overwriting the workbook releases the pooled handle
+            assert FileProcessor.write_file(pd.DataFrame({'sku': [9]}), path)
+            assert len(file_processor.WORKBOOKS) == 0
+            assert FileProcessor.get_column_names(path) == ['sku']
+            assert len(opened) == 2
+
+            FileProcessor.close_workbooks()
+            assert len(file_processor.WORKBOOKS) == 0
+        finally:
+            file_processor.WORKBOOKS.clear()
+            file_processor.WORKBOOKS = workbooks
+
+
+if __name__ == "__main__":
+    test_pool_reuses_and_evicts()
+    test_file_processor_shares_open_workbook()
+    print("\n✓ All workbook pool tests passed!")
@@ -0,0 +1,129 @@
+"""
+Test on-demand reading of legacy .xls workbooks
+"""
+import datetime
+import os
+import struct
+import tempfile
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import NA_VALUES
+from utils import xls_reader
+from utils.file_processor import FileProcessor
+
+
+def _record(code: int, data: bytes = b'') -> bytes:
+    return struct.pack('<HH', code, len(data)) + data
+
+
+def _text(value: str, length_format: str) -> bytes:
+    return struct.pack(length_format, len(value)) + b'\x01' + value.encode('utf-16-le')
+
+
+def write_xls(path: str, sheets: dict) -> None:
+    """Write a minimal BIFF8 workbook of numbers, dates, booleans and text (xlwt is not a dependency)"""
+    def bof(kind):
+        return _record(0x0809, struct.pack('<HHHHII', 0x0600, kind, 0, 1997, 0, 6))
+
+    def xf(format_key):
+        return _record(0x00E0, struct.pack('<HHHBBBBIiH', 0, format_key, 1, 0x20, 0, 0, 0, 0, 0, 0x20C0))
+
+    streams = []
+    for rows in sheets.values():
+        cells = []
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                if value is None:
+                    continue
+                if isinstance(value, bool):
+                    cells.append(_record(0x0205, struct.pack('<HHHBB', row, column, 0, value, 0)))
+                elif isinstance(value, datetime.datetime):
+                    serial = (value - datetime.datetime(1899, 12, 30)) / datetime.timedelta(days=1)
+                    cells.append(_record(0x0203, struct.pack('<HHHd', row, column, 1, serial)))
+                elif isinstance(value, (int, float)):
+                    cells.append(_record(0x0203, struct.pack('<HHHd', row, column, 0, value)))
+                else:
+                    cells.append(_record(0x0204, struct.pack('<HHH', row, column, 0) + _text(value, '<H')))
+        width = max((len(values) for values in rows), default=0)
+        dimensions = _record(0x0200, struct.pack('<IIHHH', 0, len(rows), 0, width, 0))
+        streams.append(bof(0x0010) + dimensions + b''.join(cells) + _record(0x000A))
+
+    # Globals: codepage UTF-16, a general and a date cell format, then one
+    # BOUNDSHEET per sheet pointing at its stream
+    globals_head = bof(0x0005) + _record(0x0042, struct.pack('<H', 1200)) + xf(0) + xf(14)
+    offset = len(globals_head) + sum(len(_text(name, '<B')) + 10 for name in sheets) + 4
+    boundsheets = b''
+    for name, stream in zip(sheets, streams):
+        boundsheets += _record(0x0085, struct.pack('<IBB', offset, 0, 0) + _text(name, '<B'))
+        offset += len(stream)
+    with open(path, 'wb') as f:
+        f.write(globals_head + boundsheets + _record(0x000A) + b''.join(streams))
+
+
+def _write_workbook(path: str) -> None:
+    write_xls(path, {
+        'Orders': [
+            ['id', 'when', 'paid', 'note'],
+            [1, datetime.datetime(2024, 1, 31, 8, 15), True, 'NA'],
+            [2, None, False, ''],
+            [3.5, datetime.datetime(1999, 12, 31), True, 'late'],
+        ],
+        'Empty': [],
+        'Stock': [['sku', 'qty'], ['A1', 4], ['B2', 0]],
+    })
+
+
+def test_sheets_load_on_demand():
+    """Test that listing parses no sheet and that each read releases its sheet"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "legacy.xls")
+        _write_workbook(path)
+
+        with xls_reader.XlsWorkbook(path) as workbook:
+            assert workbook.sheet_names == ['Orders', 'Empty', 'Stock']
+            assert not any(workbook.sheet_loaded(i) for i in range(3))
+
+            for sheet in ('Stock', 'Orders', 1):
+                expected = pd.read_excel(path, sheet_name=sheet, engine='xlrd', na_values=NA_VALUES, keep_default_na=False)
+                pd.testing.assert_frame_equal(workbook.read_sheet(sheet), expected)
+                assert not any(workbook.sheet_loaded(i) for i in range(3))
+
+            # A failed read releases its sheet too
+            try:
+                workbook.read_sheet('Stock', usecols=['missing'])
+                assert False, "Expected ValueError"
+            except ValueError:
+                pass
+            assert not workbook.sheet_loaded('Stock')
+            assert list(workbook.read_sheet('Orders', usecols=['id', 'note'], nrows=1).columns) == ['id', 'note']
+
+
+def test_file_processor_reads_xls():
+    """Test FileProcessor reads of an .xls workbook"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "legacy.xls")
+        _write_workbook(path)
+
+        assert FileProcessor.get_excel_sheet_names(path) == ['Orders', 'Empty', 'Stock']
+        assert FileProcessor.get_column_names(path, 'Stock') == ['sku', 'qty']
+        orders = FileProcessor.read_file(path)
+        assert orders['note'].tolist()[0] == 'NA' and pd.isna(orders['note'].tolist()[1])
+        assert orders['paid'].dtype == bool and str(orders['when'].dtype).startswith('datetime64')
+
+        sheets = FileProcessor.read_sheets(path, columns={'Stock': ['qty']}, workers=1)
+        assert list(sheets) == ['Orders', 'Empty', 'Stock']
+        pd.testing.assert_frame_equal(sheets['Orders'], orders)
+        assert sheets['Empty'].empty and list(sheets['Stock'].columns) == ['qty']
+
+
+if __name__ == "__main__":
+    test_sheets_load_on_demand()
+    test_file_processor_reads_xls()
+    print("\n✓ All xls reader tests passed!")
@@ -0,0 +1,153 @@
+"""
+Test the native xlsx reader against pandas' openpyxl engine
+"""
+import datetime
+import os
+import re
+import tempfile
+import zipfile
+import openpyxl
+from openpyxl.cell.rich_text import CellRichText, TextBlock
+from openpyxl.cell.text import InlineFont
+import pandas as pd
+import sys
+from pathlib import Path
+
+# Add parent directory to path for imports
+parent_dir = Path(__file__).parent.parent / "src"
+if str(parent_dir) not in sys.path:
+    sys.path.insert(0, str(parent_dir))
+
+from config import NA_VALUES
+from utils import file_processor, xlsx_reader
+from utils.file_processor import FileProcessor
+
+
+def _write_workbook(path: str) -> None:
+    """Write a workbook with the value types and layouts a sheet can hold"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "Orders"
+    sheet.append(['id', 'qty', 'price', 'when', 'paid', 'code', 'note', 'id', None, 5])
+    rows = [
+        [1, 4, 2.5, datetime.datetime(2024, 1, 31, 8, 15), True, '0042', 'NA', 7, None, 'x'],
+        [2, None, 3, datetime.datetime(1900, 2, 1), False, '17', ' ', 8, None, None],
+        [3, 6, 1e-3, None, True, '5', 'A & B <c>', 9, None, None],
+        [],
+        [5, 8, 4.75, datetime.datetime(2031, 12, 1, 23, 59, 59), False, 'x9', 'déjà\nvu', 10],
+    ]
+    for row in rows:
+        sheet.append(row)
+    sheet['G7'] = CellRichText(['bold ', TextBlock(InlineFont(b=True), 'text')])
+    sheet['H7'] = '=H6+1'
+    sheet['A9'] = datetime.time(6, 30)
+    mixed = workbook.create_sheet("Mixed")
+    mixed.append(['value', 'flag'])
+    for value, flag in [('7', True), (8, None), ('nine', False), (10.5, True)]:
+        mixed.append([value, flag])
+    workbook.save(path)
+
+
+def _to_shared_strings(source: str, target: str) -> None:
+    """Rewrite an openpyxl workbook the way Excel stores text, in one shared strings table"""
+    strings = {}
+
+    def shared(match):
+        index = strings.setdefault(match.group(3), len(strings))
+        return b'<c r="%s"%s t="s"><v>%d</v></c>' % (match.group(1), match.group(2), index)
+
+    with zipfile.ZipFile(source) as src, zipfile.ZipFile(target, 'w', zipfile.ZIP_DEFLATED) as dst:
+        for name in src.namelist():
+            data = src.read(name)
+            if name.startswith('xl/worksheets/'):
+                data = re.sub(rb'<c r="(\w+)"((?: s="\d+")?) t="inlineStr"><is>(.*?)</is></c>', shared, data)
+            elif name == 'xl/_rels/workbook.xml.rels':
+                data = data.replace(b'</Relationships>', (
+                    b'<Relationship Id="rIdStrings" Target="sharedStrings.xml" Type="http://schemas.openxml'
+                    b'formats.org/officeDocument/2006/relationships/sharedStrings"/></Relationships>'
+                ))
+            elif name == '[Content_Types].xml':
+                data = data.replace(b'</Types>', (
+                    b'<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxml'
+                    b'formats-officedocument.spreadsheetml.sharedStrings+xml"/></Types>'
+                ))
+            dst.writestr(name, data)
+        # Phonetic hints are not part of the text
+        items = b''.join(b'<si>%s<rPh sb="0" eb="1"><t>ignored</t></rPh></si>' % text for text in strings)
+        dst.writestr(
+            'xl/sharedStrings.xml',
+            b'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">%s</sst>' % items
+        )
+
+
+def _read_openpyxl(path: str, **kwargs) -> pd.DataFrame:
+    return pd.read_excel(path, engine='openpyxl', na_values=NA_VALUES, keep_default_na=False, **kwargs)
+
+
+def test_native_reader_matches_openpyxl():
+    """Test that inline and shared strings workbooks read exactly as with openpyxl"""
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        inline_path = os.path.join(tmp_dir, "inline.xlsx")
+        shared_path = os.path.join(tmp_dir, "shared.xlsx")
+        _write_workbook(inline_path)
+        _to_shared_strings(inline_path, shared_path)
+
+        for path in (inline_path, shared_path):
+            with xlsx_reader.XlsxWorkbook(path) as workbook:
+                assert workbook.sheet_names == ['Orders', 'Mixed']
+                for sheet in ('Orders', 'Mixed'):
+                    pd.testing.assert_frame_equal(workbook.read_sheet(sheet), _read_openpyxl(path, sheet_name=sheet))
+                pd.testing.assert_frame_equal(
+                    workbook.read_sheet(0, usecols=['when', 'note', 'id.1'], nrows=2),
+                    _read_openpyxl(path, usecols=['when', 'note', 'id.1'], nrows=2)
+                )
+
+        orders = xlsx_reader.read_excel(shared_path)
+        assert orders['qty'].dtype == 'float64' and str(orders['when'].dtype).startswith('datetime64')
+        # Text that looks numeric stays text next to other text
+        assert orders['code'].tolist()[:3] == ['0042', '17', '5']
+        assert orders['note'].tolist()[5] == 'bold text'
+        assert list(orders.columns[-3:]) == ['id.1', 'Unnamed: 8', 5]
+
+
+def test_native_engine_in_file_processor():
+    """Test reads through FileProcessor with EXCEL_ENGINE 'native', and the fallback to openpyxl"""
+    engine = file_processor.EXCEL_ENGINE
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, "orders.xlsx")
+        _write_workbook(path)
+        # Cells without references are valid but left to openpyxl
+        unreferenced = os.path.join(tmp_dir, "unreferenced.xlsx")
+        with zipfile.ZipFile(path) as src, zipfile.ZipFile(unreferenced, 'w') as dst:
+            for name in src.namelist():
+                data = src.read(name)
+                if name.startswith('xl/worksheets/'):
+                    data = re.sub(rb'<c r="\w+"', b'<c', data)
+                dst.writestr(name, data)
+
+        file_processor.EXCEL_ENGINE = 'native'
+        try:
+            assert FileProcessor.get_excel_sheet_names(path) == ['Orders', 'Mixed']
+            assert FileProcessor.get_column_names(path, 'Mixed') == ['value', 'flag']
+            sheets = FileProcessor.read_sheets(path, columns={'Orders': ['id', 'paid']}, workers=1)
+            pd.testing.assert_frame_equal(sheets['Mixed'], _read_openpyxl(path, sheet_name='Mixed'))
+            assert list(sheets['Orders'].columns) == ['id', 'paid']
+
+            pd.testing.assert_frame_equal(FileProcessor.read_file(unreferenced), _read_openpyxl(unreferenced))
+            try:
+                xlsx_reader.read_excel(unreferenced)
+                assert False, "Expected NativeXlsxError"
+            except xlsx_reader.NativeXlsxError:
+                pass
+
+            output = os.path.join(tmp_dir, "copy.xlsx")
+            assert FileProcessor.write_file(FileProcessor.read_file(path, sheet_name='Mixed'), output)
+            pd.testing.assert_frame_equal(FileProcessor.read_file(output), _read_openpyxl(path, sheet_name='Mixed'))
+        finally:
+            file_processor.EXCEL_ENGINE = engine
+
+
+if __name__ == "__main__":
+    test_native_reader_matches_openpyxl()
+    test_native_engine_in_file_processor()
+    print("\n✓ All xlsx reader tests passed!")